@@ -1,32 +1,200 @@
-from sqlalchemy import NullPool, create_engine
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import DDL, AsyncAdaptedQueuePool, NullPool, QueuePool, create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
-import os
+
+from db.replicas import Replica, ReplicaSet, RoutingSession
 
 Base = declarative_base()
 
+# trigram indexes on products and orders (gin_trgm_ops)
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 load_dotenv(override=True)
 
 DATABASE_URL = os.getenv("DB_URL")
 if not DATABASE_URL:
     raise ValueError("DB_URL not found in .env")
 
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=NullPool,
-    pool_pre_ping=True,
-)
+# queue:     app-side QueuePool (default)
+# pgbouncer: QueuePool in front of PgBouncer in transaction mode; no
+#            server-side prepared statements, which PgBouncer cannot route
+# null:      NullPool, a fresh connection per checkout
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Comma-separated read replica URLs; empty keeps every read on the primary.
+DB_REPLICA_URLS = [u.strip() for u in os.getenv("DB_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "0"))
+# How long a client keeps reading from the primary after one of its writes.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+def _timed_pool(pool_cls, metrics: PoolMetrics):
+    # Subclassed per engine so Pool.recreate() keeps the same metrics.
+    class TimedPool(pool_cls):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                conn = super().connect()
+            except exc.TimeoutError:
+                metrics.record_timeout()
+                raise
+            metrics.record(time.perf_counter() - started)
+            return conn
+
+    TimedPool.metrics = metrics
+    TimedPool.__name__ = f"Timed{pool_cls.__name__}"
+    return TimedPool
+
+
+def engine_options(url: str, mode: str = DB_POOL_MODE, queue_pool=QueuePool) -> Dict[str, Any]:
+    if mode not in ("queue", "pgbouncer", "null"):
+        raise ValueError(f"Unknown DB_POOL_MODE: {mode}")
+
+    options: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING}
+    metrics = PoolMetrics()
+
+    if mode == "null":
+        options["poolclass"] = _timed_pool(NullPool, metrics)
+        return options
+
+    options.update(
+        poolclass=_timed_pool(queue_pool, metrics),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_use_lifo=True,
+    )
+
+    if mode == "pgbouncer" and make_url(url).get_driver_name() == "psycopg":
+        # psycopg 3 auto-prepares repeated statements; psycopg2 never does.
+        options["connect_args"] = {"prepare_threshold": None}
 
-try:
-    with engine.connect() as connection:
-        print("Connection successful!")
-except Exception as e:
-    print(f"Failed to connect: {e}")
+    return options
+
+
+def build_engine(url: str, mode: str = DB_POOL_MODE) -> Engine:
+    return create_engine(url, **engine_options(url, mode))
+
+
+def async_url(url: str) -> Tuple[URL, Dict[str, Any]]:
+    """
+    Rewrite a sync DB_URL for asyncpg. libpq's `sslmode` is not understood
+    by asyncpg, so it is moved to the `ssl` connect argument.
+    """
+    u = make_url(url)
+    connect_args: Dict[str, Any] = {}
+
+    if u.get_backend_name() == "postgresql":
+        query = dict(u.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        u = u.set(drivername="postgresql+asyncpg", query=query)
+    elif u.get_backend_name() == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+
+    return u, connect_args
+
+
+def build_async_engine(url: str, mode: str = DB_POOL_MODE) -> AsyncEngine:
+    u, connect_args = async_url(url)
+    options = engine_options(url, mode, queue_pool=AsyncAdaptedQueuePool)
+    options.pop("connect_args", None)
+
+    if mode == "pgbouncer" and u.get_driver_name() == "asyncpg":
+        # Transaction pooling hands each transaction a different server
+        # connection, so asyncpg must not cache or name-reuse statements.
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+        u = u.update_query_dict({"prepared_statement_cache_size": "0"})
+
+    return create_async_engine(u, connect_args=connect_args, **options)
+
+
+def pool_stats(bind: Engine) -> Dict[str, Any]:
+    pool = bind.pool
+    metrics: PoolMetrics = getattr(pool, "metrics", None) or PoolMetrics()
+    stats: Dict[str, Any] = {
+        "pool": type(pool).__name__,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_ms_avg": round(metrics.wait_total / metrics.checkouts * 1000, 3) if metrics.checkouts else 0.0,
+        "wait_ms_max": round(metrics.wait_max * 1000, 3),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+# Engines connect lazily; readiness is checked by /health/ready.
+engine = build_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     expire_on_commit=False,
-    bind=engine
+    bind=engine,
+    class_=RoutingSession,
+)
+
+async_engine = build_async_engine(DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+)
+
+replicas = ReplicaSet(
+    [Replica(url, build_engine(url), build_async_engine(url)) for url in DB_REPLICA_URLS],
+    check_interval=DB_REPLICA_CHECK_INTERVAL,
+    max_lag=DB_REPLICA_MAX_LAG,
 )
@@ -4,3 +4,7 @@ from .cart import Cart
 from .cart_item import CartItem
 from .admin import Admin
 from .order_item import OrderItem
+from .stock_reservation import StockReservation
+from .product_sales_daily import ProductSalesDaily
+from .product_ranking import ProductRanking
+from .job_watermark import JobWatermark
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, CheckConstraint
+from sqlalchemy import Column, String, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -17,6 +17,9 @@ class Cart(Base):
             'user_id IS NOT NULL OR guest_session_id IS NOT NULL',
             name='ck_cart_user_or_guest'
         ),
+        # one cart per owner; NULLs are distinct, so guest carts do not collide on user_id
+        Index('ux_carts_user_id', 'user_id', unique=True),
+        Index('ux_carts_guest_session_id', 'guest_session_id', unique=True),
     )
 
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, DateTime, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from db.database import Base
+
+class JobWatermark(Base):
+    """Where a background job over orders stopped: the last (created_at, id) it processed."""
+    __tablename__ = "job_watermarks"
+
+    name = Column(String(64), primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+    order_id = Column(UUID(as_uuid=True), nullable=False)
+    # day the job's derived data was last rebuilt for
+    rebuilt_for = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,9 +1,10 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, DateTime, Numeric, Enum, JSON, Index
+from sqlalchemy import Column, String, DateTime, Enum, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from db.database import Base
+from db.money import MoneyType, eur_alias
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -31,11 +32,17 @@ class Order(Base):
     email = Column(String, nullable=True)
 
     currency = Column(String(), nullable=False, default="eur")
-    subtotal_amount = Column(Numeric(10, 2), nullable=False, default=0)
-    discount_amount = Column(Numeric(10, 2), nullable=False, default=0)
-    shipping_amount = Column(Numeric(10, 2), nullable=False, default=0)
-    tax_amount = Column(Numeric(10, 2), nullable=False, default=0)
-    total_amount = Column(Numeric(10, 2), nullable=False, default=0)
+    subtotal_cents = Column(MoneyType, nullable=False, default=0)
+    discount_cents = Column(MoneyType, nullable=False, default=0)
+    shipping_cents = Column(MoneyType, nullable=False, default=0)
+    tax_cents = Column(MoneyType, nullable=False, default=0)
+    total_cents = Column(MoneyType, nullable=False, default=0)
+    # Decimal euros, as the order API reports them
+    subtotal_amount = eur_alias("subtotal_cents", decimal=True)
+    discount_amount = eur_alias("discount_cents", decimal=True)
+    shipping_amount = eur_alias("shipping_cents", decimal=True)
+    tax_amount = eur_alias("tax_cents", decimal=True)
+    total_amount = eur_alias("total_cents", decimal=True)
 
     status = Column(Enum(OrderStatus, name="order_status"), nullable=False, default=OrderStatus.pending)
     payment_status = Column(Enum(PaymentStatus, name="payment_status"), nullable=False, default=PaymentStatus.pending)
@@ -66,13 +73,21 @@ class Order(Base):
     shipping_details = Column(JSON, nullable=True)
     extra_metadata = Column("metadata", JSON, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(ZoneInfo("Europe/Athens")), onupdate=datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(ZoneInfo("Europe/Athens")), onupdate=lambda: datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
 
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
     __table_args__ = (
         Index("ix_orders_user_id_created_at", "user_id", "created_at"),
         Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
         Index("ix_orders_session", "stripe_checkout_session_id"),
+        Index("ix_orders_payment_intent", "stripe_payment_intent_id"),
+        # substring search from the admin order list (utils/order_search.py)
+        Index("ix_orders_id_trgm", text("(id::varchar) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_orders_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_orders_user_id_trgm", "user_id", postgresql_using="gin", postgresql_ops={"user_id": "gin_trgm_ops"}),
+        Index("ix_orders_session_trgm", "stripe_checkout_session_id", postgresql_using="gin", postgresql_ops={"stripe_checkout_session_id": "gin_trgm_ops"}),
+        Index("ix_orders_payment_intent_trgm", "stripe_payment_intent_id", postgresql_using="gin", postgresql_ops={"stripe_payment_intent_id": "gin_trgm_ops"}),
     )
@@ -1,9 +1,10 @@
 import uuid
-from sqlalchemy import Column, String, Numeric, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
 
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from db.database import Base
+from db.money import MoneyType, eur_alias
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -17,9 +18,16 @@ class OrderItem(Base):
     product_sku   = Column(String, nullable=True)
     product_image = Column(String, nullable=True)
 
-    unit_amount = Column(Numeric(10, 2), nullable=False)
-    quantity    = Column(Integer, nullable=False, default=1)
-    line_total  = Column(Numeric(10, 2), nullable=False)
+    unit_cents       = Column(MoneyType, nullable=False)
+    quantity         = Column(Integer, nullable=False, default=1)
+    line_total_cents = Column(MoneyType, nullable=False)
+    # Decimal euros, as the order API reports them
+    unit_amount = eur_alias("unit_cents", decimal=True)
+    line_total  = eur_alias("line_total_cents", decimal=True)
 
     order   = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
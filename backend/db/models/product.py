@@ -1,12 +1,13 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Float, Integer, DateTime, Enum, event
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, String, Integer, DateTime, Enum, Index, event
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from db.database import Base
+from db.money import MoneyType, eur_alias
 
 class Category(str, enum.Enum):
     rings = "rings"
@@ -21,24 +22,51 @@ class SubCategory(str, enum.Enum):
     minimal = "minimal"
     luxury = "luxury"
 
+# Name and description, lowercased and with Greek accents and final sigma
+# folded the same way utils.search.fold does, as a tsvector. translate()
+# rather than unaccent() because generated columns need immutable functions.
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', translate(lower(coalesce(name, '') || ' ' || coalesce(description, '')), "
+    "'άέήίόύώϊϋΐΰς', 'αεηιουωιυιυσ'))"
+)
+
 class Product(Base):
     __tablename__ = "products"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     description = Column(String, nullable=True)
-    price = Column(Float, nullable=False)
+    price_cents = Column(MoneyType, nullable=False)
+    # euros, for the API and admin code that predate price_cents
+    price = eur_alias("price_cents")
     stock_quantity = Column(Integer, nullable=False, default=0)
+    # units held by unexpired checkout reservations (utils/stock.py)
+    reserved_quantity = Column(Integer, nullable=False, default=0, server_default="0")
     category = Column(Enum(Category, name="category"), nullable=True)
     sub_category = Column(Enum(SubCategory, name="Subcategory"), nullable=True)
     image_url = Column(ARRAY(String), nullable=True)
     big_image_url = Column(ARRAY(String), nullable=True)
-    created_at = Column(DateTime, default=datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(ZoneInfo("Europe/Athens")), onupdate=datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(ZoneInfo("Europe/Athens")), onupdate=lambda: datetime.now(ZoneInfo("Europe/Athens")), nullable=False)
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
 
     cart_items = relationship("CartItem", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
 
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_cents_id", "price_cents", "id"),
+        Index("ix_products_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_products_sub_category_created_at_id", "sub_category", "created_at", "id"),
+        Index("ix_products_category_sub_category_created_at_id", "category", "sub_category", "created_at", "id"),
+        Index("ix_products_category_sub_category_price_cents_id", "category", "sub_category", "price_cents", "id"),
+        Index("ix_products_category_price_cents_id", "category", "price_cents", "id"),
+        Index("ix_products_sub_category_price_cents_id", "sub_category", "price_cents", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_products_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+
     class Config:
         from_attributes = True
 
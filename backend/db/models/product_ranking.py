@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+
+from db.database import Base
+
+class ProductRanking(Base):
+    """Bestseller position of a product over the last `window_days` days, rebuilt by utils/rankings.py."""
+    __tablename__ = "product_rankings"
+
+    window_days = Column(SmallInteger, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_product_rankings_product_id", "product_id"),
+    )
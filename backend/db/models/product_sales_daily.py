@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from db.database import Base
+
+class ProductSalesDaily(Base):
+    """Units of a product sold per day (Europe/Athens), kept for the widest ranking window."""
+    __tablename__ = "product_sales_daily"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from db.database import Base
+
+class StockReservation(Base):
+    """
+    A short-lived hold on `quantity` units of a product for one checkout
+    attempt. The units are counted in Product.reserved_quantity while the
+    row exists; see utils/stock.py.
+    """
+    __tablename__ = "stock_reservations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # one per checkout attempt, shared by its lines and sent to Stripe as metadata
+    reservation_id = Column(UUID(as_uuid=True), nullable=False)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_reservations_reservation_id", "reservation_id"),
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
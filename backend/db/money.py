@@ -0,0 +1,94 @@
+# db/money.py
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any
+
+from sqlalchemy import Float, Integer, cast, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.types import TypeDecorator
+
+
+def _money(result: Any) -> Any:
+    return result if result is NotImplemented else Money(result)
+
+
+class Money(int):
+    """
+    An amount in cents. Adding, subtracting and multiplying by a quantity
+    keep it Money; anything involving a float does not. `eur` and `decimal`
+    are for the API fields that are still in euros.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_eur(cls, amount: Any) -> "Money":
+        """Euros (float, Decimal, str) to cents, rounding half up."""
+        if isinstance(amount, Money):
+            return amount
+        return cls((Decimal(str(amount or 0)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @property
+    def eur(self) -> float:
+        return self / 100
+
+    @property
+    def decimal(self) -> Decimal:
+        return Decimal(int(self)).scaleb(-2)
+
+    def __add__(self, other):
+        return _money(int.__add__(self, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _money(int.__sub__(self, other))
+
+    def __rsub__(self, other):
+        return _money(int.__rsub__(self, other))
+
+    def __mul__(self, other):
+        return _money(int.__mul__(self, other))
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-int(self))
+
+    def __repr__(self) -> str:
+        return f"Money({int(self)})"
+
+
+class MoneyType(TypeDecorator):
+    """Integer cents column, read back as Money."""
+    impl = Integer
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else Money(value)
+
+
+class _EurAlias(hybrid_property):
+    def __set_name__(self, owner, name):
+        # selected as its attribute name rather than an anonymous label
+        self.__name__ = name
+
+
+def eur_alias(cents: str, decimal: bool = False) -> hybrid_property:
+    """
+    The old euro attribute over a cents column, so existing readers and
+    writers keep working: reads as float (or Decimal with `decimal`),
+    takes euros on assignment, and in SQL is cents / 100. Queries on hot
+    paths should use the cents column, which is the one indexed.
+    """
+    def fget(self):
+        value = getattr(self, cents)
+        if value is None:
+            return None
+        return Money(value).decimal if decimal else Money(value).eur
+
+    def fset(self, value):
+        setattr(self, cents, None if value is None else Money.from_eur(value))
+
+    def expr(cls):
+        return cast(getattr(cls, cents), Float) / literal_column("100.0", Float)
+
+    return _EurAlias(fget, fset, expr=expr)
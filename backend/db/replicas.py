@@ -0,0 +1,150 @@
+# db/replicas.py
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+# Seconds of replay lag, or None on a primary / a replica that has not
+# replayed anything yet.
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str, engine: Engine, async_engine: AsyncEngine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at = 0.0
+        self.reads = 0
+
+        # A dropped connection mid-request takes the replica out of rotation
+        # right away instead of waiting for the next health check.
+        event.listen(engine, "handle_error", self._on_error)
+        event.listen(async_engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(str(context.original_exception))
+
+    def mark_down(self, reason: str) -> None:
+        self.healthy = False
+        self.last_error = reason[:200]
+
+
+class ReplicaSet:
+    """
+    Read replicas taken round-robin. A background thread probes each one
+    every `check_interval` seconds; a replica that fails the probe or lags
+    more than `max_lag` seconds (0 disables the lag check) is skipped until
+    it passes again. With no healthy replica, `pick` returns None and reads
+    fall back to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica], check_interval: float = 5.0, max_lag: float = 0.0, check_timeout: float = 2.0):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._lock = threading.Lock()
+        self._checker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        self.start()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+            self.fallbacks += 1
+        return None
+
+    def check(self, replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(self.check_timeout * 1000)}"))
+                lag = conn.execute(_LAG_SQL).scalar()
+        except Exception as e:
+            replica.mark_down(str(e))
+        else:
+            replica.lag = float(lag) if lag is not None else None
+            if self.max_lag and replica.lag is not None and replica.lag > self.max_lag:
+                replica.mark_down(f"replication lag {replica.lag:.1f}s")
+            else:
+                replica.healthy = True
+                replica.last_error = None
+        replica.checked_at = time.time()
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check_all()
+
+    def start(self) -> None:
+        if self._checker is not None or not self.replicas:
+            return
+        with self._lock:
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._run, name="replica-health", daemon=True)
+                self._checker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fallbacks": self.fallbacks,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "lag_s": None if r.lag is None else round(r.lag, 3),
+                    "reads": r.reads,
+                    "last_error": r.last_error,
+                }
+                for r in self.replicas
+            ],
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the engine stored in
+    `info["read_bind"]` and everything else (flushes, DML, SELECT ... FOR
+    UPDATE, text() statements, which may well write) to its own bind, the
+    primary. Sessions without a read bind behave like a plain Session.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        read_bind: Optional[Engine] = self.info.get("read_bind")
+        if (
+            read_bind is not None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            return read_bind
+        return super().get_bind(mapper, clause=clause, **kw)
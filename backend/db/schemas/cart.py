@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
-from typing import List
+from typing import List, Literal, Optional
 from .cart_item import CartItemOut
 
+# Largest quantity of one product in a cart.
+MAX_LINE_QUANTITY = 99
+
 class ShippingQuote(BaseModel):
     method: str
     label: str
@@ -13,6 +16,8 @@ class CartSummary(BaseModel):
     items: List[CartItemOut] = Field(default_factory=list)
     total_items: int
     subtotal: float
+    shipping_options: List[ShippingQuote] = Field(default_factory=list)
+    selected_method: Optional[str] = None
     shipping_amount: float = 0.0
     free_shipping_threshold: float = 150.0
     free_shipping_applied: bool = False
@@ -20,3 +25,26 @@ class CartSummary(BaseModel):
 
     class Config:
         from_attributes = True
+
+class CartOperation(BaseModel):
+    """
+    One step of PATCH /cart. `set` makes the line `quantity` units (0
+    removes it), `add` adds `quantity` units (default 1), `remove` drops the
+    line and `clear` empties the cart.
+    """
+    op: Literal["set", "add", "remove", "clear"]
+    product_id: Optional[UUID] = None
+    quantity: Optional[int] = Field(None, ge=0, le=MAX_LINE_QUANTITY)
+
+    @model_validator(mode="after")
+    def _check_operands(self):
+        if self.op != "clear" and self.product_id is None:
+            raise ValueError(f"'{self.op}' needs a product_id")
+        if self.op == "set" and self.quantity is None:
+            raise ValueError("'set' needs a quantity")
+        if self.op == "add" and self.quantity == 0:
+            raise ValueError("'add' needs a positive quantity")
+        return self
+
+class CartPatchRequest(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1)
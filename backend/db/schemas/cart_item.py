@@ -13,4 +13,5 @@ class CartItemProduct(BaseModel):
 
 class CartItemOut(BaseModel):
     product: CartItemProduct
+    quantity: int = 1
     line_total: float
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 from db.models.product import Category, SubCategory
@@ -18,10 +18,31 @@ class ProductSummary(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductBatchRequest(BaseModel):
+    ids: List[UUID]
+
+class ProductBatchOut(BaseModel):
+    items: List[ProductSummary]
+    missing: List[UUID]
+
+class PriceRangeCount(BaseModel):
+    label: str
+    min_price: float
+    max_price: Optional[float]
+    count: int
+
+class ProductFacetsOut(BaseModel):
+    total: int
+    categories: Dict[str, int]
+    subcategories: Dict[str, int]
+    category_subcategories: Dict[str, Dict[str, int]]
+    price_ranges: List[PriceRangeCount]
+
 class ProductBase(BaseModel):
     name: str
     description: Optional[str]
     price: float
+    stock_quantity: int = Field(0, ge=0)
     category: Optional[Category] = None
     sub_category: Optional[SubCategory] = None
     image_url: Optional[List[str]] = None
@@ -50,6 +71,7 @@ class ProductUpdateRequest(BaseModel):
     category: Optional[Category]
     sub_category: Optional[SubCategory]
     image_url: Optional[List[str]]
+    stock_quantity: Optional[int] = Field(None, ge=0)
 
     @model_validator(mode="after")
     def _auto_clear_sub_for_crosses(self):
@@ -59,6 +81,7 @@ class ProductUpdateRequest(BaseModel):
 
 class ProductOut(ProductBase):
     id: UUID
+    reserved_quantity: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -1,10 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 from starlette.middleware.gzip import GZipMiddleware
 
+from db.database import engine, async_engine, replicas
 from routes import product_router, order_router, admin_router, cart_router, checkout_router, user_router
+from utils.catalog_cache import catalog_listener
+from utils.clerk_client import get_clerk_client
+from utils.database import stick_to_primary_after_write
+from utils.rankings import ranking_job
+from utils.stock import stock_sweeper
+from utils.stripe_client import get_stripe
+
+async def _ping_db(timeout: float = 2.0) -> None:
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.wait_for(ping(), timeout)
+
+async def _warm_up(app: FastAPI) -> None:
+    # Runs after uvicorn starts accepting connections, so `/` and
+    # /health/live answer right away while this is still going.
+    errors = app.state.warmup_errors
+    try:
+        await asyncio.to_thread(get_stripe)
+    except Exception as e:
+        errors["stripe"] = str(e)
+    try:
+        await _ping_db(timeout=10.0)
+    except Exception as e:
+        errors["db"] = str(e)
+    replicas.start()
+    app.state.warm = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.warm = False
+    app.state.warmup_errors = {}
+    warmup = asyncio.create_task(_warm_up(app))
+    catalog_listener.start()
+    stock_sweeper.start()
+    ranking_job.start()
+    yield
+    warmup.cancel()
+    catalog_listener.stop()
+    stock_sweeper.stop()
+    ranking_job.stop()
+    replicas.stop()
+    await get_clerk_client().aclose()
+    await async_engine.dispose()
+    engine.dispose()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+app.middleware("http")(stick_to_primary_after_write)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(
@@ -28,6 +82,26 @@ app.add_middleware(
 def root():
     return {"message": "PNOH API is running!"}
 
+@app.get("/health/live", tags=["Healtch Check"])
+async def health_live():
+    return {"status": "ok"}
+
+@app.get("/health/ready", tags=["Healtch Check"])
+async def health_ready():
+    checks = {"warm": app.state.warm, "db": "ok"}
+    try:
+        await _ping_db()
+    except Exception as e:
+        checks["db"] = str(e) or type(e).__name__
+    if app.state.warmup_errors:
+        checks["warmup_errors"] = app.state.warmup_errors
+
+    ready = app.state.warm and checks["db"] == "ok"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "checks": checks},
+    )
+
 app.include_router(product_router)
 app.include_router(admin_router)
 app.include_router(cart_router)
@@ -0,0 +1,46 @@
+"""add stock reservations
+
+Revision ID: 5d0f6b8c2a91
+Revises: e7b2d49a1f03
+Create Date: 2026-10-18 21:07:33.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0f6b8c2a91'
+down_revision: Union[str, Sequence[str], None] = 'e7b2d49a1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is a metadata-only change; products is not rewritten.
+    op.add_column('products', sa.Column('reserved_quantity', sa.Integer(), server_default='0', nullable=False))
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('reservation_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stock_reservations_reservation_id', 'stock_reservations', ['reservation_id'])
+    op.create_index('ix_stock_reservations_expires_at', 'stock_reservations', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_reservations_expires_at', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_reservation_id', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_column('products', 'reserved_quantity')
@@ -0,0 +1,28 @@
+"""add token_version to admins
+
+Revision ID: 7c2e9a41d0b3
+Revises: 1395043c06cd
+Create Date: 2026-10-18 10:12:41.302114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a41d0b3'
+down_revision: Union[str, Sequence[str], None] = '1395043c06cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('admins', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('admins', 'token_version')
@@ -0,0 +1,68 @@
+"""add product rankings
+
+Revision ID: 8a3e61c0d7f5
+Revises: 5d0f6b8c2a91
+Create Date: 2026-10-18 22:34:16.905241
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3e61c0d7f5'
+down_revision: Union[str, Sequence[str], None] = '5d0f6b8c2a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_sales_daily',
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'day'),
+    )
+    op.create_table(
+        'product_rankings',
+        sa.Column('window_days', sa.SmallInteger(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('window_days', 'rank'),
+    )
+    op.create_index('ix_product_rankings_product_id', 'product_rankings', ['product_id'])
+    op.create_table(
+        'job_watermarks',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('rebuilt_for', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+    # The ranking job reads orders after its watermark and joins their items.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_order_items_order_id', 'order_items', ['order_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_order_items_order_id', table_name='order_items', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_orders_created_at_id', table_name='orders', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('job_watermarks')
+    op.drop_index('ix_product_rankings_product_id', table_name='product_rankings')
+    op.drop_table('product_rankings')
+    op.drop_table('product_sales_daily')
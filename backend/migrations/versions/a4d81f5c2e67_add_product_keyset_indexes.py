@@ -0,0 +1,41 @@
+"""add product keyset indexes
+
+Revision ID: a4d81f5c2e67
+Revises: 7c2e9a41d0b3
+Create Date: 2026-10-18 13:20:09.415522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d81f5c2e67'
+down_revision: Union[str, Sequence[str], None] = '7c2e9a41d0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_products_created_at_id', ['created_at', 'id']),
+    ('ix_products_price_id', ['price', 'id']),
+    ('ix_products_category_created_at_id', ['category', 'created_at', 'id']),
+    ('ix_products_sub_category_created_at_id', ['sub_category', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the catalog writable while the indexes build; it
+    # cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'products', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='products', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,66 @@
+"""add cart unique indexes
+
+Revision ID: b6e4f27a9c18
+Revises: 8a3e61c0d7f5
+Create Date: 2026-10-18 23:52:40.117364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e4f27a9c18'
+down_revision: Union[str, Sequence[str], None] = '8a3e61c0d7f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing duplicates are folded together first, and cart writes are
+    # blocked until the indexes exist so no new ones slip in. The cart
+    # tables are small, so the indexes are built in this transaction rather
+    # than concurrently.
+    op.execute('LOCK TABLE carts, cart_items IN SHARE ROW EXCLUSIVE MODE')
+
+    # Duplicate carts of one owner: keep the one with the most items and
+    # move the others' items into it.
+    for owner in ('user_id', 'guest_session_id'):
+        op.execute(f"""
+            CREATE TEMP TABLE cart_dupes ON COMMIT DROP AS
+            SELECT id, keeper FROM (
+                SELECT c.id, first_value(c.id) OVER (
+                    PARTITION BY c.{owner}
+                    ORDER BY (SELECT count(*) FROM cart_items i WHERE i.cart_id = c.id) DESC, c.id
+                ) AS keeper
+                FROM carts c WHERE c.{owner} IS NOT NULL
+            ) ranked
+            WHERE id <> keeper
+        """)
+        op.execute('UPDATE cart_items i SET cart_id = d.keeper FROM cart_dupes d WHERE i.cart_id = d.id')
+        op.execute('DELETE FROM carts c USING cart_dupes d WHERE c.id = d.id')
+        op.execute('DROP TABLE cart_dupes')
+
+    # Duplicate lines in one cart: keep one, with the largest quantity.
+    op.execute("""
+        CREATE TEMP TABLE cart_item_dupes ON COMMIT DROP AS
+        SELECT id,
+               first_value(id) OVER (PARTITION BY cart_id, product_id ORDER BY quantity DESC, id) AS keeper
+        FROM cart_items
+    """)
+    op.execute('DELETE FROM cart_items i USING cart_item_dupes d WHERE i.id = d.id AND d.id <> d.keeper')
+    op.execute('DROP TABLE cart_item_dupes')
+
+    op.create_index('ux_carts_user_id', 'carts', ['user_id'], unique=True)
+    op.create_index('ux_carts_guest_session_id', 'carts', ['guest_session_id'], unique=True)
+    op.create_index('ux_cart_items_cart_id_product_id', 'cart_items', ['cart_id', 'product_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_cart_items_cart_id_product_id', table_name='cart_items')
+    op.drop_index('ux_carts_guest_session_id', table_name='carts')
+    op.drop_index('ux_carts_user_id', table_name='carts')
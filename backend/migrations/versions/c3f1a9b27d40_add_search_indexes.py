@@ -0,0 +1,66 @@
+"""add search indexes
+
+Revision ID: c3f1a9b27d40
+Revises: a4d81f5c2e67
+Create Date: 2026-10-18 16:02:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a9b27d40'
+down_revision: Union[str, Sequence[str], None] = 'a4d81f5c2e67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# same expression as Product.search_vector
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', translate(lower(coalesce(name, '') || ' ' || coalesce(description, '')), "
+    "'άέήίόύώϊϋΐΰς', 'αεηιουωιυιυσ'))"
+)
+
+TRGM_INDEXES = [
+    ('ix_orders_email_trgm', 'orders', 'email'),
+    ('ix_orders_user_id_trgm', 'orders', 'user_id'),
+    ('ix_orders_session_trgm', 'orders', 'stripe_checkout_session_id'),
+    ('ix_orders_payment_intent_trgm', 'orders', 'stripe_payment_intent_id'),
+    ('ix_products_name_trgm', 'products', 'name'),
+    ('ix_products_description_trgm', 'products', 'description'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Rewrites products once to fill the column; the catalog is small.
+    op.add_column('products', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True,
+    ))
+
+    # CONCURRENTLY keeps orders writable while the indexes build; it cannot
+    # run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_payment_intent', 'orders', ['stripe_payment_intent_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_orders_id_trgm', 'orders', [sa.text('(id::varchar) gin_trgm_ops')],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        for name, table, column in TRGM_INDEXES:
+            op.create_index(name, table, [column], postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                            postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_products_search_vector', 'products', ['search_vector'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ['ix_products_search_vector', 'ix_orders_id_trgm', 'ix_orders_payment_intent'] + [n for n, _, _ in TRGM_INDEXES]:
+            table = 'products' if name.startswith('ix_products') else 'orders'
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_column('products', 'search_vector')
+    # pg_trgm stays installed; other schemas in the database may use it.
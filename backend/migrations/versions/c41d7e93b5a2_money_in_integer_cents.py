@@ -0,0 +1,68 @@
+"""money in integer cents
+
+Revision ID: c41d7e93b5a2
+Revises: b6e4f27a9c18
+Create Date: 2026-10-18 16:05:12.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e93b5a2'
+down_revision: Union[str, Sequence[str], None] = 'b6e4f27a9c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, old euro column, new cents column)
+MONEY_COLUMNS = [
+    ('products', 'price', 'price_cents'),
+    ('orders', 'subtotal_amount', 'subtotal_cents'),
+    ('orders', 'discount_amount', 'discount_cents'),
+    ('orders', 'shipping_amount', 'shipping_cents'),
+    ('orders', 'tax_amount', 'tax_cents'),
+    ('orders', 'total_amount', 'total_cents'),
+    ('order_items', 'unit_amount', 'unit_cents'),
+    ('order_items', 'line_total', 'line_total_cents'),
+]
+
+# (name, leading columns); each ends with (price column, id)
+PRICE_INDEXES = [
+    ('ix_products_{}_id', []),
+    ('ix_products_category_sub_category_{}_id', ['category', 'sub_category']),
+    ('ix_products_category_{}_id', ['category']),
+    ('ix_products_sub_category_{}_id', ['sub_category']),
+]
+
+OLD_TYPES = {'price': sa.Float()}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each money column is swapped for an integer cents column in one
+    # transaction, rounding half up (numeric round() rounds half away from
+    # zero). The tables are rewritten and locked meanwhile, so the indexes
+    # are built in the same transaction rather than concurrently.
+    for table, old, new in MONEY_COLUMNS:
+        op.add_column(table, sa.Column(new, sa.Integer(), nullable=True))
+        op.execute(f'UPDATE {table} SET {new} = round({old}::numeric * 100)')
+        op.alter_column(table, new, nullable=False)
+        op.drop_column(table, old)  # drops the indexes on it too
+
+    for name, columns in PRICE_INDEXES:
+        op.create_index(name.format('price_cents'), 'products', [*columns, 'price_cents', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, old, new in MONEY_COLUMNS:
+        op.add_column(table, sa.Column(old, OLD_TYPES.get(old, sa.Numeric(10, 2)), nullable=True))
+        op.execute(f'UPDATE {table} SET {old} = {new} / 100.0')
+        op.alter_column(table, old, nullable=False)
+        op.drop_column(table, new)
+
+    for name, columns in PRICE_INDEXES:
+        op.create_index(name.format('price'), 'products', [*columns, 'price', 'id'])
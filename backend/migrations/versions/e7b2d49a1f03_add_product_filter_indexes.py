@@ -0,0 +1,40 @@
+"""add product filter indexes
+
+Revision ID: e7b2d49a1f03
+Revises: c3f1a9b27d40
+Create Date: 2026-10-18 19:41:52.603117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2d49a1f03'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a9b27d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (created_at, id) and (price, id) already exist (a4d81f5c2e67).
+INDEXES = [
+    ('ix_products_category_sub_category_created_at_id', ['category', 'sub_category', 'created_at', 'id']),
+    ('ix_products_category_sub_category_price_id', ['category', 'sub_category', 'price', 'id']),
+    ('ix_products_category_price_id', ['category', 'price', 'id']),
+    ('ix_products_sub_category_price_id', ['sub_category', 'price', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'products', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='products', postgresql_concurrently=True, if_exists=True)
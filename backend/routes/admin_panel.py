@@ -1,9 +1,9 @@
 from uuid import UUID, uuid4
 from fastapi import APIRouter, Depends, HTTPException, Query, Form, UploadFile, File, Body
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Literal, Optional, List
-from sqlalchemy import or_
 import json
 from pydantic import ValidationError
 
@@ -13,9 +13,17 @@ from utils.b2_images import create_and_upload_thumbnail, upload_image_bytes
 from utils.database import get_db
 from db.models.product import Product, Category, SubCategory
 from db.models import Admin, Product, Order
-from db.schemas.product import ProductCreate, ProductOut, ProductUpdateRequest, ProductSummary
+from db.schemas.product import ProductCreate, ProductOut, ProductUpdateRequest
 from db.schemas.admin import AdminLogin
-from utils.admin_auth import create_access_token, verify_password, get_current_admin
+from utils.admin_auth import create_access_token, verify_password, get_current_admin, revoke_admin_tokens, AdminPrincipal, admin_principals
+from utils.user_auth import verified_sessions
+from utils.clerk_client import get_clerk_client
+from utils.catalog_cache import catalog_cache, catalog_listener, mark_catalog_changed
+from utils.facets import facet_counts
+from utils.rankings import ranking_job
+from utils.stock import stock_sweeper
+from utils.search import SEARCH_BACKEND, search_index, search_query
+from db.database import engine, async_engine, pool_stats, replicas
 
 router = APIRouter()
 
@@ -27,26 +35,31 @@ def _ensure_list_of_str(name, val):
         if not isinstance(it, str):
             raise HTTPException(422, detail=f"{name}[{i}] must be a string URL")
 
-@router.get("/admin/products/all", response_model=List[ProductSummary], tags=["Admin Products"])
+@router.get("/admin/products/all", response_model=List[ProductOut], tags=["Admin Products"])
 def admin_get_products(
     db: Session = Depends(get_db),
     category: Optional[Category] = Query(None),
     subcategory: Optional[SubCategory] = Query(None),
-    q: Optional[str] = Query(None, description="search in name/description"),
+    q: Optional[str] = Query(None, description="search in name/description/category, ranked by relevance"),
     skip: int = Query(0, ge=0),
     limit: int = Query(12, ge=1, le=100),
 ):
-    query = db.query(Product)
+    if q and SEARCH_BACKEND != "postgres":
+        search_index.ensure(db)
+        ids = search_index.search(q, category, subcategory, skip, limit)
+        found = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids)).all()} if ids else {}
+        return [found[i] for i in ids if i in found]
+
+    query = select(Product)
 
     if category is not None:
-        query = query.filter(Product.category == category)
+        query = query.where(Product.category == category)
     if subcategory is not None:
-        query = query.filter(Product.sub_category == subcategory)
+        query = query.where(Product.sub_category == subcategory)
     if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Product.name.ilike(like), Product.description.ilike(like)))
+        query = search_query(query, q)
 
-    products = query.offset(skip).limit(limit).all()
+    products = db.scalars(query.offset(skip).limit(limit)).all()
     return products
 
 @router.get("/admin/dev-token", tags=["Admin Login"])
@@ -85,6 +98,36 @@ def login_admin(
 
     return response
 
+@router.post("/admin/logout", tags=["Admin Login"])
+def logout_admin(
+    db: Session = Depends(get_db),
+    admin: AdminPrincipal = Depends(get_current_admin)
+):
+    # Bumps the admin's token version, signing out every session they have.
+    revoke_admin_tokens(db, admin.id)
+
+    response = JSONResponse(content={"message": "Αποσυνδεθήκατε"})
+    response.delete_cookie(key="token", path="/", secure=True, httponly=True, samesite="none")
+    return response
+
+@router.get("/admin/metrics", tags=["Admin Metrics"])
+def admin_metrics(
+    admin: AdminPrincipal = Depends(get_current_admin)
+):
+    return {
+        "db_pool": pool_stats(engine),
+        "db_pool_async": pool_stats(async_engine.sync_engine),
+        "db_replicas": replicas.stats(),
+        "catalog_cache": {**catalog_cache.stats(), "listener": catalog_listener.stats()},
+        "search_index": search_index.stats(),
+        "facets": facet_counts.stats(),
+        "stock_sweeper": stock_sweeper.stats(),
+        "rankings": ranking_job.stats(),
+        "clerk": get_clerk_client().stats(),
+        "clerk_sessions": verified_sessions.stats(),
+        "admin_principals": admin_principals.stats(),
+    }
+
 @router.post("/admin/products/", response_model=ProductOut, tags=["Admin Products"])
 async def create_product(
     payload: Optional[str] = Form(None),
@@ -92,7 +135,7 @@ async def create_product(
     image: Optional[UploadFile] = File(None), 
     payload_json: Optional[ProductCreate] = Body(None),
     db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin)
+    admin: AdminPrincipal = Depends(get_current_admin)
 ):
     if payload_json is not None:
         product_data = payload_json
@@ -133,6 +176,7 @@ async def create_product(
     if original_urls: new_product.big_image_url = original_urls
 
     db.add(new_product)
+    mark_catalog_changed(db)
     db.commit()
     db.refresh(new_product)
     
@@ -147,7 +191,7 @@ async def update_product(
     image_action: Literal["append", "replace"] = Form("append"),
     payload_json: Optional[ProductUpdateRequest] = Body(None),
     db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin)
+    admin: AdminPrincipal = Depends(get_current_admin)
 ):
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
@@ -172,6 +216,12 @@ async def update_product(
     upd = data.model_dump(exclude_unset=True)
     if "image_url" in upd: _ensure_list_of_str("image_url", upd["image_url"])
     if "big_image_url" in upd: _ensure_list_of_str("big_image_url", upd["big_image_url"])
+    # units held by open checkouts are still promised to them
+    if upd.get("stock_quantity") is not None and upd["stock_quantity"] < (product.reserved_quantity or 0):
+        raise HTTPException(
+            409,
+            detail=f"stock_quantity cannot go below the {product.reserved_quantity} units held by open checkouts",
+        )
 
     for k, v in upd.items():
         setattr(product, k, v)
@@ -206,6 +256,7 @@ async def update_product(
             product.big_image_url = (product.big_image_url or []) + original_urls
             product.image_url = (product.image_url or []) + thumb_urls
 
+    mark_catalog_changed(db)
     db.commit()
     db.refresh(product)
 
@@ -215,13 +266,14 @@ async def update_product(
 def delete_product(
     product_id: str,
     db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin)
+    admin: AdminPrincipal = Depends(get_current_admin)
 ):
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     db.delete(product)
+    mark_catalog_changed(db)
     db.commit()
     
     return {"detail": "Product deleted successfully"}
@@ -239,7 +291,7 @@ def update_order_status(
     order_id: UUID,
     body: OrderStatusUpdate,
     db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin)
+    admin: AdminPrincipal = Depends(get_current_admin)
 ):
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
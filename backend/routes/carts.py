@@ -1,233 +1,359 @@
-from decimal import Decimal
-from uuid import UUID
+import os
+from uuid import UUID, uuid4
+from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, Depends, Query, Response, status, Cookie
-from sqlalchemy.orm import Session
-from typing import Literal, Optional, List
+from sqlalchemy import column, delete, literal_column, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Literal, Optional, List, Tuple
 
-from routes.stripe_checkout import _shipping_options_for_subtotal
-from db.models.product import Product
+from routes.products import SUMMARY_COLUMNS
 from db.models.cart import Cart
 from db.models.cart_item import CartItem
+from db.models.product import Product
+from db.money import Money
 from db.schemas.product import ProductSummary
-from db.schemas.cart import CartSummary, ShippingQuote
+from db.schemas.cart import MAX_LINE_QUANTITY, CartOperation, CartPatchRequest, CartSummary, ShippingQuote
 from db.schemas.cart_item import CartItemOut, CartItemProduct
-from utils.database import get_db
+from utils.database import get_async_db, get_async_read_db
+from utils.pricing import FREE_THRESHOLD_CENTS, forget_priced_carts, price_cart_async
 from utils.user_auth import get_current_user_optional, get_or_create_guest_session
 
-FREE_THRESHOLD_EUR = Decimal("150.00")
+load_dotenv(override=True)
+
+CART_PATCH_MAX = int(os.getenv("CART_PATCH_MAX", "100"))
+# What a guest line does to the same product in the user's cart on sign-in:
+# keep, sum or max (see MERGE_POLICIES).
+CART_MERGE_POLICY = os.getenv("CART_MERGE_POLICY", "keep").lower()
 
 router = APIRouter()
 
-def _round2(x: Decimal | float) -> float:
-    return float(Decimal(str(x)).quantize(Decimal("0.01")))
+def _cart_owner(auth: Optional[dict], session_id: Optional[str]):
+    """The cart column and value identifying the caller's cart."""
+    if auth:
+        return Cart.user_id, auth["user_id"]
+    return Cart.guest_session_id, session_id
+
+# Finds or creates the owner's cart as the `cart` CTE. cart is empty only if
+# a concurrent request created the cart after the statement's snapshot was
+# taken; it is committed by the time the statement returns, so running the
+# statement again finds it.
+CART_CTES = """
+    existing AS (
+        SELECT id FROM carts WHERE {owner} = :owner_id
+    ), created AS (
+        INSERT INTO carts (id, {owner})
+        SELECT CAST(:cart_id AS uuid), :owner_id
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+        ON CONFLICT ({owner}) DO NOTHING
+        RETURNING id
+    ), cart AS (
+        SELECT id FROM existing UNION ALL SELECT id FROM created
+    )
+"""
+
+# Adds the line unless it is already there and returns the product with the
+# cart id, in one statement. The unique indexes on the cart owner and on
+# (cart_id, product_id) make concurrent adds converge on one cart and one
+# line; adding again writes nothing.
+ADD_TO_CART_SQL = """
+    WITH {cart_ctes}, product AS (
+        {product}
+    ), added AS (
+        INSERT INTO cart_items (id, cart_id, product_id, quantity)
+        SELECT CAST(:item_id AS uuid), cart.id, product.id, 1 FROM cart, product
+        ON CONFLICT (cart_id, product_id) DO NOTHING
+    )
+    SELECT product.*, (SELECT id FROM cart LIMIT 1) AS cart_id FROM product
+"""
+
+_CART_CTES = {owner.key: CART_CTES.format(owner=owner.key) for owner in (Cart.user_id, Cart.guest_session_id)}
+_FIND_OR_CREATE_CART = {key: text(f"WITH {ctes} SELECT id FROM cart LIMIT 1") for key, ctes in _CART_CTES.items()}
+# the catalog summary of one product, with the euro price computed from cents
+_PRODUCT_SQL = str(
+    select(*SUMMARY_COLUMNS)
+    .where(Product.id == literal_column("CAST(:product_id AS uuid)"))
+    .compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+)
+_ADD_TO_CART = {
+    key: text(ADD_TO_CART_SQL.format(cart_ctes=ctes, product=_PRODUCT_SQL))
+    .columns(*SUMMARY_COLUMNS, column("cart_id", PG_UUID(as_uuid=True)))
+    for key, ctes in _CART_CTES.items()
+}
+
+# PATCH /cart: drops the removed lines, or every line when the cart is cleared.
+_REMOVE_LINES = text("""
+    DELETE FROM cart_items
+    WHERE cart_id = CAST(:cart_id AS uuid)
+      AND (CAST(:clear AS boolean) OR product_id = ANY(CAST(:product_ids AS uuid[])))
+""")
+
+# PATCH /cart: writes every other line in one statement. Relative lines add
+# their units to the line already in the cart; the others replace it.
+# Returns the ids of the products written, so unknown products show as
+# missing.
+_UPSERT_LINES = text("""
+    WITH lines AS (
+        SELECT l.product_id, l.quantity, l.relative
+        FROM unnest(CAST(:product_ids AS uuid[]), CAST(:quantities AS int[]), CAST(:relative AS boolean[]))
+             AS l(product_id, quantity, relative)
+        JOIN products p ON p.id = l.product_id
+    ), set_lines AS (
+        INSERT INTO cart_items (id, cart_id, product_id, quantity)
+        SELECT gen_random_uuid(), CAST(:cart_id AS uuid), product_id, quantity FROM lines WHERE NOT relative
+        ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = EXCLUDED.quantity
+        RETURNING product_id
+    ), added_lines AS (
+        INSERT INTO cart_items (id, cart_id, product_id, quantity)
+        SELECT gen_random_uuid(), CAST(:cart_id AS uuid), product_id, quantity FROM lines WHERE relative
+        ON CONFLICT (cart_id, product_id) DO UPDATE
+        SET quantity = LEAST(cart_items.quantity + EXCLUDED.quantity, :max_quantity)
+        RETURNING product_id
+    )
+    SELECT product_id FROM set_lines UNION ALL SELECT product_id FROM added_lines
+""")
+
+# Guest-to-user merge: copies the guest lines into the user's cart. What
+# happens to a product already in the user's cart is the policy's ON
+# CONFLICT action.
+MERGE_POLICIES = {
+    # the user's line stays as it is
+    "keep": "DO NOTHING",
+    # the quantities are added up
+    "sum": "DO UPDATE SET quantity = LEAST(cart_items.quantity + EXCLUDED.quantity, :max_quantity)",
+    # the larger quantity wins
+    "max": "DO UPDATE SET quantity = GREATEST(cart_items.quantity, EXCLUDED.quantity)",
+}
+if CART_MERGE_POLICY not in MERGE_POLICIES:
+    raise ValueError(f"Unknown CART_MERGE_POLICY: {CART_MERGE_POLICY}")
+
+_MERGE_LINES = text(f"""
+    INSERT INTO cart_items (id, cart_id, product_id, quantity)
+    SELECT gen_random_uuid(), CAST(:user_cart_id AS uuid), product_id, quantity
+    FROM cart_items WHERE cart_id = CAST(:guest_cart_id AS uuid)
+    ON CONFLICT (cart_id, product_id) {MERGE_POLICIES[CART_MERGE_POLICY]}
+""")
+
+# A cart and its lines, in one statement.
+_DELETE_CART = text("""
+    WITH lines AS (DELETE FROM cart_items WHERE cart_id = CAST(:cart_id AS uuid))
+    DELETE FROM carts WHERE id = CAST(:cart_id AS uuid)
+""")
+
+async def _find_or_create_cart(db: AsyncSession, owner, owner_id: str) -> UUID:
+    params = {"owner_id": owner_id, "cart_id": uuid4()}
+    cart_id = await db.scalar(_FIND_OR_CREATE_CART[owner.key], params)
+    if cart_id is None:
+        cart_id = await db.scalar(_FIND_OR_CREATE_CART[owner.key], params)
+    return cart_id
+
+def _fold_operations(operations: List[CartOperation]) -> Tuple[bool, Dict[UUID, Tuple[bool, int]]]:
+    """
+    Reduce PATCH /cart operations, in order, to their net effect: whether
+    the cart is emptied first, and per product (relative, quantity): the
+    line's new quantity, or the units to add to the line already in the
+    cart if nothing before fixed it. Quantity 0 removes the line.
+    """
+    clear = False
+    lines: Dict[UUID, Tuple[bool, int]] = {}
+    for operation in operations:
+        if operation.op == "clear":
+            clear, lines = True, {}
+        elif operation.op == "remove":
+            lines[operation.product_id] = (False, 0)
+        elif operation.op == "set":
+            lines[operation.product_id] = (False, operation.quantity)
+        else:
+            relative, quantity = lines.get(operation.product_id, (not clear, 0))
+            lines[operation.product_id] = (relative, min(quantity + (operation.quantity or 1), MAX_LINE_QUANTITY))
+    return clear, lines
 
 @router.post("/cart/{product_id}", response_model=ProductSummary, tags=["Cart"])
-def add_to_cart(
+async def add_to_cart(
     product_id: UUID,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     auth: Optional[dict] = Depends(get_current_user_optional),
     guest_session_id: Optional[str] = Cookie(None),
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    owner, owner_id = _cart_owner(auth, None if auth else get_or_create_guest_session(guest_session_id, response))
+
+    params = {"owner_id": owner_id, "cart_id": uuid4(), "item_id": uuid4(), "product_id": product_id}
+    row = (await db.execute(_ADD_TO_CART[owner.key], params)).first()
+    if row is not None and row.cart_id is None:
+        # lost the race to create this owner's cart: it is committed now
+        row = (await db.execute(_ADD_TO_CART[owner.key], params)).first()
+    if row is None:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Product not found.")
+    await db.commit()
 
-    if auth:
-        cart = db.query(Cart).filter(Cart.user_id == auth["user_id"]).first()
-        if not cart:
-            cart = Cart(user_id=auth["user_id"])
-            db.add(cart)
-            db.commit()
-            db.refresh(cart)
-    else:
-        session_id = get_or_create_guest_session(guest_session_id, response)
-        cart = db.query(Cart).filter(Cart.guest_session_id == session_id).first()
-        if not cart:
-            cart = Cart(guest_session_id=session_id)
-            db.add(cart)
-            db.commit()
-            db.refresh(cart)
-
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-
-    if not cart_item:
-        cart_item = CartItem(cart_id = cart.id, product_id = product_id)
-        db.add(cart_item)
-        db.commit()
-
+    product = row._asdict()
+    del product["cart_id"]
     return product
 
 @router.delete("/cart/{product_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Cart"])
-def remove_from_cart(
+async def remove_from_cart(
     product_id: UUID,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     auth: Optional[dict] = Depends(get_current_user_optional),
     guest_session_id: Optional[str] = Cookie(None),
 ):
-    cart = None
-
-    if auth:
-        user_id = auth["user_id"]
-        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
-    else:
-        session_id = get_or_create_guest_session(guest_session_id, response)
-        cart = db.query(Cart).filter(Cart.guest_session_id == session_id).first()
-
-    if not cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
+    owner, owner_id = _cart_owner(auth, None if auth else get_or_create_guest_session(guest_session_id, response))
 
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-
-    if not cart_item:
+    removed = await db.scalar(
+        delete(CartItem)
+        .where(CartItem.cart_id == Cart.id, owner == owner_id, CartItem.product_id == product_id)
+        .returning(CartItem.id)
+    )
+    if removed is None:
+        await db.rollback()
+        if not await db.scalar(select(Cart.id).where(owner == owner_id)):
+            raise HTTPException(status_code=404, detail="Cart not found")
         raise HTTPException(status_code=404, detail="Item not found in cart")
-
-    db.delete(cart_item)
-    db.commit()
+    await db.commit()
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/cart", response_model=CartSummary)
-def get_cart(
-    db: Session = Depends(get_db),
+async def get_cart(
+    db: AsyncSession = Depends(get_async_read_db),
     auth: Optional[dict] = Depends(get_current_user_optional),
     guest_session_id: Optional[str] = Cookie(None),
     selected_method: Optional[Literal["genikh", "boxnow"]] = Query(None),
 ):
     if auth:
-        cart = db.query(Cart).filter(Cart.user_id == auth["user_id"]).first()
+        cart_id = await db.scalar(select(Cart.id).where(Cart.user_id == auth["user_id"]))
     else:
         session_id = guest_session_id
         if not session_id:
             return CartSummary(items=[], total_items=0, subtotal=0.0)
-        cart = db.query(Cart).filter(Cart.guest_session_id == session_id).first()
+        cart_id = await db.scalar(select(Cart.id).where(Cart.guest_session_id == session_id))
 
-    if not cart:
+    if not cart_id:
         return CartSummary(items=[], total_items=0, subtotal=0.0)
 
-    rows = (
-        db.query(CartItem, Product)
-        .join(Product, CartItem.product_id == Product.id)
-        .filter(CartItem.cart_id == cart.id)
-        .all()
-    )
+    return await _cart_summary(db, cart_id, selected_method)
 
-    items: List[CartItemOut] = []
-    total_items = 0
-    subtotal = 0.0
+@router.patch("/cart", response_model=CartSummary, tags=["Cart"])
+async def update_cart(
+    body: CartPatchRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    auth: Optional[dict] = Depends(get_current_user_optional),
+    guest_session_id: Optional[str] = Cookie(None),
+    selected_method: Optional[Literal["genikh", "boxnow"]] = Query(None),
+):
+    """
+    Apply a list of cart operations atomically and return the new cart.
+    However many operations there are, the cart is changed with at most
+    two statements: one DELETE and one upsert.
+    """
+    if len(body.operations) > CART_PATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {CART_PATCH_MAX} operations per request.")
+
+    owner, owner_id = _cart_owner(auth, None if auth else get_or_create_guest_session(guest_session_id, response))
+    clear, lines = _fold_operations(body.operations)
+    removed = sorted(product_id for product_id, (_, quantity) in lines.items() if not quantity)
+    written = sorted(product_id for product_id, (_, quantity) in lines.items() if quantity)
+
+    if written:
+        cart_id = await _find_or_create_cart(db, owner, owner_id)
+    else:
+        cart_id = await db.scalar(select(Cart.id).where(owner == owner_id))
+        if cart_id is None:
+            return CartSummary(items=[], total_items=0, subtotal=0.0)
 
-    for ci, p in rows:
-        price = float(p.price or 0)
-        qty = getattr(ci, "quantity", 1) or 1
-        line_total = price * qty
-        items.append(
+    if clear or removed:
+        await db.execute(_REMOVE_LINES, {"cart_id": cart_id, "clear": clear, "product_ids": removed})
+    if written:
+        found = (await db.execute(_UPSERT_LINES, {
+            "cart_id": cart_id,
+            "product_ids": written,
+            "quantities": [lines[product_id][1] for product_id in written],
+            "relative": [lines[product_id][0] for product_id in written],
+            "max_quantity": MAX_LINE_QUANTITY,
+        })).scalars().all()
+        if len(found) < len(written):
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Product not found.")
+    if clear or removed or written:
+        # plain SQL does not flush, so a cart priced earlier in this session would be served stale
+        forget_priced_carts(db)
+
+    summary = await _cart_summary(db, cart_id, selected_method)
+    await db.commit()
+    return summary
+
+async def _cart_summary(
+    db: AsyncSession,
+    cart_id: UUID,
+    selected_method: Optional[str],
+) -> CartSummary:
+    priced = await price_cart_async(db, cart_id)
+    quotes = [
+        ShippingQuote(method=rate.method, label=rate.label, amount=rate.cents.eur, free_applied=rate.free)
+        for rate in priced.shipping
+    ]
+    selected = priced.shipping_for(selected_method)
+    shipping_cents = selected.cents if selected else Money(0)
+
+    return CartSummary(
+        items=[
             CartItemOut(
                 product=CartItemProduct(
-                    id=p.id,
-                    name=p.name,
-                    price=p.price,
-                    image_url=p.image_url,
+                    id=line.product_id,
+                    name=line.name,
+                    price=line.unit_cents.eur,
+                    image_url=list(line.image_url) or None,
                 ),
-                line_total=line_total,
+                quantity=line.quantity,
+                line_total=line.line_cents.eur,
             )
-        )
-        total_items += qty
-        subtotal += line_total
-
-    subtotal = _round2(subtotal)
-
-    opts = _shipping_options_for_subtotal(subtotal)
-
-    quotes: List[ShippingQuote] = []
-    for o in opts:
-        data = o["shipping_rate_data"]
-        label = data["display_name"]
-        amount_eur = Decimal(data["fixed_amount"]["amount"]) / Decimal(100)
-        method = "genikh" if "γεν" in label.lower() or "gen" in label.lower() else "boxnow"
-        quotes.append(
-            ShippingQuote(
-                method=method,
-                label=label,
-                amount=_round2(amount_eur),
-                free_applied=amount_eur == 0,
-            )
-        )
-
-    selected = selected_method or (quotes[0].method if quotes else None)
-    selected_quote = next((q for q in quotes if q.method == selected), None)
-
-    shipping_amount = selected_quote.amount if selected_quote else 0.0
-    total = _round2(Decimal(str(subtotal)) + Decimal(str(shipping_amount)))
-
-    return CartSummary(
-        items=items,
-        total_items=total_items,
-        subtotal=subtotal,
+            for line in priced.lines
+        ],
+        total_items=priced.total_items,
+        subtotal=priced.subtotal_cents.eur,
         shipping_options=quotes,
-        selected_method=selected,
-        shipping_amount=shipping_amount,
-        total=total,
+        selected_method=selected.method if selected else None,
+        shipping_amount=shipping_cents.eur,
+        free_shipping_threshold=FREE_THRESHOLD_CENTS.eur,
+        free_shipping_applied=priced.free_shipping,
+        total=(priced.subtotal_cents + shipping_cents).eur,
     )
 
 @router.post("/merge/cart", status_code=status.HTTP_204_NO_CONTENT)
 async def merge_guest_cart_into_user(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     auth: Optional[dict] = Depends(get_current_user_optional),
     guest_session_id: Optional[str] = Cookie(None),
-    request=None
 ):
-    import sys
-    print("[DEBUG] /merge/cart endpoint called", file=sys.stderr)
-    if request:
-        try:
-            body = await request.json()
-            print(f"[DEBUG] Request body: {body}", file=sys.stderr)
-        except Exception as e:
-            print(f"[DEBUG] Could not parse request body: {e}", file=sys.stderr)
+    """
+    Move the guest cart into the signed-in user's cart. Lines for products
+    already in the user's cart are resolved by CART_MERGE_POLICY. The same
+    four statements run whatever the size of either cart.
+    """
     if not auth or "user_id" not in auth:
         raise HTTPException(status_code=401, detail="Login required to merge cart")
 
-    user_id = auth["user_id"]
-
     if not guest_session_id:
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
+        return None
 
-    guest_cart = db.query(Cart).filter(Cart.guest_session_id == guest_session_id).first()
-    if not guest_cart:
+    guest_cart_id = await db.scalar(select(Cart.id).where(Cart.guest_session_id == guest_session_id))
+    if guest_cart_id is None:
         response.delete_cookie("guest_session_id")
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-    user_cart = db.query(Cart).filter(Cart.user_id == user_id).first()
-    if not user_cart:
-        user_cart = Cart(user_id=user_id)
-        db.add(user_cart)
-        db.flush()
-
-    existing_pids = {
-        ci.product_id for ci in db.query(CartItem).filter(CartItem.cart_id == user_cart.id).all()
-    }
-    guest_items = db.query(CartItem).filter(CartItem.cart_id == guest_cart.id).all()
-
-    added = 0
-    for gi in guest_items:
-        if gi.product_id in existing_pids:
-            continue
-        db.add(CartItem(cart_id=user_cart.id, product_id=gi.product_id))
-        existing_pids.add(gi.product_id)
-        added += 1
-
-    db.query(CartItem).filter(CartItem.cart_id == guest_cart.id).delete()
-    db.delete(guest_cart)
-    db.commit()
+        return None
 
-    response.delete_cookie("guest_session_id")
+    user_cart_id = await _find_or_create_cart(db, Cart.user_id, auth["user_id"])
+    await db.execute(_MERGE_LINES, {
+        "guest_cart_id": guest_cart_id, "user_cart_id": user_cart_id, "max_quantity": MAX_LINE_QUANTITY,
+    })
+    await db.execute(_DELETE_CART, {"cart_id": guest_cart_id})
+    await db.commit()
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    # returning None, not a Response, so the cookie change on `response` is sent
+    response.delete_cookie("guest_session_id")
+    return None
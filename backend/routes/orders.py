@@ -3,14 +3,16 @@ from uuid import UUID
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import cast, or_, and_, String
+from sqlalchemy import and_
 from zoneinfo import ZoneInfo
-import stripe
 
 from utils.user_auth import get_current_user
-from utils.database import get_db
-from utils.admin_auth import get_current_admin, Admin
+from utils.database import get_db, get_read_db
+from utils.admin_auth import get_current_admin, AdminPrincipal
+from utils.order_search import order_search_condition
+from utils.stripe_client import get_stripe
 from db.models.order import Order, OrderStatus, PaymentStatus
+from db.money import Money
 from db.schemas.order import OrderOut
 
 router = APIRouter()
@@ -46,8 +48,8 @@ def admin_list_orders(
     sort_dir: str = Query("desc", pattern="^(asc|desc)$"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=200),
-    db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_read_db),
+    admin: AdminPrincipal = Depends(get_current_admin),
 ):
     query = (
         db.query(Order)
@@ -58,15 +60,8 @@ def admin_list_orders(
 
     conditions = []
 
-    if q:
-        like = f"%{q.strip()}%"
-        conditions.append(or_(
-            cast(Order.id, String).ilike(like),
-            Order.email.ilike(like),
-            Order.user_id.ilike(like),
-            Order.stripe_checkout_session_id.ilike(like),
-            Order.stripe_payment_intent_id.ilike(like),
-        ))
+    if q and q.strip():
+        conditions.append(order_search_condition(q))
 
     if status is not None:
         conditions.append(Order.status == status)
@@ -90,9 +85,9 @@ def admin_list_orders(
         conditions.append(Order.created_at <= dt)
 
     if min_total is not None:
-        conditions.append(Order.total_amount >= float(min_total))
+        conditions.append(Order.total_cents >= Money.from_eur(min_total))
     if max_total is not None:
-        conditions.append(Order.total_amount <= float(max_total))
+        conditions.append(Order.total_cents <= Money.from_eur(max_total))
 
     if conditions:
         query = query.filter(and_(*conditions))
@@ -101,7 +96,7 @@ def admin_list_orders(
 
     sort_map = {
         "created_at": Order.created_at,
-        "total_amount": Order.total_amount,
+        "total_amount": Order.total_cents,
         "status": Order.status,
         "payment_status": Order.payment_status,
     }
@@ -131,6 +126,7 @@ def confirm_order(
     if not session_id:
         raise HTTPException(status_code=400, detail="Missing session_id")
     
+    stripe = get_stripe()
     try:
         checkout_session = stripe.checkout.Session.retrieve(
             session_id,
@@ -163,7 +159,7 @@ def confirm_order(
 
 @router.get("/customer/orders", response_model=List[OrderOut], tags=["Orders"])
 def get_customer_orders(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     orders = (
@@ -178,7 +174,7 @@ def get_customer_orders(
 @router.get("/customer/order/{order_id}", response_model=OrderOut, tags=["Orders"])
 def get_customer_order(
     order_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     order = (
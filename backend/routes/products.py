@@ -1,111 +1,341 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.encoders import jsonable_encoder
 
-from db.database import SessionLocal
 from db.models.product import Product, Category, SubCategory
-from db.schemas.product import ProductSummary, ProductImageOut
-from utils.database import get_db
+from db.models.product_ranking import ProductRanking
+from db.schemas.product import ProductBatchOut, ProductBatchRequest, ProductFacetsOut, ProductSummary, ProductImageOut
+from utils.catalog_cache import CATALOG_CACHE_CONTROL, CatalogEntry, catalog_cache, etag_matches
+from utils.database import get_async_read_db
+from utils.facets import PRICE_RANGE_LABELS, facet_counts
+from utils.pagination import ProductFilters, ProductSort, next_cursor, paginate_products, product_filters
+from utils.rankings import ATHENS, RANKING_WINDOWS, decode_rank_cursor, encode_rank_cursor
+from utils.search import SEARCH_BACKEND, search_index, search_query, tokenize
+
+load_dotenv(override=True)
+
+# Most ids one /products/batch call accepts.
+PRODUCT_BATCH_MAX = int(os.getenv("PRODUCT_BATCH_MAX", "100"))
 
 router = APIRouter()
 
+# Catalog reads select just the ProductSummary columns (plus created_at, the
+# keyset cursor key) as plain rows: no identity map, no change tracking, and
+# the large columns (search_vector, stock, timestamps) stay in the database.
+SUMMARY_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.price, Product.category,
+    Product.sub_category, Product.image_url, Product.big_image_url, Product.created_at,
+)
+
+def _summaries(rows) -> list:
+    return jsonable_encoder([row._asdict() for row in rows])
+
+async def _cached_page(
+    db: AsyncSession, key: tuple, sort: str, cursor: Optional[str], skip: int, limit: int, filters: ProductFilters, *where,
+):
+    # one row more than the page, to tell whether there is a next page
+    query = paginate_products(select(*SUMMARY_COLUMNS).where(*where, *filters.conditions()), sort, cursor, skip, limit + 1)
+
+    async def load():
+        result = await db.execute(query)
+        items, following = next_cursor(_summaries(result), sort, limit)
+        return CatalogEntry.build(items, {'X-Next-Cursor': following} if following else None)
+    return await catalog_cache.get_or_load((*key, filters, sort, cursor, 0 if cursor else skip, limit), load)
+
+async def _cached_product(db: AsyncSession, product_id: UUID):
+    async def load():
+        rows = _summaries(await db.execute(select(*SUMMARY_COLUMNS).where(Product.id == product_id)))
+        return CatalogEntry.build(rows[0]) if rows else None
+    return await catalog_cache.get_or_load(("product", product_id), load)
+
+async def _cached_products(db: AsyncSession, ids: List[UUID]) -> CatalogEntry:
+    """
+    One response for many products: ids already in the catalog cache come
+    from there, the rest from a single `id = ANY(:ids)` query (one bind
+    parameter, so the prepared statement is the same for any batch size) and
+    are cached under the same keys /products/{id} uses. Items keep the
+    request order; unknown ids are listed in `missing`.
+    """
+    if len(ids) > PRODUCT_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {PRODUCT_BATCH_MAX} ids per batch.")
+    ids = list(dict.fromkeys(ids))
+
+    cached = catalog_cache.get_many(("product", product_id) for product_id in ids)
+    found = {key[1]: entry.data for key, entry in cached.items()}
+    wanted = [product_id for product_id in ids if product_id not in found]
+    if wanted:
+        generation = catalog_cache.generation
+        result = await db.execute(
+            select(*SUMMARY_COLUMNS)
+            .where(Product.id == any_(bindparam("ids", wanted, type_=ARRAY(PG_UUID(as_uuid=True)))))
+        )
+        for row in result:
+            entry = CatalogEntry.build(jsonable_encoder(row._asdict()))
+            catalog_cache.put(("product", row.id), entry, generation)
+            found[row.id] = entry.data
+
+    return CatalogEntry.build({
+        "items": [found[product_id] for product_id in ids if product_id in found],
+        "missing": [str(product_id) for product_id in ids if product_id not in found],
+    })
+
+def _catalog_response(request: Request, entry: CatalogEntry) -> Response:
+    # Body bytes come pre-rendered (and pre-compressed) from the cache entry;
+    # GZipMiddleware leaves responses that already carry Content-Encoding alone.
+    encoding, body, etag = entry.variant(request.headers.get('accept-encoding'))
+    headers = {'ETag': etag, 'Cache-Control': CATALOG_CACHE_CONTROL, 'Vary': 'Accept-Encoding', **entry.headers}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type='application/json', headers=headers)
+
 @router.get("/products/all", response_model=list[ProductSummary], tags=["Products"])
-def get_all_products(
-    db: Session = Depends(get_db),
+async def get_all_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    sort: ProductSort = Query("created"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides skip"),
+    filters: ProductFilters = Depends(product_filters),
 ):
-    products = db.query(Product).offset(skip).limit(limit).all()
+    entry = await _cached_page(db, ("all",), sort, cursor, skip, limit, filters)
     
-    response_data = jsonable_encoder(products)
-    response = JSONResponse(content = response_data)
-    response.headers['Cache-Control'] = 'public, max-age=3600'
-    return response
+    return _catalog_response(request, entry)
+
+# Declared before /products/{product_id}, which would otherwise take "search" as an id.
+@router.get("/products/search", response_model=list[ProductSummary], tags=["Products"])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    category: Optional[Category] = Query(None),
+    subcategory: Optional[SubCategory] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(12, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if SEARCH_BACKEND != "postgres":
+        await search_index.ensure_async(db)
+
+    async def load():
+        if SEARCH_BACKEND == "postgres":
+            query = search_query(select(*SUMMARY_COLUMNS), q)
+            if category is not None:
+                query = query.where(Product.category == category)
+            if subcategory is not None:
+                query = query.where(Product.sub_category == subcategory)
+            products = _summaries(await db.execute(query.offset(skip).limit(limit)))
+        else:
+            ids = search_index.search(q, category, subcategory, skip, limit)
+            found = {}
+            if ids:
+                result = await db.execute(select(*SUMMARY_COLUMNS).where(Product.id.in_(ids)))
+                found = {row["id"]: row for row in _summaries(result)}
+            products = [found[str(i)] for i in ids if str(i) in found]
+        return CatalogEntry.build(products)
+    # the postgres backend also matches the raw string inside names, so "a-b" and "a b" differ there
+    terms = q.strip().lower() if SEARCH_BACKEND == "postgres" else tuple(tokenize(q))
+    entry = await catalog_cache.get_or_load(("search", terms, category, subcategory, skip, limit), load)
+
+    return _catalog_response(request, entry)
+
+# Declared before /products/{product_id}, like /products/search and /products/batch.
+@router.get("/products/bestsellers", response_model=list[ProductSummary], tags=["Products"])
+async def get_bestsellers(
+    request: Request,
+    window: int = Query(30, description="Days of sales to rank by"),
+    limit: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Best selling products first, from the rankings the ranking job rebuilds (utils/rankings.py)."""
+    if window not in RANKING_WINDOWS:
+        raise HTTPException(status_code=422, detail=f"window must be one of {', '.join(map(str, RANKING_WINDOWS))}.")
+    after = decode_rank_cursor(cursor, window) if cursor else 0
+
+    async def load():
+        result = await db.execute(
+            select(*SUMMARY_COLUMNS, ProductRanking.rank)
+            .join(ProductRanking, ProductRanking.product_id == Product.id)
+            .where(ProductRanking.window_days == window, ProductRanking.rank > after)
+            .order_by(ProductRanking.rank)
+            .limit(limit + 1)
+        )
+        # the extra row only says there is a next page
+        items = _summaries(result)
+        following = encode_rank_cursor(window, items[limit - 1]["rank"]) if len(items) > limit else None
+        items = items[:limit]
+        # rank is for the cursor only: ProductSummary has no such field
+        for item in items:
+            del item["rank"]
+        return CatalogEntry.build(items, {'X-Next-Cursor': following} if following else None)
+    entry = await catalog_cache.get_or_load(("bestsellers", window, after, limit), load)
+
+    return _catalog_response(request, entry)
+
+@router.get("/products/new", response_model=list[ProductSummary], tags=["Products"])
+async def get_new_arrivals(
+    request: Request,
+    days: Optional[int] = Query(None, ge=1, description="Only products added in the last `days` days"),
+    limit: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    filters: ProductFilters = Depends(product_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Newest products first, straight off the (created_at, id) index."""
+    where = [Product.created_at >= datetime.now(ATHENS).replace(tzinfo=None) - timedelta(days=days)] if days else []
+    entry = await _cached_page(db, ("new", days), "newest", cursor, 0, limit, filters, *where)
+
+    return _catalog_response(request, entry)
+
+@router.get("/products/facets", response_model=ProductFacetsOut, tags=["Products"])
+async def get_product_facets(
+    request: Request,
+    category: Optional[Category] = Query(None),
+    subcategory: Optional[SubCategory] = Query(None),
+    price_range: Optional[str] = Query(None, description="One of the price_ranges labels, e.g. 20-50"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if price_range is not None and price_range not in PRICE_RANGE_LABELS:
+        raise HTTPException(status_code=422, detail=f"price_range must be one of {', '.join(PRICE_RANGE_LABELS)}.")
+    await facet_counts.ensure_async(db)
+    facets = facet_counts.facets(
+        category, subcategory, PRICE_RANGE_LABELS.index(price_range) if price_range is not None else None,
+    )
+
+    return _catalog_response(request, CatalogEntry.build(facets))
+
+@router.get("/products/batch", response_model=ProductBatchOut, tags=["Products"])
+async def get_products_batch(
+    request: Request,
+    ids: List[str] = Query(..., description="Product ids, comma-separated and/or repeated"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        product_ids = [UUID(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be UUIDs.")
+    entry = await _cached_products(db, product_ids)
+
+    return _catalog_response(request, entry)
+
+@router.post("/products/batch", response_model=ProductBatchOut, tags=["Products"])
+async def post_products_batch(
+    payload: ProductBatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as GET /products/batch, for id lists too long for a URL."""
+    entry = await _cached_products(db, payload.ids)
+
+    return _catalog_response(request, entry)
 
 @router.get("/products/{product_id}", response_model=ProductSummary, tags=["Products"])
-def get_product(
+async def get_product(
     product_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    entry = await _cached_product(db, product_id)
+    if not entry:
         raise HTTPException(status_code=404, detail="Product not found.")
     
-    response_data = jsonable_encoder(product)
-    response = JSONResponse(content = response_data)
-    response.headers['Cache-Control'] = 'public, max-age=3600'
-    return response
+    return _catalog_response(request, entry)
 
 @router.get("/products/category/{category}", response_model=list[ProductSummary], tags=["Products"])
-def get_products_by_category(
+async def get_products_by_category(
     category: Category,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    sort: ProductSort = Query("created"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides skip"),
+    filters: ProductFilters = Depends(product_filters),
 ):
-    products = db.query(Product).filter(Product.category == category).offset(skip).limit(limit).all()
-    if not products:
+    entry = await _cached_page(
+        db, ("category", category), sort, cursor, skip, limit, filters,
+        Product.category == category,
+    )
+    if not entry.data:
         raise HTTPException(status_code=404, detail="No products found for this category.")
     
-    response_data = jsonable_encoder(products)
-    response = JSONResponse(content = response_data)
-    response.headers['Cache-Control'] = 'public, max-age=3600'
-    return response
+    return _catalog_response(request, entry)
 
 @router.get("/products/subcategory/{sub_category}", response_model=list[ProductSummary], tags=["Products"])
-def get_products_by_subcategory(
+async def get_products_by_subcategory(
     sub_category: SubCategory,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    sort: ProductSort = Query("created"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides skip"),
+    filters: ProductFilters = Depends(product_filters),
 ):
-    products = db.query(Product).filter(Product.sub_category == sub_category).offset(skip).limit(limit).all()
-    if not products:
+    entry = await _cached_page(
+        db, ("subcategory", sub_category), sort, cursor, skip, limit, filters,
+        Product.sub_category == sub_category,
+    )
+    if not entry.data:
         raise HTTPException(status_code=404, detail="No products found for this subcategory.")
     
-    response_data = jsonable_encoder(products)
-    response = JSONResponse(content = response_data)
-    response.headers['Cache-Control'] = 'public, max-age=3600'
-    return response
+    return _catalog_response(request, entry)
 
 @router.get("/products/category/{category}/subcategory/{sub_category}", response_model=list[ProductSummary], tags=["Products"])
-def get_products_by_category_and_subcategory(
+async def get_products_by_category_and_subcategory(
     category: Category,
     sub_category: SubCategory,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    sort: ProductSort = Query("created"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides skip"),
+    filters: ProductFilters = Depends(product_filters),
 ):
-    products = db.query(Product).filter(
+    entry = await _cached_page(
+        db, ("category_sub", category, sub_category), sort, cursor, skip, limit, filters,
         Product.category == category,
-        Product.sub_category == sub_category
-    ).offset(skip).limit(limit).all()
-    if not products:
+        Product.sub_category == sub_category,
+    )
+    if not entry.data:
         raise HTTPException(status_code=404, detail="No products found.")
     
-    response_data = jsonable_encoder(products)
-    response = JSONResponse(content = response_data)
-    response.headers['Cache-Control'] = 'public, max-age=3600'    
-    return response
+    return _catalog_response(request, entry)
 
 @router.get("/categories", response_model=list[str], tags=["Products"])
-def get_categories():
+async def get_categories():
     return [category.value for category in Category]
 
 @router.get("/subcategories", response_model=list[str], tags=["Products"])
-def get_subcategories():
+async def get_subcategories():
     return [sub_category.value for sub_category in SubCategory]
 
 @router.get("/products/image/{product_id}", response_model=list[ProductImageOut], tags=["Products"])
-def get_product_image(
+async def get_product_image(
     product_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    async def load():
+        # Reuse a cached product if there is one; otherwise read just the one column.
+        product = catalog_cache.get(("product", product_id))
+        if product:
+            return CatalogEntry.build({"zoomed_image_url": product.data["big_image_url"]})
+        row = (await db.execute(select(Product.big_image_url).where(Product.id == product_id))).first()
+        return CatalogEntry.build({"zoomed_image_url": jsonable_encoder(row.big_image_url)}) if row else None
+    entry = await catalog_cache.get_or_load(("image", product_id), load)
 
-    if not product:
+    if not entry:
         raise HTTPException(status_code=404, detail="Product not found.")
     
-    return JSONResponse(content={"zoomed_image_url": product.big_image_url})
+    return _catalog_response(request, entry)
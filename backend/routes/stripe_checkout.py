@@ -1,65 +1,53 @@
 import json
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, Cookie
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import os
-from decimal import Decimal
 
 from utils.orders import create_order_from_checkout_session
+from utils.pricing import CURRENCY, FREE_THRESHOLD_CENTS, PricedCart, price_cart
+from utils.stock import STOCK_HOLD_MINUTES, STOCK_RESERVATIONS, convert_reservation, release_reservation, reserve_stock
 from utils.database import get_db
 from utils.user_auth import get_current_user_optional, get_or_create_guest_session
-from utils.stripe_client import stripe
+from utils.stripe_client import get_stripe
 from utils.dropbox_image import normalize_dropbox
 from db.models.cart import Cart
 from db.models.cart_item import CartItem
-from db.models.product import Product
 
 router = APIRouter()
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
-CURRENCY = "eur"
-FREE_THRESHOLD_EUR = Decimal("150.00")
-
-def _cart_subtotal_eur(db: Session, cart_id: UUID) -> Decimal:
-    rows = (
-        db.query(CartItem, Product)
-          .join(Product, CartItem.product_id == Product.id)
-          .filter(CartItem.cart_id == cart_id)
-          .all()
-    )
-    total = Decimal("0.00")
-    for ci, p in rows:
-        qty = getattr(ci, "quantity", 1) or 1
-        total += Decimal(str(p.price or 0)) * qty
-    return total
-
-def _shipping_options_for_subtotal(subtotal_eur: Decimal) -> list[dict]:
-    free = subtotal_eur >= FREE_THRESHOLD_EUR
-    genikh_cents = 0 if free else 1000
-    boxnow_cents = 0 if free else 300
+FREE_THRESHOLD_EUR = FREE_THRESHOLD_CENTS.decimal
+# Stripe rejects a session that expires less than 30 minutes after it is
+# created, so the session's expiry is counted from the call, with a minute
+# to spare, rather than taken from the hold (set before the reservation).
+STRIPE_SESSION_MINUTES = max(STOCK_HOLD_MINUTES, 31)
 
+def _shipping_options(priced: PricedCart) -> list[dict]:
     return [
         {
             "shipping_rate_data": {
-                "display_name": "Γενική Ταχυδρομική",
+                "display_name": rate.label,
                 "type": "fixed_amount",
-                "fixed_amount": {"amount": genikh_cents, "currency": CURRENCY},
-                "metadata": {"carrier": "genikh", "free_threshold_eur": str(FREE_THRESHOLD_EUR)},
+                "fixed_amount": {"amount": rate.cents, "currency": CURRENCY},
+                "metadata": {"carrier": rate.method, "free_threshold_eur": str(FREE_THRESHOLD_EUR)},
             }
-        },
-        {
-            "shipping_rate_data": {
-                "display_name": "BoxNow",
-                "type": "fixed_amount",
-                "fixed_amount": {"amount": boxnow_cents, "currency": CURRENCY},
-                "metadata": {"carrier": "boxnow", "free_threshold_eur": str(FREE_THRESHOLD_EUR)},
-            }
-        },
+        }
+        for rate in priced.shipping
     ]
 
+def _reservation_id(metadata: Optional[dict]) -> Optional[UUID]:
+    value = (metadata or {}).get("reservation_id")
+    try:
+        return UUID(value) if value else None
+    except ValueError:
+        return None
+
 def _get_cart(
     *,
     auth: Optional[dict],
@@ -76,35 +64,21 @@ def _get_cart(
     
     return db.query(Cart).filter(Cart.guest_session_id == guest_session_id).first()
 
-def _build_line_items(db: Session, cart_id: UUID) -> List[Dict]:
-    rows = (
-        db.query(CartItem, Product)
-        .join(Product, CartItem.product_id == Product.id)
-        .filter(CartItem.cart_id == cart_id)
-        .all()
-    )
-    if not rows:
-        return []
-
+def _build_line_items(priced: PricedCart) -> List[Dict]:
     line_items: List[Dict] = []
-    for ci, p in rows:
-        if p.price is None or float(p.price) < 0:
-            raise HTTPException(status_code=400, detail=f"Invalid price for product {p.id}")
-        unit_amount = int(round(float(p.price) * 100))
-        if unit_amount < 1:
-            raise HTTPException(status_code=400, detail=f"Price too low for product {p.id}")
-
-        name = (p.name or f"Product {p.id}")[:127]
+    for line in priced.lines:
+        if line.unit_cents < 1:
+            raise HTTPException(status_code=400, detail=f"Invalid price for product {line.product_id}")
 
         img_url = None
-        if isinstance(p.big_image_url, list) and p.big_image_url:
-            img_url = normalize_dropbox(p.big_image_url[0])
-        if not img_url and isinstance(p.image_url, list) and p.image_url:
-            img_url = normalize_dropbox(p.image_url[0])
+        if line.big_image_url:
+            img_url = normalize_dropbox(line.big_image_url[0])
+        if not img_url and line.image_url:
+            img_url = normalize_dropbox(line.image_url[0])
 
         product_data: Dict = {
-            "name": name,
-            "metadata": {"product_id": str(p.id)},
+            "name": line.name[:127],
+            "metadata": {"product_id": str(line.product_id)},
         }
         if img_url:
             product_data["images"] = [img_url]
@@ -113,9 +87,9 @@ def _build_line_items(db: Session, cart_id: UUID) -> List[Dict]:
             "price_data": {
                 "currency": CURRENCY,
                 "product_data": product_data,
-                "unit_amount": unit_amount,
+                "unit_amount": line.unit_cents,
             },
-            "quantity": 1,
+            "quantity": line.quantity,
         })
 
     return line_items
@@ -131,12 +105,13 @@ def create_checkout_session(
     if not cart:
         raise HTTPException(status_code=400, detail="Cart not found or empty")
 
-    line_items = _build_line_items(db, cart.id)
+    priced = price_cart(db, cart.id)
+    line_items = _build_line_items(priced)
     if not line_items:
         raise HTTPException(status_code=400, detail="Cart is empty")
 
-    subtotal = _cart_subtotal_eur(db, cart.id)
-    shipping_options = _shipping_options_for_subtotal(subtotal)
+    subtotal = priced.subtotal_cents.decimal
+    shipping_options = _shipping_options(priced)
 
     success_url = f"{FRONTEND_URL}/checkout/success?session_id={{CHECKOUT_SESSION_ID}}"
     cancel_url = f"{FRONTEND_URL}/checkout/cancel"
@@ -151,20 +126,39 @@ def create_checkout_session(
         "subtotal_eur": str(subtotal),
         "free_shipping_threshold_eur": str(FREE_THRESHOLD_EUR),
     }
-
-    session = stripe.checkout.Session.create(
-        mode="payment",
-        line_items=line_items,
-        success_url=success_url,
-        cancel_url=cancel_url,
-        billing_address_collection="auto",
-        phone_number_collection={"enabled": True},
-        shipping_address_collection={"allowed_countries": ["GR", "DE", "FR", "IT", "ES", "GB"]},
-        allow_promotion_codes=True,
-        shipping_options=shipping_options,
-        metadata=metadata,
-        payment_intent_data={"metadata": metadata},
-    )
+    session_options = {}
+
+    # Hold the stock before sending the shopper to Stripe; the Stripe session
+    # expires about with the hold (a late payment still finds it during
+    # STOCK_HOLD_GRACE), and the webhook turns it into a sale.
+    reservation_id = None
+    if STOCK_RESERVATIONS:
+        lines = [(line.product_id, line.quantity) for line in priced.lines]
+        reservation_id, _ = reserve_stock(db, lines)
+        metadata["reservation_id"] = str(reservation_id)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=STRIPE_SESSION_MINUTES)
+        session_options["expires_at"] = int(expires_at.timestamp())
+
+    stripe = get_stripe()
+    try:
+        session = stripe.checkout.Session.create(
+            mode="payment",
+            line_items=line_items,
+            success_url=success_url,
+            cancel_url=cancel_url,
+            billing_address_collection="auto",
+            phone_number_collection={"enabled": True},
+            shipping_address_collection={"allowed_countries": ["GR", "DE", "FR", "IT", "ES", "GB"]},
+            allow_promotion_codes=True,
+            shipping_options=shipping_options,
+            metadata=metadata,
+            payment_intent_data={"metadata": metadata},
+            **session_options,
+        )
+    except Exception:
+        if reservation_id is not None:
+            release_reservation(db, reservation_id)
+        raise
 
     return {"url": session.url}
 
@@ -172,6 +166,7 @@ def create_checkout_session(
 async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
+    stripe = get_stripe()
 
     try:
         if WEBHOOK_SECRET:
@@ -183,6 +178,11 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     except (ValueError, stripe.error.SignatureVerificationError):
         raise HTTPException(status_code=400, detail="Invalid payload or signature")
 
+    # the rest is blocking: Stripe calls, and stock updates that can wait on
+    # row locks held by checkouts and the sweeper
+    return await run_in_threadpool(_handle_event, db, stripe, event)
+
+def _handle_event(db: Session, stripe, event) -> dict:
     event_type = event["type"] if isinstance(event, dict) else event["type"]
     obj = event["data"]["object"]
 
@@ -212,6 +212,9 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             traceback.print_exc()
             raise e
 
+        if STOCK_RESERVATIONS:
+            convert_reservation(db, _reservation_id(session.get("metadata")), order.id, created)
+
         # 4) Clear cart only if the session is paid
         # Stripe sends 'payment_status' on the Checkout Session
         if session.get("payment_status") == "paid":
@@ -225,6 +228,14 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         # It’s OK if this webhook fires multiple times; your helper is idempotent
         return {"received": True, "order_id": str(order.id), "created": created}
 
+    # The shopper never paid: give the held stock back now rather than
+    # waiting for the sweeper.
+    elif event_type == "checkout.session.expired":
+        reservation_id = _reservation_id(obj.get("metadata"))
+        if reservation_id is not None:
+            release_reservation(db, reservation_id)
+        return {"received": True}
+
     # (Optional) Handle other lifecycle events if you need them later
     elif event_type == "payment_intent.succeeded":
         # You can upsert a payment log or reconcile if needed
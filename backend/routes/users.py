@@ -1,6 +1,8 @@
-import os, requests
+import os
 from fastapi import APIRouter, Depends, HTTPException, Header, Cookie
+from starlette.concurrency import run_in_threadpool
 from db.schemas.users import UpdateNamesBody
+from utils.clerk_client import ClerkUnavailable, get_clerk_client
 from utils.user_auth import get_current_user, get_token, verify_token
 from typing import Optional, Dict, Any
 
@@ -10,7 +12,7 @@ CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
 CLERK_BASE_URL = os.getenv("CLERK_BASE_URL")
 
 @router.get("/auth/me")
-def auth_me(
+async def auth_me(
     authorization: Optional[str] = Header(None),
     session_cookie: Optional[str] = Cookie(None, alias="__session"),
 ) -> Dict[str, Any]:
@@ -23,7 +25,7 @@ def auth_me(
         raise HTTPException(status_code=401, detail="Missing session token")
 
     try:
-        verified = verify_token(token)
+        verified = await run_in_threadpool(verify_token, token)
     except HTTPException as e:
         raise e
 
@@ -38,12 +40,8 @@ def auth_me(
         }
 
     try:
-        res_user = requests.get(
-            f"{CLERK_BASE_URL}/v1/users/{user_id}",
-            headers={"Authorization": f"Bearer {CLERK_SECRET_KEY}"},
-            timeout=5,
-        )
-    except requests.RequestException:
+        res_user = await get_clerk_client().aget(f"{CLERK_BASE_URL}/v1/users/{user_id}")
+    except ClerkUnavailable:
         return {
             "user_id": user_id,
             "session_id": verified.get("session_id"),
@@ -75,7 +73,7 @@ def auth_me(
 
 
 @router.post("/users/update-names")
-def update_names(
+async def update_names(
     body: UpdateNamesBody,
     auth: Dict[str, Any] = Depends(get_current_user),
 ):
@@ -89,16 +87,8 @@ def update_names(
     }
 
     try:
-        res = requests.patch(
-            f"{CLERK_BASE_URL}/v1/users/{user_id}",
-            headers={
-                "Authorization": f"Bearer {CLERK_SECRET_KEY}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=5,
-        )
-    except requests.RequestException:
+        res = await get_clerk_client().apatch(f"{CLERK_BASE_URL}/v1/users/{user_id}", json=payload)
+    except ClerkUnavailable:
         raise HTTPException(503, "Clerk service unavailable")
 
     if res.status_code >= 400:
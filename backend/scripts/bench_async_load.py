@@ -0,0 +1,126 @@
+# backend/scripts/bench_async_load.py
+"""
+Load test of the catalog query on the sync stack (`def` handler, Session,
+Starlette threadpool) vs the async stack (`async def` handler, AsyncSession
+on asyncpg), driven in-process at increasing client concurrency.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_async_load --concurrency 50 200 500
+    python -m scripts.bench_async_load --requests 2000 --db-latency-ms 5
+
+`--db-latency-ms` adds a server-side pg_sleep to every query to mimic a
+remote database; with a local Postgres the round trip is too short for the
+threadpool limit to show.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.database import build_async_engine, build_engine, pool_stats
+from db.models.product import Product
+
+
+def build_app(url: str, db_latency: float) -> tuple[FastAPI, list]:
+    engine = build_engine(url)
+    async_engine = build_async_engine(url)
+    SyncSession = sessionmaker(bind=engine, expire_on_commit=False)
+    AsyncSessionFactory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionFactory() as db:
+            yield db
+
+    query = select(Product).offset(0).limit(12)
+    if db_latency:
+        # uncorrelated subquery: Postgres runs it once per statement, not per row
+        query = query.where(select(func.pg_sleep(db_latency)).scalar_subquery().is_not(None))
+
+    app = FastAPI()
+
+    @app.get("/sync/products")
+    def sync_products(db: Session = Depends(get_sync_db)):
+        return jsonable_encoder(db.execute(query).scalars().all())
+
+    @app.get("/async/products")
+    async def async_products(db: AsyncSession = Depends(get_async_db)):
+        return jsonable_encoder((await db.execute(query)).scalars().all())
+
+    return app, [engine, async_engine]
+
+
+async def run(app: FastAPI, path: str, concurrency: int, n: int) -> tuple[float, list[float], int]:
+    samples: list[float] = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(n):
+            queue.put_nowait(None)
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                samples.append((time.perf_counter() - t0) * 1000)
+                if r.status_code != 200:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    return wall, samples, errors
+
+
+async def main_async(args) -> None:
+    app, (engine, async_engine) = build_app(args.url, args.db_latency_ms / 1000)
+
+    # warm both pools so connection setup is not counted
+    await run(app, "/sync/products", 8, 32)
+    await run(app, "/async/products", 8, 32)
+
+    print(f"{'stack':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7} {'pool wait max ms':>17}")
+    for concurrency in args.concurrency:
+        for stack, path, bind in (("sync", "/sync/products", engine), ("async", "/async/products", async_engine.sync_engine)):
+            wall, samples, errors = await run(app, path, concurrency, args.requests)
+            samples.sort()
+            print(
+                f"{stack:<6} {concurrency:>7} {len(samples) / wall:>9.0f} "
+                f"{statistics.median(samples):>9.2f} {samples[int(len(samples) * 0.95) - 1]:>9.2f} "
+                f"{errors:>7} {pool_stats(bind)['wait_ms_max']:>17.2f}"
+            )
+
+    engine.dispose()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
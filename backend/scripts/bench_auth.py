@@ -0,0 +1,64 @@
+# backend/scripts/bench_auth.py
+"""
+Per-request cost of verify_token: remote session lookup vs local JWT
+verification against a JWKS served by the local Clerk stub.
+
+    python -m scripts.bench_auth --latency-ms 150 --requests 200
+"""
+import argparse
+import os
+import statistics
+import time
+
+from scripts.clerk_stub import ClerkStub
+
+
+def _measure(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(samples):8.3f} ms   p50 {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="simulated Clerk round trip")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    stub = ClerkStub(latency_ms=args.latency_ms).start()
+    os.environ.update({
+        "CLERK_SECRET_KEY": "sk_test_stub",
+        "CLERK_BASE_URL": stub.url,
+        "CLERK_VERIFY_URL": f"{stub.url}/v1/sessions/verify",
+        "CLERK_JWKS_URL": f"{stub.url}/v1/jwks",
+    })
+    os.environ.pop("CLERK_JWT_KEY", None)
+
+    from utils import user_auth
+
+    token = stub.keys[0].sign(lifetime=3600)
+
+    user_auth.CLERK_VERIFY_MODE = "remote"
+    remote_runs = max(1, min(args.requests, 50))
+    _report("remote (before)", _measure(lambda: user_auth.verify_token(token), remote_runs))
+
+    user_auth.CLERK_VERIFY_MODE = "local"
+    user_auth.verify_token(token)  # warm the JWKS cache
+    fetched = stub.requests
+    _report("local JWKS (after)", _measure(lambda: user_auth.verify_token(token), args.requests))
+    print(f"Clerk requests during local run: {stub.requests - fetched}")
+
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
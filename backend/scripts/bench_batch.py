@@ -0,0 +1,62 @@
+# backend/scripts/bench_batch.py
+"""
+N sequential GET /products/{id} calls vs one GET /products/batch, in
+process through the real app. "cold" empties the catalog cache before every
+round, so each product is read from the database; "warm" serves everything
+from the cache.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_batch --repeat 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from main import app
+from utils.catalog_cache import catalog_cache
+
+
+async def sequential(client: httpx.AsyncClient, ids: list[str]) -> None:
+    for product_id in ids:
+        (await client.get(f"/products/{product_id}")).raise_for_status()
+
+
+async def batch(client: httpx.AsyncClient, ids: list[str]) -> None:
+    (await client.get("/products/batch", params={"ids": ",".join(ids)})).raise_for_status()
+
+
+async def measure(client: httpx.AsyncClient, fn, ids: list[str], cold: bool, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        if cold:
+            catalog_cache.invalidate()
+        t0 = time.perf_counter()
+        await fn(client, ids)
+        samples.append((time.perf_counter() - t0) * 1_000)
+    return statistics.median(samples)
+
+
+async def main_async(args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ids = [p["id"] for p in (await client.get("/products/all", params={"limit": 100})).json()]
+        print(f"{'ids':>4} {'cache':<5} {'sequential ms':>14} {'batch ms':>9} {'speedup':>8}")
+        for n in args.sizes:
+            chunk = ids[:n]
+            for cold in (True, False):
+                seq = await measure(client, sequential, chunk, cold, args.repeat)
+                one = await measure(client, batch, chunk, cold, args.repeat)
+                print(f"{len(chunk):>4} {'cold' if cold else 'warm':<5} {seq:>14.2f} {one:>9.2f} {seq / one:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 30])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
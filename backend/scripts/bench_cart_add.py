@@ -0,0 +1,103 @@
+# backend/scripts/bench_cart_add.py
+"""
+Latency of adding to a guest cart: the previous select-then-insert path
+(reproduced below: product, cart and line lookups, then separate commits
+for a new cart and a new line) vs the single upsert statement in
+routes.carts.add_to_cart. Each add runs in a fresh session; half of the
+adds go to a new cart, half repeat a product already in it. Prints p50/p95
+and the statements and commits (round trips) per add. The carts are
+deleted.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_cart_add --adds 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+from fastapi import Response
+from sqlalchemy import delete, event, select
+
+from db.database import AsyncSessionLocal, async_engine
+from db.models.cart import Cart
+from db.models.cart_item import CartItem
+from db.models.product import Product
+from routes.carts import add_to_cart
+
+PREFIX = "bench-cart-add-"
+
+
+async def legacy_add(db, product_id, session_id):
+    product = await db.get(Product, product_id)
+    cart = await db.scalar(select(Cart).where(Cart.guest_session_id == session_id))
+    if not cart:
+        cart = Cart(guest_session_id=session_id)
+        db.add(cart)
+        await db.commit()
+        await db.refresh(cart)
+    item = await db.scalar(select(CartItem).where(CartItem.cart_id == cart.id, CartItem.product_id == product_id))
+    if not item:
+        db.add(CartItem(cart_id=cart.id, product_id=product_id))
+        await db.commit()
+    return product
+
+
+async def upsert_add(db, product_id, session_id):
+    return await add_to_cart(product_id, Response(), db, None, session_id)
+
+
+async def run(add, product_id, adds: int, counts: dict) -> tuple[list, float, float]:
+    times = []
+    counts.update(statements=0, commits=0)
+    for i in range(adds):
+        # every other add repeats the previous cart and product
+        session_id = f"{PREFIX}{uuid4()}" if i % 2 == 0 else session_id
+        async with AsyncSessionLocal() as db:
+            t0 = time.perf_counter()
+            await add(db, product_id, session_id)
+            times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times, counts["statements"] / adds, counts["commits"] / adds
+
+
+async def main_async(args) -> None:
+    counts = {"statements": 0, "commits": 0}
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _count_statement(*_):
+        counts["statements"] += 1
+
+    @event.listens_for(sync_engine, "commit")
+    def _count_commit(*_):
+        counts["commits"] += 1
+
+    async with AsyncSessionLocal() as db:
+        product_id = await db.scalar(select(Product.id).limit(1))
+
+    try:
+        print(f"{'path':<8} {'p50 ms':>7} {'p95 ms':>7} {'stmts/add':>10} {'commits/add':>12}")
+        for label, add in (("select", legacy_add), ("upsert", upsert_add)):
+            await run(add, product_id, 20, counts)  # warm up
+            times, statements, commits = await run(add, product_id, args.adds, counts)
+            p95 = times[int(len(times) * 0.95) - 1]
+            print(f"{label:<8} {statistics.median(times):>7.2f} {p95:>7.2f} {statements:>10.1f} {commits:>12.1f}")
+    finally:
+        async with AsyncSessionLocal() as db:
+            carts = select(Cart.id).where(Cart.guest_session_id.startswith(PREFIX))
+            await db.execute(delete(CartItem).where(CartItem.cart_id.in_(carts)))
+            await db.execute(delete(Cart).where(Cart.guest_session_id.startswith(PREFIX)))
+            await db.commit()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adds", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# backend/scripts/bench_cart_get.py
+"""
+Cost of pricing a cart for GET /cart with `--lines` lines: the previous
+euro path (reproduced below: float prices read from the catalog, each
+converted to cents through Decimal, and every response field converted
+back through Decimal) vs the integer-cents path of routes.carts, which
+reads price_cents as Money and divides once per field. Prints the median
+time of the whole summary (query included) and of the Python part alone
+on rows already fetched, and checks both give the same response. The cart
+is deleted; `--products` seeds `bench-…` rows first (see bench_pagination)
+when the catalog is smaller than the cart.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_cart_get --lines 50
+    python -m scripts.bench_pagination --cleanup   # removes the seeded rows
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from uuid import uuid4
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from db.database import AsyncSessionLocal, async_engine, engine
+from db.models.cart import Cart
+from db.models.cart_item import CartItem
+from db.models.product import Product
+from db.schemas.cart import CartSummary, ShippingQuote
+from db.schemas.cart_item import CartItemOut, CartItemProduct
+from routes.carts import _cart_summary
+from scripts.bench_pagination import seed
+from utils.pricing import FREE_THRESHOLD_CENTS, SHIPPING_METHODS, _lines_query, _priced
+
+PREFIX = "bench-cart-get-"
+
+
+def to_cents(amount):
+    return int((Decimal(str(amount or 0)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def to_eur(cents):
+    return (Decimal(cents) / 100).quantize(Decimal("0.01"))
+
+
+def legacy_lines_query(cart_id):
+    return (
+        select(CartItem.product_id, CartItem.quantity, Product.name, Product.price, Product.image_url)
+        .join(Product, CartItem.product_id == Product.id)
+        .where(CartItem.cart_id == cart_id)
+        .order_by(Product.name, Product.id)
+    )
+
+
+def legacy_summary(rows, selected_method=None) -> CartSummary:
+    lines = [(row, to_cents(row.price), row.quantity or 1) for row in rows]
+    subtotal = sum(unit * quantity for _, unit, quantity in lines)
+    free = subtotal >= int(FREE_THRESHOLD_CENTS)
+    rates = [(method, label, 0 if free else int(cents)) for method, label, cents in SHIPPING_METHODS]
+    selected = next((r for r in rates if r[0] == selected_method), rates[0])
+    return CartSummary(
+        items=[
+            CartItemOut(
+                product=CartItemProduct(
+                    id=row.product_id,
+                    name=row.name,
+                    price=float(to_eur(unit)),
+                    image_url=list(row.image_url or ()) or None,
+                ),
+                quantity=quantity,
+                line_total=float(to_eur(unit * quantity)),
+            )
+            for row, unit, quantity in lines
+        ],
+        total_items=sum(quantity for _, _, quantity in lines),
+        subtotal=float(to_eur(subtotal)),
+        shipping_options=[
+            ShippingQuote(method=method, label=label, amount=float(to_eur(cents)), free_applied=cents == 0)
+            for method, label, cents in rates
+        ],
+        selected_method=selected[0],
+        shipping_amount=float(to_eur(selected[2])),
+        free_shipping_threshold=float(to_eur(int(FREE_THRESHOLD_CENTS))),
+        free_shipping_applied=free,
+        total=float(to_eur(subtotal + selected[2])),
+    )
+
+
+async def legacy_get(db, cart_id):
+    return legacy_summary((await db.execute(legacy_lines_query(cart_id))).all())
+
+
+async def cents_get(db, cart_id):
+    return await _cart_summary(db, cart_id, None)
+
+
+def cents_summary(cart_id, rows) -> CartSummary:
+    # _cart_summary without the query: the memo short-circuits it
+    class Memo:
+        info = {"priced_carts": {cart_id: _priced(cart_id, rows)}}
+
+    coro = _cart_summary(Memo, cart_id, None)
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("_cart_summary awaited the database")
+
+
+async def main_async(args) -> int:
+    cart_id = uuid4()
+    async with AsyncSessionLocal() as db:
+        product_ids = (await db.scalars(select(Product.id).order_by(Product.id).limit(args.lines))).all()
+        if len(product_ids) < args.lines:
+            print(f"only {len(product_ids)} products; seed more with --products")
+            return 1
+        await db.execute(insert(Cart), [{"id": cart_id, "guest_session_id": f"{PREFIX}{uuid4()}"}])
+        await db.execute(insert(CartItem), [
+            {"id": uuid4(), "cart_id": cart_id, "product_id": product_id, "quantity": 1 + i % 3}
+            for i, product_id in enumerate(product_ids)
+        ])
+        await db.commit()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            legacy_rows = (await db.execute(legacy_lines_query(cart_id))).all()
+            rows = (await db.execute(_lines_query(cart_id))).all()
+        legacy, cents = legacy_summary(legacy_rows), cents_summary(cart_id, rows)
+        failed = legacy.model_dump() != cents.model_dump()
+
+        print(f"lines={args.lines} subtotal={cents.subtotal} same={'yes' if not failed else 'NO'}")
+        print(f"{'path':<7} {'request ms':>11} {'python us':>10}")
+        for label, get, summarize, fetched in (
+            ("euros", legacy_get, legacy_summary, legacy_rows),
+            ("cents", cents_get, lambda r: cents_summary(cart_id, r), rows),
+        ):
+            request = []
+            for _ in range(args.repeat):
+                async with AsyncSessionLocal() as db:
+                    t0 = time.perf_counter()
+                    await get(db, cart_id)
+                    request.append((time.perf_counter() - t0) * 1000)
+            python = []
+            for _ in range(args.repeat * 10):
+                t0 = time.perf_counter()
+                summarize(fetched)
+                python.append((time.perf_counter() - t0) * 1e6)
+            print(f"{label:<7} {statistics.median(request):>11.2f} {statistics.median(python):>10.0f}")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+            await db.execute(delete(Cart).where(Cart.id == cart_id))
+            await db.commit()
+        await async_engine.dispose()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--products", type=int, default=0)
+    args = parser.parse_args()
+    if args.products:
+        seed(sessionmaker(bind=engine), args.products)
+    sys.exit(1 if asyncio.run(main_async(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
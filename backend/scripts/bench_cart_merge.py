@@ -0,0 +1,136 @@
+# backend/scripts/bench_cart_merge.py
+"""
+Cost of merging a guest cart into a user cart at sign-in, for guest carts
+of `--sizes` lines: the previous per-line loop (reproduced below: load the
+user's product ids and the guest lines, add the new ones one by one, then
+delete) vs the set-based merge in routes.carts.merge_guest_cart_into_user.
+The user cart already holds half of the guest's products. Prints the
+median time and the statements per merge, and checks the merged cart. The
+carts are deleted; `--products` seeds `bench-…` rows first (see
+bench_pagination) when the catalog is smaller than the largest cart.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_cart_merge --sizes 1 50 500
+    python -m scripts.bench_pagination --cleanup   # removes the seeded rows
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+from fastapi import Response
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from db.database import AsyncSessionLocal, async_engine, engine
+from db.models.cart import Cart
+from db.models.cart_item import CartItem
+from db.models.product import Product
+from routes.carts import CART_MERGE_POLICY, merge_guest_cart_into_user
+from scripts.bench_pagination import seed
+
+PREFIX = "bench-cart-merge-"
+
+
+async def legacy_merge(db, user_id, guest_session_id):
+    guest_cart = await db.scalar(select(Cart).where(Cart.guest_session_id == guest_session_id))
+    user_cart = await db.scalar(select(Cart).where(Cart.user_id == user_id))
+    if not user_cart:
+        user_cart = Cart(user_id=user_id)
+        db.add(user_cart)
+        await db.flush()
+    existing_pids = set(await db.scalars(select(CartItem.product_id).where(CartItem.cart_id == user_cart.id)))
+    guest_items = (await db.scalars(select(CartItem).where(CartItem.cart_id == guest_cart.id))).all()
+    for gi in guest_items:
+        if gi.product_id in existing_pids:
+            continue
+        db.add(CartItem(cart_id=user_cart.id, product_id=gi.product_id))
+        existing_pids.add(gi.product_id)
+    await db.execute(delete(CartItem).where(CartItem.cart_id == guest_cart.id))
+    await db.execute(delete(Cart).where(Cart.id == guest_cart.id))
+    await db.commit()
+
+
+async def set_based_merge(db, user_id, guest_session_id):
+    await merge_guest_cart_into_user(Response(), db, {"user_id": user_id}, guest_session_id)
+
+
+async def make_carts(product_ids, size: int):
+    """A guest cart of `size` lines and a user cart holding the second half of them and as many others."""
+    user_id, guest_session_id = f"{PREFIX}{uuid4()}", f"{PREFIX}{uuid4()}"
+    guest, user = uuid4(), uuid4()
+    guest_products = product_ids[:size]
+    user_products = product_ids[size // 2:size // 2 + size]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Cart), [{"id": guest, "guest_session_id": guest_session_id}, {"id": user, "user_id": user_id}])
+        await db.execute(insert(CartItem), [
+            {"id": uuid4(), "cart_id": cart_id, "product_id": product_id, "quantity": 2}
+            for cart_id, products in ((guest, guest_products), (user, user_products))
+            for product_id in products
+        ])
+        await db.commit()
+    return user_id, guest_session_id, len(set(guest_products) | set(user_products))
+
+
+async def run(merge, product_ids, size: int, repeat: int, counts: dict):
+    times, statements, failed = [], [], 0
+    for _ in range(repeat):
+        user_id, guest_session_id, expected = await make_carts(product_ids, size)
+        async with AsyncSessionLocal() as db:
+            counts["statements"] = 0
+            t0 = time.perf_counter()
+            await merge(db, user_id, guest_session_id)
+            times.append((time.perf_counter() - t0) * 1000)
+            statements.append(counts["statements"])
+        async with AsyncSessionLocal() as db:
+            lines = await db.scalar(
+                select(func.count()).select_from(CartItem).join(Cart).where(Cart.user_id == user_id)
+            )
+            guest_left = await db.scalar(select(func.count()).where(Cart.guest_session_id == guest_session_id))
+        failed += lines != expected or guest_left != 0
+    return statistics.median(times), statistics.median(statements), failed
+
+
+async def main_async(args) -> int:
+    counts = {"statements": 0}
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count_statement(*_):
+        counts["statements"] += 1
+
+    async with AsyncSessionLocal() as db:
+        product_ids = (await db.scalars(select(Product.id).order_by(Product.id).limit(max(args.sizes) * 2))).all()
+
+    failed = 0
+    try:
+        print(f"policy={CART_MERGE_POLICY}")
+        print(f"{'lines':>6} {'path':<7} {'ms':>7} {'stmts':>6}")
+        for size in args.sizes:
+            for label, merge in (("loop", legacy_merge), ("set", set_based_merge)):
+                ms, statements, bad = await run(merge, product_ids, size, args.repeat, counts)
+                failed += bad
+                print(f"{size:>6} {label:<7} {ms:>7.2f} {statements:>6.0f}" + (f"  FAIL x{bad}" if bad else ""))
+    finally:
+        async with AsyncSessionLocal() as db:
+            carts = select(Cart.id).where(Cart.user_id.startswith(PREFIX) | Cart.guest_session_id.startswith(PREFIX))
+            await db.execute(delete(CartItem).where(CartItem.cart_id.in_(carts)))
+            await db.execute(delete(Cart).where(Cart.user_id.startswith(PREFIX) | Cart.guest_session_id.startswith(PREFIX)))
+            await db.commit()
+        await async_engine.dispose()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--products", type=int, default=0)
+    args = parser.parse_args()
+    if args.products:
+        seed(sessionmaker(bind=engine), args.products)
+    sys.exit(1 if asyncio.run(main_async(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
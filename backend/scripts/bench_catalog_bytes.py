@@ -0,0 +1,78 @@
+# backend/scripts/bench_catalog_bytes.py
+"""
+Per-request cost of serving a warm catalog page: re-rendering the cached
+data with JSONResponse and letting GZipMiddleware compress it (the old
+path) vs handing out the pre-rendered, pre-compressed bytes of the cache
+entry. Then the same page end to end through the app, with and without
+Accept-Encoding.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_catalog_bytes --limit 100
+"""
+import argparse
+import asyncio
+import gzip
+import statistics
+import time
+
+import httpx
+from fastapi.responses import JSONResponse
+
+from main import app
+from utils.catalog_cache import CatalogEntry, brotli
+
+
+def timed(fn, n: int) -> float:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1_000_000)
+    return statistics.median(samples)
+
+
+async def end_to_end(client: httpx.AsyncClient, path: str, headers: dict, n: int) -> tuple[float, int]:
+    samples = []
+    size = 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = await client.get(path, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1_000_000)
+        size = int(r.headers.get("content-length") or len(r.content))
+    return statistics.median(samples), size
+
+
+async def main_async(args) -> None:
+    path = f"/products/all?limit={args.limit}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.get(path)).raise_for_status()
+        entry = CatalogEntry.build((await client.get(path)).json())
+
+        print(f"page of {args.limit}: {len(entry.body)} bytes")
+        print(f"{'render':<34} {'p50 us':>8}")
+        rows = [
+            ("JSONResponse(data)", lambda: JSONResponse(content=entry.data)),
+            ("JSONResponse + gzip level 9", lambda: gzip.compress(JSONResponse(content=entry.data).body, compresslevel=9)),
+            ("cached identity bytes", lambda: entry.variant("identity")),
+            ("cached gzip bytes", lambda: entry.variant("gzip")),
+        ]
+        if brotli is not None:
+            rows.append(("cached br bytes", lambda: entry.variant("br")))
+        for name, fn in rows:
+            print(f"{name:<34} {timed(fn, args.requests):>8.1f}")
+
+        print(f"\n{'end to end':<34} {'p50 us':>8} {'bytes':>7}")
+        for encoding in ("identity", "gzip") + (("br",) if brotli is not None else ()):
+            p50, size = await end_to_end(client, path, {"Accept-Encoding": encoding}, args.requests)
+            print(f"{encoding:<34} {p50:>8.0f} {size:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
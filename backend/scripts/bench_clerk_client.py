@@ -0,0 +1,97 @@
+# backend/scripts/bench_clerk_client.py
+"""
+Latency of Clerk user lookups against the local stub: a fresh `requests`
+connection per call (old behaviour) vs the pooled ClerkClient, sync and
+async, plus how fast an open circuit fails.
+
+    python -m scripts.bench_clerk_client --latency-ms 20 --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import requests
+
+from scripts.clerk_stub import ClerkStub, USER_ID
+from utils.clerk_client import CircuitBreaker, ClerkClient, ClerkUnavailable
+
+
+def _report(label: str, samples: list[float], wall: float | None = None) -> None:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    line = f"{label:<30} mean {statistics.mean(samples):8.3f} ms   p50 {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms"
+    if wall is not None:
+        line += f"   wall {wall:8.1f} ms"
+    print(line)
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+async def _async_run(client: ClerkClient, url: str, n: int, concurrency: int) -> tuple[list[float], float]:
+    samples: list[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            t0 = time.perf_counter()
+            await client.aget(url)
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = (time.perf_counter() - t0) * 1000
+    await client.aclose()
+    return samples, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = ClerkStub(latency_ms=args.latency_ms).start()
+    url = f"{stub.url}/v1/users/{USER_ID}"
+    headers = {"Authorization": "Bearer sk_test_stub"}
+
+    fresh = [_timed(lambda: requests.get(url, headers=headers, timeout=5)) for _ in range(args.requests)]
+    _report("requests, new connection", fresh)
+
+    client = ClerkClient("sk_test_stub", max_concurrency=args.concurrency, max_connections=args.concurrency)
+    pooled = [_timed(lambda: client.get(url)) for _ in range(args.requests)]
+    _report("ClerkClient sync, pooled", pooled)
+
+    samples, wall = asyncio.run(_async_run(
+        ClerkClient("sk_test_stub", max_concurrency=args.concurrency, max_connections=args.concurrency),
+        url, args.requests, args.concurrency,
+    ))
+    _report(f"ClerkClient async x{args.concurrency}", samples, wall)
+
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    failing = ClerkClient("sk_test_stub", retries=0, breaker=breaker)
+    stub.fail_next = 1
+    try:
+        failing.get(url)
+    except ClerkUnavailable:
+        pass
+
+    def fail_fast():
+        try:
+            failing.get(url)
+        except ClerkUnavailable:
+            pass
+
+    _report("open circuit (fail fast)", [_timed(fail_fast) for _ in range(args.requests)])
+
+    client.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/scripts/bench_db_pool.py
+"""
+Compare DB_POOL_MODE profiles against a local Postgres: each worker thread
+opens a session, runs a small query and closes it, like one request does.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_db_pool --threads 16 --iterations 200
+    python -m scripts.bench_db_pool --url postgresql://postgres@localhost:6432/pnoh --modes pgbouncer null
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import build_engine, pool_stats
+
+
+def run(url: str, mode: str, threads: int, iterations: int) -> None:
+    engine = build_engine(url, mode)
+    Session = sessionmaker(bind=engine)
+    samples: list[float] = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            with Session() as db:
+                db.execute(text("SELECT 1")).scalar()
+            local.append((time.perf_counter() - t0) * 1000)
+        with lock:
+            samples.extend(local)
+
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - t0
+
+    samples.sort()
+    stats = pool_stats(engine)
+    print(
+        f"{mode:<10} {len(samples) / wall:9.0f} req/s   "
+        f"p50 {statistics.median(samples):7.2f} ms   p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms   "
+        f"checkout wait avg {stats['wait_ms_avg']:.2f} ms max {stats['wait_ms_max']:.2f} ms"
+    )
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--modes", nargs="+", default=["null", "queue", "pgbouncer"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        run(args.url, mode, args.threads, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
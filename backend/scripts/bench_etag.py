@@ -0,0 +1,51 @@
+# backend/scripts/bench_etag.py
+"""
+Cost of a full catalog response vs a 304 revalidation, in process through
+the real app (middleware included) with a warm catalog cache.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_etag --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from main import app
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict, n: int) -> tuple[float, float, int]:
+    samples = []
+    size = 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = await client.get(path, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1_000_000)
+        size = len(r.content)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], size
+
+
+async def main_async(args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'path':<32} {'mode':<5} {'p50 us':>8} {'p95 us':>8} {'bytes':>7}")
+        for path in (f"/products/all?limit={args.limit}", "/products/all?limit=100"):
+            first = await client.get(path)
+            first.raise_for_status()
+            etag = first.headers["etag"]
+            for mode, headers in (("200", {}), ("304", {"If-None-Match": etag})):
+                p50, p95, size = await measure(client, path, headers, args.requests)
+                print(f"{path:<32} {mode:<5} {p50:>8.0f} {p95:>8.0f} {size:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=12)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
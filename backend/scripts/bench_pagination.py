@@ -0,0 +1,111 @@
+# backend/scripts/bench_pagination.py
+"""
+Offset vs keyset pagination on a large catalog. Seeds `--rows` synthetic
+products (names prefixed `bench-`) into the DB_URL database if they are not
+there yet, then times page 1 and a deep page for each sort.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_pagination --rows 100000 --pages 1 500
+    python -m scripts.bench_pagination --cleanup
+"""
+import argparse
+import os
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import build_engine
+from db.models.product import Product
+from utils.pagination import PRODUCT_SORTS, encode_cursor, paginate_products
+
+SEED_SQL = text("""
+    INSERT INTO products (id, name, description, price_cents, stock_quantity, category, sub_category, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           'bench-' || g,
+           'synthetic product ' || g,
+           (500 + random() * 99500)::int,
+           (random() * 20)::int,
+           (ARRAY['rings','earrings','bracelets','necklaces','crosses'])[1 + g % 5]::category,
+           (ARRAY['ethnic','one_of_a_kind','minimal','luxury'])[1 + g % 4]::"Subcategory",
+           now() - make_interval(secs => g),
+           now()
+    FROM generate_series(:start, :stop) AS g
+    -- heap order unrelated to created_at, as in a catalog that has seen
+    -- updates; rows written in date order make the planner favour the
+    -- global created_at index over the scoped ones
+    ORDER BY md5(g::text)
+""")
+
+
+def seed(Session, rows: int) -> None:
+    with Session() as db:
+        have = db.scalar(select(func.count()).where(Product.name.like("bench-%")))
+        if have >= rows:
+            return
+        print(f"seeding {rows - have} products ...")
+        db.execute(SEED_SQL, {"start": have + 1, "stop": rows})
+        db.commit()
+        db.execute(text("ANALYZE products"))
+        db.commit()
+
+
+def timed(Session, query, repeat: int) -> float:
+    samples = []
+    with Session() as db:
+        db.execute(query).all()
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            db.execute(query).all()
+            samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def cursor_before(Session, sort: str, skip: int) -> str:
+    # cursor a client would hold after walking to this page
+    field = PRODUCT_SORTS[sort][1]
+    with Session() as db:
+        row = db.execute(paginate_products(select(Product), sort, None, skip - 1, 1)).scalar_one()
+        value = getattr(row, field)
+    return encode_cursor(sort, value.isoformat() if field == "created_at" else value, row.id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    engine = build_engine(args.url)
+    Session = sessionmaker(bind=engine)
+
+    if args.cleanup:
+        with Session() as db:
+            deleted = db.execute(text("DELETE FROM products WHERE name LIKE 'bench-%'")).rowcount
+            db.commit()
+        print(f"deleted {deleted} bench products")
+        return
+
+    seed(Session, args.rows)
+
+    print(f"{'sort':<11} {'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+    for sort in ("created", "newest", "price_asc"):
+        for page in args.pages:
+            skip = (page - 1) * args.limit
+            offset_ms = timed(Session, paginate_products(select(Product), sort, None, skip, args.limit), args.repeat)
+            if skip:
+                cursor = cursor_before(Session, sort, skip)
+                keyset_ms = timed(Session, paginate_products(select(Product), sort, cursor, 0, args.limit), args.repeat)
+            else:
+                keyset_ms = offset_ms
+            print(f"{sort:<11} {page:>6} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/scripts/bench_projection.py
+"""
+Per catalog endpoint, what a cache miss costs when it loads full Product
+entities (the old read path) vs the projected rows the routes select now:
+time per request, and the memory blocks (objects) and KiB allocated by
+the load that are still alive when the response is ready: the encoded
+result plus what the session holds (identity map, instance state). Each run
+uses a fresh session, like a request does, on one shared connection so
+connecting is not measured. `--products` seeds `bench-…` rows first (see
+bench_pagination).
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_projection --repeat 200
+    python -m scripts.check_search_indexes --cleanup   # removes the seeded rows
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from db.database import async_engine, engine
+from db.models.product import Category, Product
+from routes.products import SUMMARY_COLUMNS, _summaries
+from scripts.bench_pagination import seed
+from utils.pagination import paginate_products
+
+
+def endpoints(ids, limit):
+    one = ids[0]
+    many = bindparam("ids", ids[:limit], type_=ARRAY(PG_UUID(as_uuid=True)))
+
+    async def entities(db, query):
+        return jsonable_encoder((await db.execute(query)).scalars().all())
+
+    async def rows(db, query):
+        return _summaries(await db.execute(query))
+
+    async def image_entity(db):
+        return jsonable_encoder((await db.get(Product, one)).big_image_url)
+
+    async def image_column(db):
+        return jsonable_encoder((await db.execute(select(Product.big_image_url).where(Product.id == one))).scalar())
+
+    def page(columns, *where):
+        return paginate_products(select(*columns).where(*where), "newest", None, 0, limit)
+
+    # label -> (entity loader, projected loader)
+    return {
+        f"/products/all?limit={limit}": (
+            lambda db: entities(db, page([Product])), lambda db: rows(db, page(SUMMARY_COLUMNS))),
+        f"/products/category/rings?limit={limit}": (
+            lambda db: entities(db, page([Product], Product.category == Category.rings)),
+            lambda db: rows(db, page(SUMMARY_COLUMNS, Product.category == Category.rings))),
+        "/products/{id}": (
+            lambda db: entities(db, select(Product).where(Product.id == one)),
+            lambda db: rows(db, select(*SUMMARY_COLUMNS).where(Product.id == one))),
+        f"/products/batch ({limit} ids)": (
+            lambda db: entities(db, select(Product).where(Product.id == any_(many))),
+            lambda db: rows(db, select(*SUMMARY_COLUMNS).where(Product.id == any_(many)))),
+        "/products/image/{id}": (image_entity, image_column),
+    }
+
+
+async def measure(conn, loader, repeat: int) -> tuple[float, int, float]:
+    times = []
+    for _ in range(repeat):
+        async with AsyncSession(bind=conn) as db:
+            t0 = time.perf_counter()
+            await loader(db)
+            times.append((time.perf_counter() - t0) * 1_000_000)
+
+    async with AsyncSession(bind=conn) as db:
+        tracemalloc.start()
+        result = await loader(db)  # noqa: F841 - kept alive for the snapshot
+        stats = tracemalloc.take_snapshot().statistics("filename")
+        tracemalloc.stop()
+    blocks = sum(stat.count for stat in stats)
+    size = sum(stat.size for stat in stats) / 1024
+    return statistics.median(times), blocks, size
+
+
+async def main_async(args) -> None:
+    async with async_engine.connect() as conn:
+        ids = (await conn.execute(select(Product.id).order_by(Product.created_at.desc()).limit(args.limit))).scalars().all()
+
+        print(f"{'endpoint':<36} {'mode':<7} {'us':>7} {'objects':>8} {'KiB':>7}")
+        for label, loaders in endpoints(ids, args.limit).items():
+            for mode, loader in zip(("entity", "rows"), loaders):
+                us, blocks, size = await measure(conn, loader, args.repeat)
+                print(f"{label:<36} {mode:<7} {us:>7.0f} {blocks:>8} {size:>7.1f}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--products", type=int, default=0)
+    args = parser.parse_args()
+    if args.products:
+        seed(sessionmaker(bind=engine), args.products)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
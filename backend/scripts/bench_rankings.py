@@ -0,0 +1,163 @@
+# backend/scripts/bench_rankings.py
+"""
+Ranking job cost: a first run over `--orders` synthetic paid orders spread
+over the last `--days` days (emails `rankbench…@example.com`, items on
+`bench-…` products, popularity skewed), then an incremental run after
+`--new` more orders arrive. Checks the daily aggregates against a GROUP BY
+over the orders, and compares reading a bestseller page with ranking the
+window's orders at request time.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.bench_rankings --orders 200000
+    python -m scripts.bench_rankings --cleanup
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import build_engine
+from db.models.order import Order
+from db.models.product import Product
+from db.models.product_ranking import ProductRanking
+from scripts.bench_pagination import seed as seed_products
+from utils.rankings import ATHENS, JOB_NAME, RANKING_LAG, RANKING_WINDOWS, refresh_rankings
+
+SEED_ORDERS_SQL = text("""
+    WITH products AS (
+        SELECT array_agg(id ORDER BY id) AS ids FROM products WHERE name LIKE 'bench-%'
+    ), o AS (
+        INSERT INTO orders (id, email, currency, subtotal_cents, discount_cents, shipping_cents, tax_cents,
+                            total_cents, status, payment_status, created_at, updated_at)
+        SELECT gen_random_uuid(), 'rankbench' || g || '@example.com', 'eur', 0, 0, 0, 0, 0, 'paid', 'succeeded',
+               CAST(:newest AS timestamp) - make_interval(secs => random() * :span), now()
+        FROM generate_series(:start, :stop) AS g
+        RETURNING id
+    )
+    INSERT INTO order_items (id, order_id, product_id, product_name, unit_cents, quantity, line_total_cents)
+    SELECT gen_random_uuid(), o.id,
+           products.ids[1 + floor(power(random(), 3) * array_length(products.ids, 1))::int],
+           'bench', 1000, 1 + (random() * 2)::int, 1000
+    FROM o CROSS JOIN products CROSS JOIN generate_series(1, 2)
+""")
+
+# what the endpoint would run without the job
+LIVE_RANKING_SQL = text("""
+    SELECT oi.product_id, sum(oi.quantity) AS quantity
+    FROM orders o JOIN order_items oi ON oi.order_id = o.id
+    WHERE o.created_at::date > CAST(:today AS date) - :window AND o.payment_status = 'succeeded'
+      AND oi.product_id IS NOT NULL
+    GROUP BY oi.product_id
+    ORDER BY quantity DESC, oi.product_id
+    LIMIT 12
+""")
+
+CHECK_SQL = text("""
+    SELECT count(*) FROM (
+        SELECT oi.product_id, o.created_at::date AS day, sum(oi.quantity) AS quantity
+        FROM orders o JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.created_at::date > CAST(:oldest AS date) AND o.payment_status = 'succeeded'
+          AND oi.product_id IS NOT NULL
+          AND (o.created_at, o.id) <= (SELECT created_at, order_id FROM job_watermarks WHERE name = :job)
+        GROUP BY 1, 2
+    ) expected
+    FULL JOIN product_sales_daily d USING (product_id, day)
+    WHERE expected.quantity IS DISTINCT FROM d.quantity
+""")
+
+
+def timed(fn, repeat: int = 1) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--new", type=int, default=1_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    engine = build_engine(args.url)
+    Session = sessionmaker(bind=engine)
+    reset = [
+        "DELETE FROM product_rankings",
+        "DELETE FROM product_sales_daily",
+        f"DELETE FROM job_watermarks WHERE name = '{JOB_NAME}'",
+    ]
+
+    if args.cleanup:
+        with Session() as db:
+            for sql in reset:
+                db.execute(text(sql))
+            orders = db.execute(text("DELETE FROM orders WHERE email LIKE 'rankbench%@example.com'")).rowcount
+            products = db.execute(text("DELETE FROM products WHERE name LIKE 'bench-%'")).rowcount
+            db.commit()
+        print(f"deleted {orders} bench orders, {products} bench products; the next job run starts from scratch")
+        return
+
+    seed_products(Session, args.products)
+    now = datetime.now(ATHENS).replace(tzinfo=None)
+    # new orders land before the job's lag cut-off
+    newest = now - timedelta(seconds=RANKING_LAG + 5)
+    with Session() as db:
+        have = db.scalar(select(func.count()).where(Order.email.like("rankbench%@example.com")))
+        if have < args.orders:
+            print(f"seeding {args.orders - have} orders ...")
+            for start in range(have + 1, args.orders + 1, 50_000):
+                db.execute(SEED_ORDERS_SQL, {
+                    "start": start, "stop": min(start + 49_999, args.orders),
+                    "newest": newest - timedelta(minutes=10), "span": args.days * 86400,
+                })
+                db.commit()
+            db.execute(text("ANALYZE orders; ANALYZE order_items"))
+            db.commit()
+
+        for sql in reset:
+            db.execute(text(sql))
+        db.commit()
+
+        full = timed(lambda: refresh_rankings(db))
+        print(f"first run over {args.orders} orders: {full:.0f} ms")
+
+        db.execute(SEED_ORDERS_SQL, {
+            "start": args.orders + 1, "stop": args.orders + args.new, "newest": newest, "span": 300,
+        })
+        db.commit()
+        result = {}
+        incremental = timed(lambda: result.update(refresh_rankings(db)))
+        print(f"incremental run after {args.new} new orders: {incremental:.0f} ms, {result}")
+        noop = timed(lambda: refresh_rankings(db), repeat=5)
+        print(f"run with nothing new: {noop:.1f} ms")
+
+        mismatched = db.scalar(CHECK_SQL, {"oldest": now.date() - timedelta(days=max(RANKING_WINDOWS)), "job": JOB_NAME})
+        print(f"{'ok  ' if not mismatched else 'FAIL'} daily aggregates match the orders ({mismatched} mismatched rows)")
+
+        for window in RANKING_WINDOWS:
+            page = (
+                select(Product.id, Product.name, ProductRanking.rank)
+                .join(ProductRanking, ProductRanking.product_id == Product.id)
+                .where(ProductRanking.window_days == window, ProductRanking.rank > 0)
+                .order_by(ProductRanking.rank).limit(12)
+            )
+            served = timed(lambda: db.execute(page).all(), repeat=20)
+            live = timed(lambda: db.execute(LIVE_RANKING_SQL, {"today": now.date(), "window": window}).all(), repeat=3)
+            print(f"window {window:>3}d: ranking table {served:.2f} ms, GROUP BY over orders {live:.0f} ms")
+
+    engine.dispose()
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
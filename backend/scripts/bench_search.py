@@ -0,0 +1,112 @@
+# backend/scripts/bench_search.py
+"""
+Search index build time and query latency on a synthetic catalog (no
+database needed). Queries mix Greek with and without accents, Greeklish,
+prefixes and multi-word searches, with and without a category filter.
+"cold" is the first run, before the words are in the per-word cache, and
+"after write" the first run after an unrelated product was updated.
+
+    python -m scripts.bench_search --products 50000
+"""
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from db.models.product import Category, SubCategory
+from utils.search import SearchIndex
+
+NOUNS = ["δαχτυλίδι", "σκουλαρίκια", "βραχιόλι", "κολιέ", "σταυρός", "μενταγιόν", "αλυσίδα", "καρφωτά", "κρίκοι", "βέρα"]
+ADJECTIVES = [
+    "ασημένιο", "επίχρυσο", "χρυσό", "χειροποίητο", "βυζαντινό", "μινιμαλ", "vintage", "λεπτό", "μεγάλο", "στριφτό",
+    "σφυρήλατο", "οξειδωμένο", "ροζ", "μαύρο", "λευκό", "γαλάζιο", "πράσινο", "κόκκινο",
+]
+THEMES = [
+    "Θάλασσα", "Φεγγάρι", "Ήλιος", "Αστέρι", "Κύμα", "Ελιά", "Μαίανδρος", "Καρδιά", "Φύλλο", "Λουλούδι",
+    "Κοχύλι", "Άγκυρα", "Μάτι", "Φτερό", "Σταγόνα", "Ρόδι", "Δελφίνι", "Πεταλούδα", "Ουρανός", "Αιγαίο",
+]
+MATERIALS = ["ασήμι 925", "ορείχαλκο", "ζιργκόν", "μαργαριτάρι", "σμάλτο", "κρύσταλλα", "δέρμα", "ατσάλι", "ημιπολύτιμες πέτρες"]
+
+QUERIES = [
+    ("greek", "δαχτυλίδι"),
+    ("no accents", "δαχτυλιδι θαλασσα"),
+    ("upper case", "ΣΚΟΥΛΑΡΙΚΙΑ ΦΕΓΓΑΡΙ"),
+    ("greeklish", "daxtylidi asimenio"),
+    ("greeklish", "skoularikia feggari"),
+    ("prefix", "χειροπ"),
+    ("prefix", "vraxi"),
+    ("rare", "δελφίνι μαργαριτάρι"),
+    ("english", "vintage"),
+]
+
+
+def synthetic(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    categories = list(Category)
+    subs = list(SubCategory)
+    for i in range(n):
+        name = f"{rnd.choice(ADJECTIVES).capitalize()} {rnd.choice(NOUNS)} {rnd.choice(THEMES)} {i}"
+        description = (
+            f"{rnd.choice(ADJECTIVES).capitalize()} {rnd.choice(NOUNS)} από {rnd.choice(MATERIALS)} "
+            f"με {rnd.choice(MATERIALS)}, {rnd.choice(ADJECTIVES)} φινίρισμα. Έμπνευση: {rnd.choice(THEMES)}."
+        )
+        category = rnd.choice(categories)
+        yield SimpleNamespace(
+            id=uuid4(),
+            name=name,
+            description=description,
+            category=category,
+            sub_category=None if category == Category.crosses else rnd.choice(subs),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=12)
+    args = parser.parse_args()
+
+    products = list(synthetic(args.products))
+    index = SearchIndex()
+    t0 = time.perf_counter()
+    index.rebuild(products)
+    print(f"built {args.products} products in {time.perf_counter() - t0:.2f} s: {index.stats()}")
+
+    def once(q, category):
+        t = time.perf_counter()
+        index.search(q, category, limit=args.limit)
+        return (time.perf_counter() - t) * 1_000_000
+
+    print(f"{'query':<36} {'filter':<8} {'hits':>5} {'cold us':>8} {'write us':>8} {'p50 us':>8} {'p95 us':>8}")
+    for i, (kind, q) in enumerate(QUERIES):
+        for category in (None, Category.rings):
+            cold = once(q, category)
+            unrelated = products[-1 - i]
+            unrelated.name = f"Καινούργιο όνομα {i}"
+            index.upsert(unrelated)
+            after_write = once(q, category)
+            hits = len(index.search(q, category, limit=args.products))
+            samples = []
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                index.search(q, category, limit=args.limit)
+                samples.append((time.perf_counter() - t) * 1_000_000)
+            samples.sort()
+            label = f"{q} ({kind})"
+            print(f"{label:<36} {category.value if category else '-':<8} {hits:>5} {cold:>8.0f} {after_write:>8.0f} "
+                  f"{statistics.median(samples):>8.0f} {samples[int(len(samples) * 0.95) - 1]:>8.0f}")
+
+    samples = []
+    for product in products[: args.repeat]:
+        product.name += " Νέο"
+        t = time.perf_counter()
+        index.upsert(product)
+        samples.append((time.perf_counter() - t) * 1_000_000)
+    print(f"incremental upsert p50 {statistics.median(samples):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
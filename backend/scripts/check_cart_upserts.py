@@ -0,0 +1,75 @@
+# backend/scripts/check_cart_upserts.py
+"""
+Concurrency check for POST /cart/{product_id}. For a fresh guest and a
+fresh user it fires `--adds` simultaneous adds, spread over `--products`
+products, each in its own session as separate requests would be. The owner
+must end up with exactly one cart holding one line per product. Exits
+non-zero on a failure; the carts are deleted.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.check_cart_upserts --adds 200
+"""
+import argparse
+import asyncio
+import sys
+from uuid import uuid4
+
+from fastapi import Response
+from sqlalchemy import delete, func, select
+
+from db.database import AsyncSessionLocal, async_engine
+from db.models.cart import Cart
+from db.models.cart_item import CartItem
+from db.models.product import Product
+from routes.carts import add_to_cart
+
+
+async def stampede(product_ids, adds: int, auth, session_id) -> None:
+    async def attempt(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await add_to_cart(product_ids[i % len(product_ids)], Response(), db, auth, session_id)
+
+    await asyncio.gather(*(attempt(i) for i in range(adds)))
+
+
+async def main_async(args) -> int:
+    async with AsyncSessionLocal() as db:
+        product_ids = (await db.scalars(select(Product.id).order_by(Product.id).limit(args.products))).all()
+
+    failed = 0
+    for label, owner in (("guest", Cart.guest_session_id), ("user", Cart.user_id)):
+        owner_id = f"bench-cart-{uuid4()}"
+        auth = {"user_id": owner_id} if owner is Cart.user_id else None
+        try:
+            await stampede(product_ids, args.adds, auth, None if auth else owner_id)
+            async with AsyncSessionLocal() as db:
+                carts = (await db.scalars(select(Cart.id).where(owner == owner_id))).all()
+                lines = (await db.execute(
+                    select(CartItem.product_id, func.count())
+                    .where(CartItem.cart_id.in_(carts)).group_by(CartItem.product_id)
+                )).all()
+            ok = len(carts) == 1 and len(lines) == len(product_ids) and all(n == 1 for _, n in lines)
+            failed += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {label}: {args.adds} concurrent adds of {len(product_ids)} products "
+                  f"-> {len(carts)} cart(s), {len(lines)} product(s), "
+                  f"{sum(n for _, n in lines)} line(s)")
+        finally:
+            async with AsyncSessionLocal() as db:
+                carts = select(Cart.id).where(owner == owner_id)
+                await db.execute(delete(CartItem).where(CartItem.cart_id.in_(carts)))
+                await db.execute(delete(Cart).where(owner == owner_id))
+                await db.commit()
+
+    await async_engine.dispose()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adds", type=int, default=200)
+    parser.add_argument("--products", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main_async(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/scripts/check_import_time.py
+"""
+Import-time budget for the app. Imports `main` in fresh interpreters and
+exits non-zero if the median import takes longer than the budget, if it
+writes anything to stdout, or if it pulls in an SDK that should only load
+on first use.
+
+    python -m scripts.check_import_time --budget-ms 2000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ("stripe", "boto3", "botocore", "PIL")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+elapsed = (time.perf_counter() - t0) * 1000
+sys.stderr.write(json.dumps({"ms": elapsed, "loaded": [m for m in %r if m in sys.modules]}) + "\\n")
+""" % (LAZY_MODULES,)
+
+
+def probe() -> tuple[float, list[str], str]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import main failed:\n{proc.stderr}")
+    result = json.loads(proc.stderr.strip().splitlines()[-1])
+    return result["ms"], result["loaded"], proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "2000")))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = []
+    failures = []
+    for _ in range(args.runs):
+        ms, loaded, stdout = probe()
+        samples.append(ms)
+        if loaded:
+            failures.append(f"eagerly imported: {', '.join(loaded)}")
+        if stdout:
+            failures.append(f"wrote to stdout during import: {stdout.strip()[:200]!r}")
+
+    median = statistics.median(samples)
+    print(f"import main: median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    for failure in sorted(set(failures)):
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# backend/scripts/check_listing_indexes.py
+"""
+EXPLAIN checks for the catalog listings: every scope (all, category,
+subcategory, both) x sort x filter combination (price range, in-stock,
+first page and cursor page) must be planned on the composite (scope
+columns, sort key, id) index for that scope and sort, with no sequential
+scan and no index of another scope. A date sort with a price bound may
+range-scan price instead (see expected_indexes). Seeds `--products` synthetic products (names `bench-…`)
+if they are not there yet. Exits non-zero on a failure.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.check_listing_indexes --products 100000
+    python -m scripts.bench_pagination --cleanup
+"""
+import argparse
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from db.database import build_engine
+from db.models.product import Category, Product, SubCategory
+from routes.products import SUMMARY_COLUMNS
+from scripts.bench_pagination import seed
+from scripts.check_search_indexes import explain
+from utils.pagination import PRODUCT_SORTS, ProductFilters, encode_cursor, paginate_products
+
+# scope -> (conditions, leading columns of its indexes)
+SCOPES = {
+    "all": ([], ""),
+    "category": ([Product.category == Category.rings], "category_"),
+    "subcategory": ([Product.sub_category == SubCategory.minimal], "sub_category_"),
+    "category+sub": ([Product.category == Category.rings, Product.sub_category == SubCategory.minimal], "category_sub_category_"),
+}
+INDEXES = {index.name for index in Product.__table__.indexes}
+
+FILTERS = {
+    "-": ProductFilters(),
+    "min": ProductFilters(min_price=500),
+    "max": ProductFilters(max_price=50),
+    "range": ProductFilters(min_price=20, max_price=50),
+    "stock": ProductFilters(in_stock_only=True),
+    "range+stock": ProductFilters(min_price=20, max_price=50, in_stock_only=True),
+}
+
+
+def index_name(prefix: str, key: str) -> str:
+    name = f"ix_products_{prefix}{key}_id"
+    assert name in INDEXES, f"{name} is not declared on Product"
+    return name
+
+
+def expected_indexes(prefix: str, sort: str, filters: ProductFilters) -> Tuple[Set[str], Set[str]]:
+    """
+    (indexes the plan must use one of, indexes it may use). The page comes
+    in order off the scope's sort index. With a price bound on a date sort
+    the planner may instead range-scan the scope's price index and sort the
+    rows in range, or AND the sort index with the price index.
+    """
+    key = PRODUCT_SORTS[sort][0].key
+    primary = {index_name(prefix, key)}
+    if key == "price_cents" or (filters.min_price is None and filters.max_price is None):
+        return primary, primary
+    primary.add(index_name(prefix, "price_cents"))
+    return primary, primary | {index_name("", "price_cents")}
+
+
+def cursor_for(sort: str) -> str:
+    # a cursor from the middle of the catalog
+    value = (datetime.now() - timedelta(hours=12)).isoformat() if PRODUCT_SORTS[sort][1] == "created_at" else 500.0
+    return encode_cursor(sort, value, "80000000-0000-0000-0000-000000000000")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=12)
+    args = parser.parse_args()
+
+    engine = build_engine(args.url)
+    Session = sessionmaker(bind=engine)
+    seed(Session, args.products)
+
+    failed = 0
+    with Session() as db:
+        for (scope, (where, prefix)), sort, (label, filters), paged in itertools.product(
+            SCOPES.items(), PRODUCT_SORTS, FILTERS.items(), (False, True),
+        ):
+            stmt = paginate_products(
+                select(*SUMMARY_COLUMNS).where(*where, *filters.conditions()),
+                sort, cursor_for(sort) if paged else None, 0, args.limit,
+            )
+            nodes = explain(db, engine, stmt)
+            used = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+            seq = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+            primary, allowed = expected_indexes(prefix, sort, filters)
+            ok = bool(primary & set(used)) and set(used) <= allowed and not seq
+            failed += not ok
+            case = f"{scope:<13} {sort:<11} {label:<12} {'cursor' if paged else 'first':<6}"
+            detail = f"indexes={used}" + (f" expected={sorted(allowed)}" if not ok else "") + (f" seq_scan={seq}" if seq else "")
+            print(f"{'ok  ' if ok else 'FAIL'} {case} {detail}")
+
+    engine.dispose()
+    print(f"{failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
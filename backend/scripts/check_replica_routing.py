@@ -0,0 +1,51 @@
+# backend/scripts/check_replica_routing.py
+"""
+Exercise read-replica routing against a local primary and streaming replica.
+An extra unreachable replica is added on purpose to show it being dropped
+from rotation.
+
+    pg_basebackup -h localhost -p 5432 -U postgres -D /tmp/pgrep -R
+    pg_ctl -D /tmp/pgrep -o "-p 5433" start
+    DB_URL=postgresql://postgres@localhost:5432/pnoh \\
+    DB_REPLICA_URLS=postgresql://postgres@localhost:5433/pnoh,postgresql://postgres@localhost:5499/pnoh \\
+    DB_REPLICA_CHECK_INTERVAL=1 python -m scripts.check_replica_routing
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from db.database import SessionLocal, replicas
+from db.models.product import Product
+from main import app
+from utils.database import PRIMARY_COOKIE
+
+
+def main():
+    if not replicas:
+        raise SystemExit("Set DB_REPLICA_URLS first")
+
+    with SessionLocal() as db:
+        product_id = db.scalar(select(Product.id).limit(1))
+    if product_id is None:
+        raise SystemExit("Need at least one product on the primary")
+
+    replicas.check_all()
+
+    with TestClient(app, base_url="https://testserver") as client:
+        for _ in range(4):
+            client.get("/products/all")
+        print("after 4 catalog reads:", replicas.stats())
+
+        r = client.post(f"/cart/{product_id}")
+        print("write sets sticky cookie:", PRIMARY_COOKIE in r.cookies)
+        before = sum(x["reads"] for x in replicas.stats()["replicas"])
+        client.get("/cart")
+        after = sum(x["reads"] for x in replicas.stats()["replicas"])
+        print("read after write served by primary:", before == after)
+
+        client.cookies.delete(PRIMARY_COOKIE)
+        client.get("/cart")
+        print("without the cookie it goes to a replica:", sum(x["reads"] for x in replicas.stats()["replicas"]) > after)
+
+
+if __name__ == "__main__":
+    main()
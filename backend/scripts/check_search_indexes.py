@@ -0,0 +1,145 @@
+# backend/scripts/check_search_indexes.py
+"""
+EXPLAIN checks for the admin order search and the Postgres product search.
+Seeds `--orders` synthetic orders (emails `bench…@example.com`) and
+`--products` synthetic products (names `bench-…`) into the DB_URL database
+if they are not there yet, then asserts that every query the search
+builders produce is served by the expected index, with no sequential scan.
+Exits non-zero on a failure. The trigram cases need pg_trgm and its
+indexes (migration c3f1a9b27d40); without the extension they fail.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.check_search_indexes --orders 1000000
+    python -m scripts.check_search_indexes --cleanup
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import build_engine
+from db.models.order import Order
+from db.models.product import Product
+from scripts.bench_pagination import seed as seed_products
+from utils.order_search import order_search_condition
+from utils.search import search_query
+
+SEED_ORDERS_SQL = text("""
+    INSERT INTO orders (id, user_id, email, currency, subtotal_cents, discount_cents, shipping_cents,
+                        tax_cents, total_cents, status, payment_status, stripe_payment_intent_id,
+                        stripe_checkout_session_id, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           'user_bench' || md5(g::text),
+           'bench' || g || '@example.com',
+           'eur', 0, 0, 0, 0,
+           (500 + random() * 49500)::int,
+           'paid', 'succeeded',
+           'pi_bench' || md5(g::text),
+           'cs_test_bench' || md5(g::text),
+           now() - make_interval(secs => g),
+           now()
+    FROM generate_series(:start, :stop) AS g
+""")
+
+
+def seed_orders(Session, rows: int) -> None:
+    with Session() as db:
+        have = db.scalar(select(func.count()).where(Order.email.like("bench%@example.com")))
+        if have >= rows:
+            return
+        print(f"seeding {rows - have} orders ...")
+        for start in range(have + 1, rows + 1, 100_000):
+            db.execute(SEED_ORDERS_SQL, {"start": start, "stop": min(start + 99_999, rows)})
+            db.commit()
+        db.execute(text("ANALYZE orders"))
+        db.commit()
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(db, engine, stmt) -> List[Dict[str, Any]]:
+    compiled = stmt.compile(dialect=engine.dialect)
+    params = {k: str(v) if isinstance(v, UUID) else v for k, v in compiled.params.items()}
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(plan_nodes(plan[0]["Plan"]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    engine = build_engine(args.url)
+    Session = sessionmaker(bind=engine)
+
+    if args.cleanup:
+        with Session() as db:
+            orders = db.execute(text("DELETE FROM orders WHERE email LIKE 'bench%@example.com'")).rowcount
+            products = db.execute(text("DELETE FROM products WHERE name LIKE 'bench-%'")).rowcount
+            db.commit()
+        print(f"deleted {orders} bench orders, {products} bench products")
+        return
+
+    seed_orders(Session, args.orders)
+    seed_products(Session, args.products)
+
+    with Session() as db:
+        trgm = db.scalar(text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")) > 0
+        sample = db.execute(
+            select(Order.id, Order.stripe_checkout_session_id, Order.stripe_payment_intent_id)
+            .where(Order.email == f"bench{args.orders // 2}@example.com")
+        ).one()
+
+        def admin_orders(q: str):
+            return select(Order).where(order_search_condition(q)).order_by(Order.created_at.desc()).limit(20)
+
+        tsquery = func.to_tsquery("simple", f"bench:* & {args.products // 2}:*")
+
+        # (label, statement, indexes the plan must use, needs pg_trgm)
+        cases = [
+            ("order id", admin_orders(str(sample.id)), {"orders_pkey"}, False),
+            ("checkout session id", admin_orders(sample.stripe_checkout_session_id), {"ix_orders_session"}, False),
+            ("payment intent id", admin_orders(sample.stripe_payment_intent_id), {"ix_orders_payment_intent"}, False),
+            ("email fragment", admin_orders(f"bench{args.orders // 3}@exam"), {"ix_orders_email_trgm"}, True),
+            ("id fragment", admin_orders(str(sample.id)[:13]), {"ix_orders_id_trgm"}, True),
+            ("product words", search_query(select(Product), f"bench {args.products // 2}").limit(12),
+             {"ix_products_search_vector", "ix_products_name_trgm"}, True),
+            # the tsvector arm of search_query on its own
+            ("product tsvector", select(Product).where(Product.search_vector.op("@@")(tsquery))
+             .order_by(func.ts_rank(Product.search_vector, tsquery).desc(), Product.id).limit(12),
+             {"ix_products_search_vector"}, False),
+        ]
+
+        failed = 0
+        for label, stmt, expected, needs_trgm in cases:
+            if needs_trgm and not trgm:
+                failed += 1
+                print(f"FAIL {label:<22} pg_trgm is not installed")
+                continue
+            nodes = explain(db, engine, stmt)
+            used = {n["Index Name"] for n in nodes if "Index Name" in n}
+            seq = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+            ok = expected <= used and not seq
+            failed += not ok
+            detail = f"indexes={sorted(used)}" + (f" seq_scan={seq}" if seq else "")
+            print(f"{'ok  ' if ok else 'FAIL'} {label:<22} {detail}")
+
+    engine.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# backend/scripts/check_stock_reservations.py
+"""
+Concurrency check for checkout stock holds. For each `--stock` level it
+creates a throwaway product with that many units and fires `--checkouts`
+simultaneous reservations at it from as many threads (over a pool of
+`--connections`). Exactly `stock` of them must win, with no oversell. It
+then checks that the sweeper releases expired holds and that converting a
+hold is idempotent, and that the admin panel cannot take stock below the
+held units. Last, it goes through POST /stripe/create-checkout-session
+against a fake Stripe that, like Stripe, rejects sessions expiring in less
+than 30 minutes: the session must be accepted, and a failed one must give
+its hold back. Exits non-zero on a failure; the products are deleted.
+
+    DB_URL=postgresql://postgres@localhost/pnoh python -m scripts.check_stock_reservations --checkouts 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from types import SimpleNamespace
+
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, delete, select, update
+from sqlalchemy.orm import Session
+
+import routes.stripe_checkout as stripe_checkout
+from routes.admin_panel import update_product
+from db.models.cart import Cart
+from db.models.cart_item import CartItem
+from db.models.product import Category, Product, SubCategory
+from db.models.stock_reservation import StockReservation
+from db.schemas.product import ProductUpdateRequest
+from utils.stock import convert_reservation, release_expired, release_reservation, reserve_stock
+
+
+def stampede(bind, product_id, checkouts: int):
+    barrier = threading.Barrier(checkouts)
+    results = [None] * checkouts
+
+    def attempt(i: int) -> None:
+        barrier.wait()
+        t0 = time.perf_counter()
+        with Session(bind) as db:
+            try:
+                reserve_stock(db, [(product_id, 1)])
+                won = True
+            except HTTPException as e:
+                assert e.status_code == 409, e.detail
+                won = False
+        results[i] = (won, (time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=attempt, args=(i,)) for i in range(checkouts)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class FakeStripe:
+    """Just enough of the stripe module for create_checkout_session."""
+
+    def __init__(self):
+        self.fail = False
+        self.sessions = []
+        self.checkout = SimpleNamespace(Session=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        if self.fail:
+            raise RuntimeError("stripe is down")
+        # Stripe's rule, checked the moment the session is created
+        lifetime = params["expires_at"] - time.time()
+        if lifetime < 30 * 60:
+            raise RuntimeError(f"expires_at must be at least 30 minutes from creation, got {lifetime / 60:.2f}")
+        self.sessions.append(params)
+        return SimpleNamespace(url="https://checkout.stripe.test/session")
+
+
+def check_checkout_session(bind, product_id, check) -> None:
+    fake = FakeStripe()
+    stripe_checkout.STOCK_RESERVATIONS = True
+    stripe_checkout.get_stripe = lambda: fake
+    guest_session_id = f"bench-stock-{uuid4()}"
+    with Session(bind) as db:
+        cart = Cart(guest_session_id=guest_session_id)
+        db.add(cart)
+        db.flush()
+        db.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=1))
+        db.commit()
+        cart_id = cart.id
+    try:
+        with Session(bind) as db:
+            try:
+                stripe_checkout.create_checkout_session(Response(), db, None, guest_session_id)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            reserved = db.get(Product, product_id).reserved_quantity
+        lifetime = (fake.sessions[0]["expires_at"] - time.time()) / 60 if fake.sessions else 0
+        check(error is None and reserved == 1,
+              f"checkout session: {error or f'accepted, expires in {lifetime:.1f} min'}, reserved={reserved}")
+
+        fake.fail = True
+        with Session(bind) as db:
+            try:
+                stripe_checkout.create_checkout_session(Response(), db, None, guest_session_id)
+                raised = False
+            except RuntimeError:
+                raised = True
+            reserved = db.get(Product, product_id).reserved_quantity
+        check(raised and reserved == 1, f"checkout session: Stripe failure gives the hold back, reserved={reserved}")
+    finally:
+        with Session(bind) as db:
+            db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+            db.execute(delete(Cart).where(Cart.id == cart_id))
+            db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DB_URL"))
+    parser.add_argument("--checkouts", type=int, default=300)
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--stock", type=int, nargs="+", default=[1, 25])
+    args = parser.parse_args()
+
+    bind = create_engine(args.url, pool_size=args.connections, max_overflow=0, pool_timeout=120)
+    failed = 0
+
+    def check(ok: bool, label: str) -> None:
+        nonlocal failed
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+
+    for stock in args.stock:
+        product_id = uuid4()
+        with Session(bind) as db:
+            db.add(Product(id=product_id, name=f"bench-stock-{product_id}", description="stock check", price=100,
+                           stock_quantity=stock, category=Category.rings, sub_category=SubCategory.one_of_a_kind))
+            db.commit()
+        try:
+            t0 = time.perf_counter()
+            results = stampede(bind, product_id, args.checkouts)
+            elapsed = time.perf_counter() - t0
+            wins = sum(won for won, _ in results)
+            latencies = sorted(ms for _, ms in results)
+            with Session(bind) as db:
+                product = db.get(Product, product_id)
+                holds = len(db.scalars(select(StockReservation.id).where(StockReservation.product_id == product_id)).all())
+                check(wins == stock and product.reserved_quantity == stock and holds == stock,
+                      f"stock={stock}: {args.checkouts} checkouts in {elapsed:.2f} s, {wins} won, "
+                      f"reserved={product.reserved_quantity}, holds={holds}, "
+                      f"p50={statistics.median(latencies):.1f} ms p99={latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+
+                # holds past expiry + grace go back to stock
+                db.execute(update(StockReservation).where(StockReservation.product_id == product_id)
+                           .values(expires_at=StockReservation.expires_at - timedelta(hours=1)))
+                db.commit()
+                released = release_expired(db, batch=1000)
+                db.refresh(product)
+                check(released == stock and product.reserved_quantity == 0,
+                      f"stock={stock}: sweeper released {released} expired holds, reserved={product.reserved_quantity}")
+
+                # a completed checkout converts its hold once
+                reservation_id, _ = reserve_stock(db, [(product_id, 1)])
+                first = convert_reservation(db, reservation_id, uuid4(), new_order=False)
+                again = convert_reservation(db, reservation_id, uuid4(), new_order=False)
+                db.refresh(product)
+                check(first == 1 and again == 0 and product.stock_quantity == stock - 1 and product.reserved_quantity == 0,
+                      f"stock={stock}: converted {first} then {again}, stock={product.stock_quantity}, "
+                      f"reserved={product.reserved_quantity}")
+
+                # the admin panel cannot set stock below the held units
+                if stock > 1:
+                    reservation_id, _ = reserve_stock(db, [(product_id, 1)])
+                    try:
+                        asyncio.run(update_product(product_id, None, None, None, "append",
+                                                   ProductUpdateRequest.model_construct(stock_quantity=0), db, None))
+                        status = 200
+                    except HTTPException as e:
+                        status = e.status_code
+                    db.rollback()
+                    release_reservation(db, reservation_id)
+                    db.refresh(product)
+                    check(status == 409 and product.stock_quantity == stock - 1,
+                          f"stock={stock}: admin update to 0 with 1 held gave {status}, stock={product.stock_quantity}")
+
+            if stock > 1:
+                check_checkout_session(bind, product_id, check)
+        finally:
+            with Session(bind) as db:
+                db.execute(delete(Product).where(Product.id == product_id))
+                db.commit()
+
+    bind.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
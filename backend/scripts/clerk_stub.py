@@ -0,0 +1,163 @@
+# backend/scripts/clerk_stub.py
+"""
+Minimal local stand-in for the parts of Clerk's Backend API this app uses.
+Serves a JWKS built from a throwaway RSA key and answers session and user
+lookups, with an optional artificial latency to mimic the real round trip
+and a `fail_next` counter to inject 503s.
+
+    python -m scripts.clerk_stub --port 8765 --latency-ms 150
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+USER_ID = "user_stub"
+
+
+def _b64(n: int) -> str:
+    raw = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubKey:
+    def __init__(self):
+        self.kid = f"ins_{uuid.uuid4().hex[:12]}"
+        self._private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = self._private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+
+    @property
+    def jwk(self) -> dict:
+        pub = self._private.public_key().public_numbers()
+        return {"kid": self.kid, "kty": "RSA", "alg": "RS256", "use": "sig", "n": _b64(pub.n), "e": _b64(pub.e)}
+
+    def sign(self, lifetime: int = 60, **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "sub": USER_ID,
+            "sid": f"sess_{uuid.uuid4().hex[:12]}",
+            "iat": now,
+            "nbf": now - 5,
+            "exp": now + lifetime,
+            **claims,
+        }
+        return jwt.encode(payload, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class ClerkStub:
+    def __init__(self, port: int = 0, latency_ms: float = 0.0):
+        self.keys = [StubKey()]
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self.fail_next = 0
+        self.users = {USER_ID: {"id": USER_ID, "first_name": "Stub", "last_name": "User", "email_addresses": []}}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _begin(self) -> bool:
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub.fail_next > 0:
+                    stub.fail_next -= 1
+                    self._send(503, {"errors": [{"code": "service_unavailable"}]})
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self._begin():
+                    return
+                url = urlparse(self.path)
+                if url.path == "/v1/jwks":
+                    return self._send(200, {"keys": [k.jwk for k in stub.keys]})
+                if url.path == "/v1/sessions/verify":
+                    token = (parse_qs(url.query).get("session_token") or [""])[0]
+                    if not token.startswith("sess_tok_"):
+                        return self._send(401, {"errors": [{"code": "session_invalid"}]})
+                    return self._send(200, stub.session(token))
+                if url.path.startswith("/v1/sessions/"):
+                    return self._send(200, stub.session(url.path.rsplit("/", 1)[-1]))
+                if url.path.startswith("/v1/users/"):
+                    user = stub.users.get(url.path.rsplit("/", 1)[-1])
+                    if user:
+                        return self._send(200, user)
+                return self._send(404, {"errors": [{"code": "resource_not_found"}]})
+
+            def do_PATCH(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self._begin():
+                    return
+                user = stub.users.get(urlparse(self.path).path.rsplit("/", 1)[-1])
+                if not user:
+                    return self._send(404, {"errors": [{"code": "resource_not_found"}]})
+                user.update(json.loads(body or b"{}"))
+                return self._send(200, user)
+
+        self.server = _Server(("127.0.0.1", port), Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def session(self, session_id: str) -> dict:
+        return {
+            "id": session_id,
+            "user_id": USER_ID,
+            "status": "active",
+            "expire_at": int((time.time() + 3600) * 1000),
+        }
+
+    def rotate(self) -> StubKey:
+        self.keys.insert(0, StubKey())
+        return self.keys[0]
+
+    def start(self) -> "ClerkStub":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = ClerkStub(args.port, args.latency_ms)
+    print(f"Clerk stub listening on {stub.url}")
+    print(f"Sample session JWT: {stub.keys[0].sign(lifetime=3600)}")
+    stub.server.serve_forever()
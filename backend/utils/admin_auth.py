@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from passlib.context import CryptContext
 
 from utils.database import get_db
+from utils.admin_cache import AdminPrincipal, AdminPrincipalCache
 from db.models.admin import Admin
 
 GREECE_TZ = ZoneInfo("Europe/Athens")
@@ -19,6 +20,9 @@ load_dotenv(override=True)
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "30"))
+
+admin_principals = AdminPrincipalCache(ttl=ADMIN_CACHE_TTL)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -37,9 +41,9 @@ def create_access_token(
     payload = {
         "sub": str(admin.id),
         "username": admin.username,
+        "ver": admin.token_version or 0,
         "exp": expire
     }
-    print("Final token payload: ", payload)
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 def get_token_from_header_or_cookie(
@@ -54,10 +58,18 @@ def get_token_from_header_or_cookie(
         return token
     raise HTTPException(status_code=401, detail="Δεν βρήθεκε token.")
 
+def _principal(admin: Admin) -> AdminPrincipal:
+    return AdminPrincipal(
+        id=admin.id,
+        username=admin.username,
+        email=admin.email,
+        token_version=admin.token_version or 0,
+    )
+
 def get_current_admin(
     token: str = Depends(get_token_from_header_or_cookie),
     db: Session = Depends(get_db)
-) -> Admin:
+) -> AdminPrincipal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         admin_id = payload.get("sub")
@@ -65,12 +77,43 @@ def get_current_admin(
             raise HTTPException(status_code=401, detail="Δεν επιτρέπεται η πρόσβαση.")
     
         admin_uuid = uuid.UUID(admin_id)
+        token_version = int(payload.get("ver", 0))
 
-    except JWTError:
+    except (JWTError, ValueError):
         raise HTTPException(status_code=401, detail="Μη έγκυρο token.")
 
+    principal = admin_principals.get(admin_uuid)
+    if principal is not None and token_version <= principal.token_version:
+        if token_version < principal.token_version:
+            admin_principals.revoked += 1
+            raise HTTPException(status_code=401, detail="Μη έγκυρο token.")
+        admin_principals.hits += 1
+        return principal
+
+    # Unknown admin, expired entry, or a token newer than what we cached.
+    admin_principals.db_lookups += 1
     admin = db.query(Admin).filter(Admin.id == admin_uuid).first()
     if not admin:
+        admin_principals.invalidate(admin_uuid)
         raise HTTPException(status_code=401, detail="Ο διαχειριστής δεν βρέθηκε.")
 
-    return admin
+    principal = _principal(admin)
+    admin_principals.put(principal)
+
+    if token_version != principal.token_version:
+        admin_principals.revoked += 1
+        raise HTTPException(status_code=401, detail="Μη έγκυρο token.")
+
+    return principal
+
+def revoke_admin_tokens(db: Session, admin_id: uuid.UUID) -> None:
+    """
+    Invalidate every token issued to this admin. Takes effect immediately in
+    this worker and within ADMIN_CACHE_TTL seconds everywhere else.
+    """
+    db.query(Admin).filter(Admin.id == admin_id).update(
+        {Admin.token_version: Admin.token_version + 1},
+        synchronize_session=False,
+    )
+    db.commit()
+    admin_principals.invalidate(admin_id)
@@ -0,0 +1,60 @@
+# utils/admin_cache.py
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    id: uuid.UUID
+    username: str
+    email: str
+    token_version: int
+
+
+class AdminPrincipalCache:
+    """
+    Resolved admins keyed by id. Entries are trusted for `ttl` seconds, which
+    bounds how long a token revoked from another worker keeps working here.
+    """
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[uuid.UUID, Tuple[float, AdminPrincipal]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.db_lookups = 0
+        self.revoked = 0
+
+    def get(self, admin_id: uuid.UUID) -> Optional[AdminPrincipal]:
+        entry = self._entries.get(admin_id)
+        if entry is None:
+            return None
+        cached_at, principal = entry
+        if time.monotonic() - cached_at >= self.ttl:
+            with self._lock:
+                self._entries.pop(admin_id, None)
+            return None
+        return principal
+
+    def put(self, principal: AdminPrincipal) -> None:
+        with self._lock:
+            if len(self._entries) >= self.maxsize and principal.id not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[principal.id] = (time.monotonic(), principal)
+
+    def invalidate(self, admin_id: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(admin_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "db_lookups": self.db_lookups,
+            "revoked": self.revoked,
+        }
@@ -1,12 +1,9 @@
-from PIL import Image, ImageOps
 import os
 import uuid
+import threading
 import mimetypes
 from io import BytesIO
 from typing import Tuple, Optional
-import boto3
-from botocore.config import Config
-from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -17,17 +14,30 @@ B2_BUCKET_NAME = os.getenv("B2_BUCKET_NAME")
 B2_ENDPOINT = os.getenv("B2_ENDPOINT")
 B2_DOWNLOAD_URL = os.getenv("B2_DOWNLOAD_URL")
 
-if not all([B2_KEY_ID, B2_APPLICATION_KEY, B2_BUCKET_NAME, B2_ENDPOINT]):
-    raise RuntimeError("Missing B2_* environment variables")
+_s3 = None
+_s3_lock = threading.Lock()
 
-s3 = boto3.client(
-    "s3",
-    endpoint_url = B2_ENDPOINT,
-    aws_access_key_id = B2_KEY_ID,
-    aws_secret_access_key = B2_APPLICATION_KEY,
-    region_name = "eu-central-003",
-    config = Config(signature_version="s3v4", s3={"addressing_style": "path"}),
-)
+def get_s3():
+    # boto3 is slow to import and only the admin upload routes need it
+    global _s3
+    if _s3 is None:
+        with _s3_lock:
+            if _s3 is None:
+                if not all([B2_KEY_ID, B2_APPLICATION_KEY, B2_BUCKET_NAME, B2_ENDPOINT]):
+                    raise RuntimeError("Missing B2_* environment variables")
+
+                import boto3
+                from botocore.config import Config
+
+                _s3 = boto3.client(
+                    "s3",
+                    endpoint_url = B2_ENDPOINT,
+                    aws_access_key_id = B2_KEY_ID,
+                    aws_secret_access_key = B2_APPLICATION_KEY,
+                    region_name = "eu-central-003",
+                    config = Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+                )
+    return _s3
 
 def _public_url(key: str) -> str:
     # S3-style public URL for B2 S3-compatible endpoint
@@ -42,6 +52,9 @@ def upload_image_bytes(
     """
     Upload raw image bytes to B2. Returns {'url': ..., 'key': ...}
     """
+    s3 = get_s3()
+    from botocore.exceptions import ClientError
+
     ct = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
     key = f"{folder}/{uuid.uuid4()}-{filename}"
 
@@ -68,6 +81,8 @@ def create_and_upload_thumbnail(
     Create a thumbnail (max width/height = size) and upload it.
     Returns {'url': ..., 'key': ...}
     """
+    from PIL import Image, ImageOps
+
     # Open image from bytes
     with Image.open(BytesIO(image_bytes)) as img:
         img = ImageOps.exif_transpose(img).convert("RGB")
@@ -0,0 +1,61 @@
+# utils/background.py
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy.engine import Engine
+
+
+class BackgroundWorker:
+    """
+    A daemon thread started and stopped with the app (see main.lifespan),
+    calling `run_once` every `interval` seconds. Every worker process runs
+    its own. A failed run is kept in `last_error`, shown in /admin/metrics,
+    and the next run goes ahead as scheduled.
+
+    Subclasses supply `thread_name` and `run_once` (or a `_run` of their
+    own), and extend `stats`.
+    """
+
+    thread_name = "background"
+    # run as soon as started, rather than one interval later
+    run_at_start = False
+
+    def __init__(self, bind: Engine, interval: float, enabled: bool = True):
+        self.bind = bind
+        self.interval = interval
+        self.enabled = enabled
+        self.last_error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def supported(self) -> bool:
+        return self.bind.dialect.name == "postgresql"
+
+    def start(self) -> None:
+        if self._thread is not None or not self.enabled or not self.supported:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> Any:
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        if self.run_at_start and not self._stop.is_set():
+            self._run_guarded()
+        while not self._stop.wait(self.interval):
+            self._run_guarded()
+
+    def _run_guarded(self) -> None:
+        try:
+            self.run_once()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self._thread is not None, "last_error": self.last_error}
@@ -0,0 +1,372 @@
+# utils/catalog_cache.py
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db.database import DB_REPLICA_STICKY_SECONDS, engine, replicas
+from utils.background import BackgroundWorker
+
+try:
+    import brotli
+except ImportError:  # optional; catalog responses are then gzip-only
+    brotli = None
+
+load_dotenv(override=True)
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+# Safety net for edits made outside the app (psql, migrations).
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "600"))
+CATALOG_LISTEN = os.getenv("CATALOG_LISTEN", "true").lower() in ("1", "true", "yes")
+# LISTEN needs a session-level connection; set this to the direct Postgres
+# URL when DB_URL points at PgBouncer in transaction mode.
+CATALOG_LISTEN_URL = os.getenv("CATALOG_LISTEN_URL")
+
+# Browsers and CDNs may reuse a catalog response for CATALOG_MAX_AGE seconds
+# and keep serving it for CATALOG_STALE_WHILE_REVALIDATE more while they
+# revalidate in the background with If-None-Match.
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+CATALOG_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_STALE_WHILE_REVALIDATE", "600"))
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, stale-while-revalidate={CATALOG_STALE_WHILE_REVALIDATE}"
+
+CHANNEL = "catalog_changed"
+# Identifies this worker's own notifications so it does not clear twice.
+ORIGIN = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Bodies below this are sent uncompressed, same as GZipMiddleware in main.py.
+CATALOG_COMPRESS_MIN = 1000
+
+
+def _render(data: Any) -> bytes:
+    # byte-for-byte what JSONResponse would send
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best of br/gzip the client accepts (q > 0), or None for identity."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+
+    def ok(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and ok("br"):
+        return "br"
+    if ok("gzip"):
+        return "gzip"
+    return None
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """
+    A catalog response rendered once: the JSON body, its strong ETag (hash
+    of the body) and compressed variants, made on first request for each
+    encoding. Compressed variants get their own ETag (`"<hash>-gzip"`).
+    """
+    data: Any
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    _encoded: Dict[str, bytes] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def build(cls, data: Any, headers: Optional[Dict[str, str]] = None) -> "CatalogEntry":
+        body = _render(data)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return cls(data=data, body=body, etag=etag, headers=headers or {})
+
+    def variant(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes, str]:
+        """(content-encoding or None, body, etag) for this Accept-Encoding."""
+        encoding = choose_encoding(accept_encoding) if len(self.body) >= CATALOG_COMPRESS_MIN else None
+        if encoding is None:
+            return None, self.body, self.etag
+
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.body, quality=9)
+            else:
+                body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self._encoded[encoding] = body
+        return encoding, body, f'{self.etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison, as RFC 9110 requires for If-None-Match. Tags of the
+    compressed variants match too: they name the same content.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ('-gzip"', '-br"'):
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+
+class CatalogCache:
+    """
+    LRU of encoded catalog responses (product pages, single products).
+
+    Every invalidation bumps `generation` and drops all entries. A load that
+    started before an invalidation is not stored, so a slow reader cannot put
+    pre-write data back. When reads go to replicas, entries filled within
+    `settle` seconds of an invalidation expire at the end of that window, in
+    case the replica had not replayed the write yet.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0, settle: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.settle = settle
+        self.generation = 0
+        self.invalidated_at = 0.0
+
+        # key -> (expires_at monotonic, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values for whichever of `keys` are present; counted like get_or_load."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        if self.settle and now - self.invalidated_at < self.settle:
+            expires_at = min(expires_at, self.invalidated_at + self.settle)
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for `key`, or the result of `loader()`. Concurrent
+        misses for the same key wait for one load. None is returned but
+        not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        generation = self.generation
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                self.put(key, value, generation)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, remote: bool = False) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidated_at = time.monotonic()
+            self._entries.clear()
+            self.invalidations += 1
+            if remote:
+                self.remote_invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+class CatalogListener(BackgroundWorker):
+    """
+    Holds a LISTEN on `catalog_changed` (psycopg2 only). Notifications from
+    other workers invalidate `cache`. After a dropped connection it
+    reconnects and invalidates, since notifications sent in the meantime
+    are lost.
+    """
+
+    thread_name = "catalog-listen"
+
+    def __init__(self, bind: Engine, cache: CatalogCache, enabled: bool = True, keepalive: float = 30.0):
+        # listens for good in _run rather than running every interval
+        super().__init__(bind, keepalive, enabled)
+        self.cache = cache
+        self.keepalive = keepalive
+        self.connected = False
+        self.reconnects = 0
+
+    @property
+    def supported(self) -> bool:
+        return super().supported and self.bind.dialect.driver == "psycopg2"
+
+    def _connect(self):
+        fairy = self.bind.raw_connection()
+        conn = fairy.driver_connection
+        fairy.detach()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _listen(self, conn) -> None:
+        last_io = time.monotonic()
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 1.0) == ([], [], []):
+                if time.monotonic() - last_io >= self.keepalive:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    last_io = time.monotonic()
+                continue
+            conn.poll()
+            last_io = time.monotonic()
+            remote = [n for n in conn.notifies if n.payload != ORIGIN]
+            conn.notifies.clear()
+            if remote:
+                self.cache.invalidate(remote=True)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self.connected = True
+                self.last_error = None
+                backoff = 1.0
+                if not first:
+                    self.reconnects += 1
+                    self.cache.invalidate(remote=True)
+                first = False
+                self._listen(conn)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "connected": self.connected, "reconnects": self.reconnects}
+
+
+def mark_catalog_changed(db: Session) -> None:
+    """
+    Call inside an admin write transaction. Other workers are notified when
+    the transaction commits (NOTIFY is transactional); this worker drops its
+    cache in the session's after_commit hook.
+    """
+    db.info["catalog_changed"] = True
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :origin)"), {"channel": CHANNEL, "origin": ORIGIN})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("catalog_changed", False):
+        catalog_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop("catalog_changed", None)
+
+
+catalog_cache = CatalogCache(
+    maxsize=CATALOG_CACHE_SIZE,
+    ttl=CATALOG_CACHE_TTL,
+    settle=DB_REPLICA_STICKY_SECONDS if replicas else 0.0,
+)
+
+catalog_listener = CatalogListener(
+    create_engine(CATALOG_LISTEN_URL) if CATALOG_LISTEN_URL else engine,
+    catalog_cache,
+    enabled=CATALOG_LISTEN,
+)
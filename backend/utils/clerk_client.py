@@ -0,0 +1,253 @@
+# utils/clerk_client.py
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_HTTP_TIMEOUT = float(os.getenv("CLERK_HTTP_TIMEOUT", "5"))
+CLERK_MAX_CONNECTIONS = int(os.getenv("CLERK_MAX_CONNECTIONS", "20"))
+CLERK_MAX_CONCURRENCY = int(os.getenv("CLERK_MAX_CONCURRENCY", "20"))
+CLERK_RETRIES = int(os.getenv("CLERK_RETRIES", "2"))
+CLERK_BREAKER_THRESHOLD = int(os.getenv("CLERK_BREAKER_THRESHOLD", "5"))
+CLERK_BREAKER_RESET = float(os.getenv("CLERK_BREAKER_RESET", "30"))
+
+
+class ClerkUnavailable(Exception):
+    """Clerk could not be reached, kept failing, or the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `reset_timeout` seconds; then lets a single trial call through.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+def _retryable(res: httpx.Response) -> bool:
+    return res.status_code >= 500 or res.status_code == 429
+
+
+class ClerkClient:
+    """
+    Shared client for Clerk's Backend API with keep-alive connection pooling,
+    bounded concurrency, jittered retries on 5xx/timeouts and a circuit
+    breaker. Offers both a blocking and an asyncio interface.
+    """
+
+    def __init__(
+        self,
+        secret_key: Optional[str],
+        timeout: float = 5.0,
+        max_connections: int = 20,
+        max_concurrency: int = 20,
+        retries: int = 2,
+        backoff: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._headers = {"Authorization": f"Bearer {secret_key}"} if secret_key else {}
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60,
+        )
+
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aloop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._aslots: Optional[asyncio.Semaphore] = None
+        self._init_lock = threading.Lock()
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:
+                    self._client = httpx.Client(headers=self._headers, limits=self._limits, timeout=self.timeout)
+        return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # Async connections are tied to the loop that opened them.
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aloop is not loop:
+            with self._init_lock:
+                if self._aclient is None or self._aloop is not loop:
+                    self._retire(self._aclient, self._aloop)
+                    self._aclient = httpx.AsyncClient(headers=self._headers, limits=self._limits, timeout=self.timeout)
+                    self._aslots = asyncio.Semaphore(self.max_concurrency)
+                    self._aloop = loop
+        return self._aclient
+
+    @staticmethod
+    def _retire(client: Optional[httpx.AsyncClient], loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        Close a client replaced after the loop changed (reload, tests, a
+        second lifespan), on its own loop, so its pooled connections are not
+        left open. A loop no longer running cannot close them from here; the
+        lifespan shutdown closes the client of its own loop (see aclose).
+        """
+        if client is not None and loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, backoff * 2^attempt].
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ClerkUnavailable("too many concurrent Clerk requests")
+        try:
+            if not self.breaker.allow():
+                raise ClerkUnavailable("circuit open")
+
+            client = self._sync_client()
+            try:
+                for attempt in range(self.retries + 1):
+                    try:
+                        res = client.request(method, url, **kwargs)
+                    except httpx.TransportError:
+                        res = None
+                    if res is not None and not _retryable(res):
+                        self.breaker.record_success()
+                        return res
+                    if attempt < self.retries:
+                        time.sleep(self._delay(attempt))
+            except BaseException:
+                # cancelled or failed otherwise: a half-open trial must still
+                # settle, or the breaker would stay open for good
+                self.breaker.record_failure()
+                raise
+
+            self.breaker.record_failure()
+            raise ClerkUnavailable(f"{method} {url} failed after {self.retries + 1} attempts")
+        finally:
+            self._slots.release()
+
+    async def arequest(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        client = self._async_client()
+        try:
+            await asyncio.wait_for(self._aslots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise ClerkUnavailable("too many concurrent Clerk requests")
+        try:
+            if not self.breaker.allow():
+                raise ClerkUnavailable("circuit open")
+
+            try:
+                for attempt in range(self.retries + 1):
+                    try:
+                        res = await client.request(method, url, **kwargs)
+                    except httpx.TransportError:
+                        res = None
+                    if res is not None and not _retryable(res):
+                        self.breaker.record_success()
+                        return res
+                    if attempt < self.retries:
+                        await asyncio.sleep(self._delay(attempt))
+            except BaseException:
+                # cancelled or failed otherwise: a half-open trial must still
+                # settle, or the breaker would stay open for good
+                self.breaker.record_failure()
+                raise
+
+            self.breaker.record_failure()
+            raise ClerkUnavailable(f"{method} {url} failed after {self.retries + 1} attempts")
+        finally:
+            self._aslots.release()
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apatch(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.arequest("PATCH", url, **kwargs)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        client, loop = self._aclient, self._aloop
+        self._aclient = self._aloop = None
+        if loop is asyncio.get_running_loop():
+            await client.aclose()
+        else:
+            self._retire(client, loop)
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.state}
+
+
+_clerk: Optional[ClerkClient] = None
+_clerk_lock = threading.Lock()
+
+
+def get_clerk_client() -> ClerkClient:
+    global _clerk
+    if _clerk is None:
+        with _clerk_lock:
+            if _clerk is None:
+                _clerk = ClerkClient(
+                    CLERK_SECRET_KEY,
+                    timeout=CLERK_HTTP_TIMEOUT,
+                    max_connections=CLERK_MAX_CONNECTIONS,
+                    max_concurrency=CLERK_MAX_CONCURRENCY,
+                    retries=CLERK_RETRIES,
+                    breaker=CircuitBreaker(CLERK_BREAKER_THRESHOLD, CLERK_BREAKER_RESET),
+                )
+    return _clerk
@@ -0,0 +1,116 @@
+# utils/clerk_jwks.py
+import threading
+import time
+from typing import Any, Dict
+
+import httpx
+from jose import jwk
+from jose.exceptions import JWKError
+
+from utils.clerk_client import ClerkClient, ClerkUnavailable
+
+
+class JWKSUnavailable(Exception):
+    """The key set has never been loaded and the JWKS endpoint is unreachable."""
+
+
+class JWKSCache:
+    """
+    In-process cache of Clerk's JSON Web Key Set, indexed by `kid`.
+
+    A stale key set keeps serving while it is refreshed on a background
+    thread. An unknown `kid` (key rotation) triggers one synchronous,
+    rate-limited refetch before the token is rejected.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client: ClerkClient,
+        ttl: int = 3600,
+        min_refresh_interval: int = 30,
+    ):
+        self.url = url
+        self.client = client
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch(self) -> Dict[str, Any]:
+        res = self.client.get(self.url)
+        res.raise_for_status()
+
+        keys: Dict[str, Any] = {}
+        for data in res.json().get("keys") or []:
+            kid = data.get("kid")
+            if not kid or data.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = jwk.construct(data, algorithm=data.get("alg") or "RS256")
+            except JWKError:
+                continue
+
+        if not keys:
+            raise ValueError("JWKS response contains no usable signing keys")
+        return keys
+
+    def _load(self) -> bool:
+        self._last_attempt = time.monotonic()
+        try:
+            keys = self._fetch()
+        except (ClerkUnavailable, httpx.HTTPError, ValueError):
+            return False
+
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+        return True
+
+    def refresh(self) -> bool:
+        with self._refresh_lock:
+            return self._load()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="clerk-jwks-refresh", daemon=True).start()
+
+    def get_key(self, kid: str):
+        """
+        Return the verification key for `kid`, or None if the key set does not
+        contain it even after a refetch. Raises JWKSUnavailable if no key set
+        could ever be loaded.
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            if time.monotonic() - self._fetched_at > self.ttl:
+                self._refresh_in_background()
+            return key
+
+        with self._refresh_lock:
+            # Another thread may have refetched while we were waiting.
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if not self._last_attempt or time.monotonic() - self._last_attempt >= self.min_refresh_interval:
+                self._load()
+
+        if not self._keys:
+            raise JWKSUnavailable(self.url)
+        return self._keys.get(kid)
@@ -1,8 +1,11 @@
 from uuid import UUID
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import exc
 from sqlalchemy.orm import Session
 
-from db.database import SessionLocal
+from db.database import SessionLocal, AsyncSessionLocal, replicas, DB_REPLICA_STICKY_SECONDS
+
+PRIMARY_COOKIE = "db_primary"
 
 def get_db():
     db = SessionLocal()
@@ -10,3 +13,52 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _pick_replica(request: Request):
+    if request.cookies.get(PRIMARY_COOKIE):
+        return None
+    return replicas.pick()
+
+def get_read_db(request: Request):
+    db = SessionLocal()
+    replica = _pick_replica(request)
+    if replica:
+        db.info["read_bind"] = replica.engine
+    try:
+        yield db
+    except (OSError, exc.OperationalError) as e:
+        # the request is lost, but the next one already goes elsewhere
+        if replica:
+            replica.mark_down(str(e))
+        raise
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        replica = _pick_replica(request)
+        if replica:
+            db.info["read_bind"] = replica.async_engine.sync_engine
+        try:
+            yield db
+        except (OSError, exc.OperationalError) as e:
+            if replica:
+                replica.mark_down(str(e))
+            raise
+
+async def stick_to_primary_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if replicas and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            key=PRIMARY_COOKIE,
+            value="1",
+            httponly=True,
+            samesite="none",
+            max_age=DB_REPLICA_STICKY_SECONDS,
+            secure=True,
+        )
+    return response
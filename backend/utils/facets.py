@@ -0,0 +1,130 @@
+# utils/facets.py
+import bisect
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from db.models.product import Category, Product, SubCategory
+from db.money import Money
+from utils.catalog_cache import CATALOG_CACHE_TTL
+from utils.product_projection import ProductProjection
+
+load_dotenv(override=True)
+
+# Upper bounds (inclusive) of the price ranges; the last range is open ended.
+FACET_PRICE_EDGES = [float(e) for e in os.getenv("FACET_PRICE_EDGES", "20,50,100,200").split(",") if e.strip()]
+
+# (category, sub_category, price range index)
+Cell = Tuple[Optional[Category], Optional[SubCategory], int]
+
+
+def _price_label(edge: float) -> str:
+    return f"{edge:g}"
+
+
+PRICE_RANGES: List[Tuple[str, float, Optional[float]]] = [
+    (f"{_price_label(low)}-{_price_label(high)}" if high is not None else f"{_price_label(low)}+", low, high)
+    for low, high in zip([0.0] + FACET_PRICE_EDGES, FACET_PRICE_EDGES + [None])
+]
+PRICE_RANGE_LABELS = [label for label, _, _ in PRICE_RANGES]
+_EDGE_CENTS = [Money.from_eur(edge) for edge in FACET_PRICE_EDGES]
+
+
+def price_range_index(price_cents: Optional[int]) -> int:
+    # ranges are (low, high], like max_price in the listings (<=): a €20.00
+    # product counts under "0-20", as max_price=20 lists it
+    return bisect.bisect_left(_EDGE_CENTS, price_cents or 0)
+
+
+def _cell(product: Any) -> Cell:
+    return product.category, product.sub_category, price_range_index(product.price_cents)
+
+
+class FacetCounts(ProductProjection):
+    """
+    Product counts per (category, sub_category, price range) cell, from
+    which every facet of /products/facets is summed; there are only a few
+    dozen cells, so a request never touches the products table. Kept up to
+    date as a ProductProjection: a write moves its product between cells.
+    """
+
+    source = select(Product.id, Product.category, Product.sub_category, Product.price_cents)
+    fields = ("category", "sub_category", "price_cents")
+
+    def __init__(self, ttl: float = 600.0):
+        super().__init__(ttl)
+        self._cells: Counter = Counter()
+        self._products: Dict[UUID, Cell] = {}
+
+    def _build(self, products: Iterable[Any]) -> Dict[UUID, Cell]:
+        return {product.id: _cell(product) for product in products}
+
+    def _install(self, cells: Dict[UUID, Cell]) -> None:
+        self._products = cells
+        self._cells = Counter(cells.values())
+
+    def _apply(self, product_id: UUID, product: Optional[Any]) -> None:
+        old = self._products.pop(product_id, None)
+        if old is not None:
+            self._cells[old] -= 1
+            if not self._cells[old]:
+                del self._cells[old]
+        if product is not None:
+            cell = self._products[product_id] = _cell(product)
+            self._cells[cell] += 1
+
+    def facets(
+        self,
+        category: Optional[Category] = None,
+        sub_category: Optional[SubCategory] = None,
+        price_range: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Counts for the filter UI. Each group is counted with the filters of
+        the other groups applied but not its own, so the alternatives to a
+        selected value keep their counts; `total` applies every filter.
+        """
+        with self._lock:
+            cells = list(self._cells.items())
+
+        total = 0
+        categories = {c.value: 0 for c in Category}
+        subcategories = {s.value: 0 for s in SubCategory}
+        pairs: Dict[str, Dict[str, int]] = {}
+        prices = [0] * len(PRICE_RANGES)
+        for (cat, sub, bucket), count in cells:
+            in_cat = category is None or cat == category
+            in_sub = sub_category is None or sub == sub_category
+            in_price = price_range is None or bucket == price_range
+            if in_cat and in_sub and in_price:
+                total += count
+            if cat is not None and in_sub and in_price:
+                categories[cat.value] += count
+            if sub is not None and in_cat and in_price:
+                subcategories[sub.value] += count
+            if cat is not None and sub is not None and in_price:
+                row = pairs.setdefault(cat.value, {})
+                row[sub.value] = row.get(sub.value, 0) + count
+            if in_cat and in_sub:
+                prices[bucket] += count
+
+        return {
+            "total": total,
+            "categories": categories,
+            "subcategories": subcategories,
+            "category_subcategories": pairs,
+            "price_ranges": [
+                {"label": label, "min_price": low, "max_price": high, "count": prices[i]}
+                for i, (label, low, high) in enumerate(PRICE_RANGES)
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"products": len(self._products), "cells": len(self._cells), **super().stats()}
+
+
+facet_counts = FacetCounts(ttl=CATALOG_CACHE_TTL)
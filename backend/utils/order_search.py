@@ -0,0 +1,42 @@
+# utils/order_search.py
+import re
+from uuid import UUID
+
+from sqlalchemy import String, cast, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from db.models.order import Order
+
+# Stripe object ids: cs_test_a1B2..., cs_live_..., pi_3Nx...
+CHECKOUT_SESSION_ID = re.compile(r"cs_(?:test_|live_)?[A-Za-z0-9]{16,}")
+PAYMENT_INTENT_ID = re.compile(r"pi_[A-Za-z0-9]{16,}")
+
+
+def order_search_condition(q: str) -> ColumnElement:
+    """
+    Filter for the admin order search box. A full order id, checkout session
+    id or payment intent id is looked up exactly through its btree index;
+    anything else is a substring match on the id, email, user id and both
+    Stripe ids, which the trigram GIN indexes serve.
+    """
+    q = q.strip()
+    try:
+        return Order.id == UUID(q)
+    except ValueError:
+        pass
+    if CHECKOUT_SESSION_ID.fullmatch(q):
+        return Order.stripe_checkout_session_id == q
+    if PAYMENT_INTENT_ID.fullmatch(q):
+        return Order.stripe_payment_intent_id == q
+
+    # % and _ are matched literally, not as wildcards
+    return or_(*(
+        column.icontains(q, autoescape=True)
+        for column in (
+            cast(Order.id, String),
+            Order.email,
+            Order.user_id,
+            Order.stripe_checkout_session_id,
+            Order.stripe_payment_intent_id,
+        )
+    ))
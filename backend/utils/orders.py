@@ -1,19 +1,12 @@
 # utils/orders.py
 from typing import Optional, Tuple, Mapping, Any
-from decimal import Decimal, ROUND_HALF_UP
 from sqlalchemy.orm import Session
 
 from db.models.order import Order, OrderStatus, PaymentStatus
 from db.models.order_item import OrderItem
 from db.models.cart import Cart
-from db.models.cart_item import CartItem
-from db.models.product import Product
-
-Money = Decimal
-
-def _as_money(x: Any) -> Money:
-    d = x if isinstance(x, Decimal) else Decimal(str(x))
-    return d.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+from db.money import Money
+from utils.pricing import price_cart
 
 def _get_email_from_session(sess: Mapping[str, Any]) -> Optional[str]:
     cd = sess.get("customer_details") or {}
@@ -131,11 +124,11 @@ def create_order_from_checkout_session(
             guest_session_id=guest_session_id,
             email=_get_email_from_session(checkout_session),
             currency=(checkout_session.get("currency") or "eur"),
-            subtotal_amount=_as_money(0),
-            discount_amount=_as_money(0),
-            shipping_amount=_as_money((checkout_session.get("shipping_cost") or {}).get("amount_total", 0) / 100),
-            tax_amount=_as_money(0),
-            total_amount=_as_money((checkout_session.get("amount_total") or 0) / 100),
+            subtotal_cents=Money(0),
+            discount_cents=Money(0),
+            shipping_cents=Money((checkout_session.get("shipping_cost") or {}).get("amount_total") or 0),
+            tax_cents=Money(0),
+            total_cents=Money(checkout_session.get("amount_total") or 0),
             status=status,
             payment_status=PaymentStatus.succeeded if checkout_session.get("payment_status") == "paid" else PaymentStatus.pending,
             stripe_payment_intent_id=_pi_id(checkout_session),
@@ -175,36 +168,27 @@ def create_order_from_checkout_session(
         return order, True
 
     # Cart exists → authoritative repricing from DB
-    rows = (
-        db.query(CartItem, Product)
-          .join(Product, CartItem.product_id == Product.id)
-          .filter(CartItem.cart_id == cart.id)
-          .all()
-    )
-
-    subtotal: Money = _as_money(0)
-    items: list[OrderItem] = []
-
-    for ci, p in rows:
-        qty = getattr(ci, "quantity", 1) or 1
-        unit = _as_money(p.price or 0)
-        line = _as_money(unit * qty)
-        subtotal = _as_money(subtotal + line)
-        items.append(OrderItem(
-            product_id=p.id,
-            product_name=p.name or f"Product {p.id}",
+    priced = price_cart(db, cart.id)
+    subtotal = priced.subtotal_cents
+    items = [
+        OrderItem(
+            product_id=line.product_id,
+            product_name=line.name,
             product_sku=None,
-            product_image=(p.big_image_url or p.image_url or [None])[0],
-            unit_amount=unit,
-            quantity=qty,
-            line_total=line,
-        ))
+            product_image=(line.big_image_url or line.image_url or (None,))[0],
+            unit_cents=line.unit_cents,
+            quantity=line.quantity,
+            line_total_cents=line.line_cents,
+        )
+        for line in priced.lines
+    ]
 
     currency = checkout_session.get("currency") or "eur"
-    ship_total = _as_money((checkout_session.get("shipping_cost") or {}).get("amount_total", 0) / 100)
-    tax_total  = _as_money(0)
-    discount   = _as_money(0)
-    total      = _as_money(subtotal + ship_total + tax_total - discount)
+    # Stripe amounts are already in cents
+    ship_total = Money((checkout_session.get("shipping_cost") or {}).get("amount_total") or 0)
+    tax_total  = Money(0)
+    discount   = Money(0)
+    total      = subtotal + ship_total + tax_total - discount
 
     status  = OrderStatus.pending
     pstatus = PaymentStatus.succeeded if checkout_session.get("payment_status") == "paid" else PaymentStatus.pending
@@ -218,11 +202,11 @@ def create_order_from_checkout_session(
         guest_session_id=guest_session_id,
         email=_get_email_from_session(checkout_session),
         currency=currency,
-        subtotal_amount=subtotal,
-        discount_amount=discount,
-        shipping_amount=ship_total,
-        tax_amount=tax_total,
-        total_amount=total,
+        subtotal_cents=subtotal,
+        discount_cents=discount,
+        shipping_cents=ship_total,
+        tax_cents=tax_total,
+        total_cents=total,
         status=status,
         payment_status=pstatus,
         stripe_payment_intent_id=_pi_id(checkout_session),
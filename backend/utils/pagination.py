@@ -0,0 +1,116 @@
+# utils/pagination.py
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+from db.models.product import Product
+from db.money import Money
+
+ProductSort = Literal["created", "newest", "price_asc", "price_desc"]
+
+# sort -> (key column, JSON field of that column, descending); the price
+# field is in euros, the column in cents
+PRODUCT_SORTS: Dict[str, Tuple[Any, str, bool]] = {
+    "created": (Product.created_at, "created_at", False),
+    "newest": (Product.created_at, "created_at", True),
+    "price_asc": (Product.price_cents, "price", False),
+    "price_desc": (Product.price_cents, "price", True),
+}
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """Listing filters; hashable so they can be part of a catalog cache key."""
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock_only: bool = False
+
+    def conditions(self) -> List[ColumnElement]:
+        where = []
+        if self.min_price is not None:
+            where.append(Product.price_cents >= Money.from_eur(self.min_price))
+        if self.max_price is not None:
+            where.append(Product.price_cents <= Money.from_eur(self.max_price))
+        if self.in_stock_only:
+            # units held by checkouts in progress are not for sale
+            where.append(Product.stock_quantity - Product.reserved_quantity > 0)
+        return where
+
+
+def product_filters(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock_only: bool = Query(False),
+) -> ProductFilters:
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=422, detail="min_price must not be greater than max_price")
+    return ProductFilters(min_price, max_price, in_stock_only)
+
+
+def encode_cursor(sort: str, value: Any, row_id: Any) -> str:
+    raw = json.dumps({"s": sort, "k": [value, str(row_id)]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        value, row_id = data["k"]
+        if data["s"] != sort:
+            raise ValueError("sort mismatch")
+        if PRODUCT_SORTS[sort][1] == "created_at":
+            value = datetime.fromisoformat(value)
+        else:
+            value = Money.from_eur(float(value))
+        return value, UUID(row_id)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate_products(
+    query: Select,
+    sort: str,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+) -> Select:
+    """
+    Order a product query by (sort key, id) and page it. With a cursor the
+    page starts right after the cursor row (keyset, index range scan);
+    without one `skip` is applied as a plain offset for older clients.
+    """
+    column, _, desc = PRODUCT_SORTS[sort]
+    key = tuple_(column, Product.id)
+
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, sort))
+        query = query.where(key < after if desc else key > after)
+    elif skip:
+        query = query.offset(skip)
+
+    if desc:
+        query = query.order_by(column.desc(), Product.id.desc())
+    else:
+        query = query.order_by(column.asc(), Product.id.asc())
+    return query.limit(limit)
+
+
+def next_cursor(rows: List[Dict[str, Any]], sort: str, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Split the `limit + 1` rows (encoded products) fetched for a page into
+    the page and the cursor for the next one. The cursor is None unless the
+    extra row exists, so a client never follows it to an empty page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    items = rows[:limit]
+    last = items[-1]
+    return items, encode_cursor(sort, last[PRODUCT_SORTS[sort][1]], last["id"])
@@ -0,0 +1,135 @@
+# utils/pricing.py
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db.models.cart_item import CartItem
+from db.models.product import Product
+from db.money import Money
+
+CURRENCY = "eur"
+FREE_THRESHOLD_CENTS = Money(15000)
+
+# (method, label, cents); free at or above FREE_THRESHOLD_CENTS
+SHIPPING_METHODS: List[Tuple[str, str, Money]] = [
+    ("genikh", "Γενική Ταχυδρομική", Money(1000)),
+    ("boxnow", "BoxNow", Money(300)),
+]
+
+# session.info key of the priced carts loaded in this session
+_MEMO = "priced_carts"
+
+
+@dataclass(frozen=True)
+class PricedLine:
+    product_id: UUID
+    name: str
+    unit_cents: Money
+    quantity: int
+    image_url: Tuple[str, ...] = ()
+    big_image_url: Tuple[str, ...] = ()
+
+    @property
+    def line_cents(self) -> Money:
+        return self.unit_cents * self.quantity
+
+
+@dataclass(frozen=True)
+class ShippingRate:
+    method: str
+    label: str
+    cents: Money
+
+    @property
+    def free(self) -> bool:
+        return self.cents == 0
+
+
+@dataclass(frozen=True)
+class PricedCart:
+    """
+    A cart priced from the catalog in one query: what GET /cart shows,
+    what Stripe charges and what the order records, so they always agree.
+    """
+    cart_id: UUID
+    lines: Tuple[PricedLine, ...]
+    subtotal_cents: Money
+    shipping: Tuple[ShippingRate, ...]
+
+    @property
+    def total_items(self) -> int:
+        return sum(line.quantity for line in self.lines)
+
+    @property
+    def free_shipping(self) -> bool:
+        return self.subtotal_cents >= FREE_THRESHOLD_CENTS
+
+    def shipping_for(self, method: Optional[str]) -> Optional[ShippingRate]:
+        """The rate for `method`, or the first one if it is not given."""
+        if method is None:
+            return self.shipping[0] if self.shipping else None
+        return next((rate for rate in self.shipping if rate.method == method), None)
+
+
+def shipping_rates(subtotal_cents: Money) -> Tuple[ShippingRate, ...]:
+    free = subtotal_cents >= FREE_THRESHOLD_CENTS
+    return tuple(ShippingRate(method, label, Money(0) if free else cents) for method, label, cents in SHIPPING_METHODS)
+
+
+def _lines_query(cart_id: UUID):
+    return (
+        select(CartItem.product_id, CartItem.quantity, Product.name, Product.price_cents, Product.image_url, Product.big_image_url)
+        .join(Product, CartItem.product_id == Product.id)
+        .where(CartItem.cart_id == cart_id)
+        .order_by(Product.name, Product.id)
+    )
+
+
+def _priced(cart_id: UUID, rows: Iterable[Any]) -> PricedCart:
+    lines = tuple(
+        PricedLine(
+            product_id=row.product_id,
+            name=row.name or f"Product {row.product_id}",
+            unit_cents=row.price_cents,
+            quantity=row.quantity or 1,
+            image_url=tuple(row.image_url or ()),
+            big_image_url=tuple(row.big_image_url or ()),
+        )
+        for row in rows
+    )
+    subtotal = sum((line.line_cents for line in lines), Money(0))
+    return PricedCart(cart_id=cart_id, lines=lines, subtotal_cents=subtotal, shipping=shipping_rates(subtotal))
+
+
+def price_cart(db: Session, cart_id: UUID) -> PricedCart:
+    """
+    The priced cart, loaded once per session (that is, per request) and
+    reused until the session writes, commits or rolls back.
+    """
+    memo = db.info.setdefault(_MEMO, {})
+    if cart_id not in memo:
+        memo[cart_id] = _priced(cart_id, db.execute(_lines_query(cart_id)).all())
+    return memo[cart_id]
+
+
+async def price_cart_async(db: AsyncSession, cart_id: UUID) -> PricedCart:
+    memo = db.info.setdefault(_MEMO, {})
+    if cart_id not in memo:
+        memo[cart_id] = _priced(cart_id, (await db.execute(_lines_query(cart_id))).all())
+    return memo[cart_id]
+
+
+def forget_priced_carts(db: Session | AsyncSession) -> None:
+    """Drop the memoized carts, after changing cart lines with plain SQL."""
+    db.info.pop(_MEMO, None)
+
+
+@event.listens_for(Session, "after_flush")
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_priced_carts(session: Session, *args) -> None:
+    session.info.pop(_MEMO, None)
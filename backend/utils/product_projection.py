@@ -0,0 +1,167 @@
+# utils/product_projection.py
+import asyncio
+import threading
+import time
+import weakref
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from db.models.product import Product
+from utils.catalog_cache import catalog_cache
+
+
+class ProductProjection:
+    """
+    An in-memory view of the products table, kept by every worker.
+
+    Built from `source` on first use. Product writes committed through this
+    worker are applied incrementally, from snapshots of the `fields` the
+    view depends on; writes reported by other workers (catalog
+    notifications) or older than `ttl` make it rebuild on the next request.
+
+    Subclasses supply `source`, `fields`, `_build` (rows to new state,
+    outside the lock), `_install` and `_apply` (under the lock).
+    """
+
+    source: Select
+    fields: Tuple[str, ...]
+    # rebuild in a worker thread from async requests, for builds heavy enough to stall the event loop
+    threaded_build = False
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self.built_at: Optional[float] = None
+        self.builds = 0
+        self.updates = 0
+
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._async_build: Optional[asyncio.Lock] = None
+        self._remote_seen = 0
+        self._version = 0
+        _projections.add(self)
+
+    def _build(self, products: Iterable[Any]) -> Any:
+        raise NotImplementedError
+
+    def _install(self, state: Any) -> None:
+        raise NotImplementedError
+
+    def _apply(self, product_id: UUID, product: Optional[Any]) -> None:
+        """Add or replace one product, or drop it when `product` is None."""
+        raise NotImplementedError
+
+    @property
+    def stale(self) -> bool:
+        if self.built_at is None:
+            return True
+        if catalog_cache.remote_invalidations != self._remote_seen:
+            return True
+        return time.monotonic() - self.built_at > self.ttl
+
+    def rebuild(self, products: Iterable[Any], version: Optional[int] = None) -> None:
+        """
+        Replace the view with `products`. `version` is what `_version` was
+        when the rows were read; if a local write landed since, the rows may
+        predate it and the view stays stale.
+        """
+        remote_seen = catalog_cache.remote_invalidations
+        state = self._build(products)
+        with self._lock:
+            self._install(state)
+            self._remote_seen = remote_seen
+            self.builds += 1
+            self.built_at = None if version is not None and version != self._version else time.monotonic()
+
+    def ensure(self, db: Session) -> None:
+        """Build or refresh the view from `db` if it is stale."""
+        if not self.stale:
+            return
+        with self._build_lock:
+            if self.stale:
+                version = self._version
+                self.rebuild(db.execute(self.source).all(), version)
+
+    async def ensure_async(self, db: AsyncSession) -> None:
+        if not self.stale:
+            return
+        if self._async_build is None:
+            self._async_build = asyncio.Lock()
+        async with self._async_build:
+            if self.stale:
+                version = self._version
+                rows = (await db.execute(self.source)).all()
+                if self.threaded_build:
+                    await asyncio.to_thread(self.rebuild, rows, version)
+                else:
+                    self.rebuild(rows, version)
+
+    def upsert(self, product: Any) -> None:
+        with self._lock:
+            self._version += 1
+            self.updates += 1
+            self._apply(product.id, product)
+
+    def remove(self, product_id: UUID) -> None:
+        with self._lock:
+            self._version += 1
+            self.updates += 1
+            self._apply(product_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"builds": self.builds, "updates": self.updates, "stale": self.stale}
+
+
+_projections: "weakref.WeakSet[ProductProjection]" = weakref.WeakSet()
+
+# session.info key of the product changes waiting for the commit:
+# {projection: {product id: snapshot, or None when deleted}}
+_CHANGES = "projection_changes"
+
+
+def _queue(target: Product, projections: Iterable[ProductProjection], deleted: bool = False) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    changes = session.info.setdefault(_CHANGES, {})
+    for projection in projections:
+        changes.setdefault(projection, {})[target.id] = None if deleted else SimpleNamespace(
+            id=target.id, **{a: getattr(target, a) for a in projection.fields}
+        )
+
+
+@event.listens_for(Product, "after_insert")
+def _queue_insert(mapper, connection, target: Product) -> None:
+    _queue(target, _projections)
+
+
+@event.listens_for(Product, "after_update")
+def _queue_update(mapper, connection, target: Product) -> None:
+    # only the views whose fields changed (stock alone touches none)
+    state = inspect(target)
+    _queue(target, [p for p in _projections if any(state.attrs[a].history.has_changes() for a in p.fields)])
+
+
+@event.listens_for(Product, "after_delete")
+def _queue_remove(mapper, connection, target: Product) -> None:
+    _queue(target, _projections, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    for projection, products in session.info.pop(_CHANGES, {}).items():
+        for product_id, product in products.items():
+            if product is None:
+                projection.remove(product_id)
+            else:
+                projection.upsert(product)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session) -> None:
+    session.info.pop(_CHANGES, None)
@@ -0,0 +1,171 @@
+# utils/rankings.py
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import desc, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db.database import engine
+from db.models.job_watermark import JobWatermark
+from db.models.order import Order
+from utils.background import BackgroundWorker
+from utils.catalog_cache import mark_catalog_changed
+
+load_dotenv(override=True)
+
+RANKINGS_ENABLED = os.getenv("RANKINGS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Bestseller windows in days, served as /products/bestsellers?window=N.
+RANKING_WINDOWS = sorted({int(w) for w in os.getenv("RANKING_WINDOWS", "7,30,90").split(",") if w.strip()})
+RANKING_INTERVAL = float(os.getenv("RANKING_INTERVAL", "300"))
+# Orders younger than this are left for the next run, so a transaction that
+# commits late cannot land behind the watermark.
+RANKING_LAG = float(os.getenv("RANKING_LAG", "60"))
+# Ranks kept per window.
+RANKING_MAX = int(os.getenv("RANKING_MAX", "500"))
+
+# pg_try_advisory_xact_lock key: one worker runs the job at a time.
+RANKING_LOCK = 0x706E6F6801
+JOB_NAME = "rankings"
+
+# Order timestamps are naive Europe/Athens wall time (see Order.created_at).
+ATHENS = ZoneInfo("Europe/Athens")
+_START = (datetime.min, UUID(int=0))
+
+_AGGREGATE = text("""
+    INSERT INTO product_sales_daily (product_id, day, quantity)
+    SELECT oi.product_id, o.created_at::date, sum(oi.quantity)
+    FROM orders o JOIN order_items oi ON oi.order_id = o.id
+    WHERE (o.created_at, o.id) > (:after_at, :after_id)
+      AND (o.created_at, o.id) <= (:last_at, :last_id)
+      AND o.created_at::date > :oldest
+      AND o.payment_status = 'succeeded'
+      AND oi.product_id IS NOT NULL
+    GROUP BY 1, 2
+    ON CONFLICT (product_id, day) DO UPDATE SET quantity = product_sales_daily.quantity + EXCLUDED.quantity
+""")
+
+_REBUILD = text("""
+    INSERT INTO product_rankings (window_days, rank, product_id, quantity)
+    SELECT window_days, rank, product_id, quantity FROM (
+        SELECT w.days AS window_days, d.product_id, sum(d.quantity) AS quantity,
+               row_number() OVER (PARTITION BY w.days ORDER BY sum(d.quantity) DESC, d.product_id) AS rank
+        FROM product_sales_daily d
+        JOIN unnest(CAST(:windows AS int[])) AS w(days) ON d.day > CAST(:today AS date) - w.days
+        GROUP BY w.days, d.product_id
+    ) ranked
+    WHERE rank <= :max_rank
+""")
+
+
+def refresh_rankings(db: Session, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    One run of the ranking job. Folds the paid orders placed since the
+    watermark into product_sales_daily, then rebuilds product_rankings if
+    there were any or the day has changed (windows slide daily). Returns
+    None without doing anything if another worker holds the job lock.
+    Commits.
+    """
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RANKING_LOCK}).scalar():
+        db.rollback()
+        return None
+
+    now = now or datetime.now(ATHENS).replace(tzinfo=None)
+    today = now.date()
+    oldest = today - timedelta(days=max(RANKING_WINDOWS))
+    watermark = db.get(JobWatermark, JOB_NAME)
+    after = (watermark.created_at, watermark.order_id) if watermark else _START
+
+    last = db.execute(
+        select(Order.created_at, Order.id)
+        .where(tuple_(Order.created_at, Order.id) > after, Order.created_at < now - timedelta(seconds=RANKING_LAG))
+        .order_by(desc(Order.created_at), desc(Order.id))
+        .limit(1)
+    ).first()
+
+    days = 0
+    if last:
+        days = db.execute(_AGGREGATE, {
+            "after_at": after[0], "after_id": after[1], "last_at": last.created_at, "last_id": last.id, "oldest": oldest,
+        }).rowcount
+        if watermark is None:
+            watermark = JobWatermark(name=JOB_NAME, created_at=last.created_at, order_id=last.id)
+            db.add(watermark)
+        watermark.created_at, watermark.order_id = last.created_at, last.id
+
+    rebuilt = False
+    if days or (watermark is not None and watermark.rebuilt_for != today):
+        db.execute(text("DELETE FROM product_sales_daily WHERE day <= :oldest"), {"oldest": oldest})
+        db.execute(text("DELETE FROM product_rankings"))
+        db.execute(_REBUILD, {"windows": RANKING_WINDOWS, "today": today, "max_rank": RANKING_MAX})
+        watermark.rebuilt_for = today
+        rebuilt = True
+        # cached /products/bestsellers pages hold the old ranks, in every worker
+        mark_catalog_changed(db)
+
+    db.commit()
+    return {"product_days": days, "rebuilt": rebuilt, "watermark": str(watermark.created_at) if watermark else None}
+
+
+def encode_rank_cursor(window: int, rank: int) -> str:
+    raw = json.dumps({"w": window, "r": rank}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_rank_cursor(cursor: str, window: int) -> int:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["w"] != window:
+            raise ValueError("window mismatch")
+        return int(data["r"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class RankingJob(BackgroundWorker):
+    """
+    Runs refresh_rankings every `interval` seconds, first at startup.
+    Every worker runs one; the advisory lock makes all but one skip.
+    """
+
+    thread_name = "rankings"
+    run_at_start = True
+
+    def __init__(self, bind: Engine, interval: float = 300.0, enabled: bool = True):
+        super().__init__(bind, interval, enabled)
+        self.runs = 0
+        self.skipped = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_run_ms: Optional[float] = None
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        with Session(self.bind) as db:
+            result = refresh_rankings(db)
+        if result is None:
+            self.skipped += 1
+        else:
+            self.runs += 1
+            self.last_run = result
+            self.last_run_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "last_run": self.last_run,
+            "last_run_ms": self.last_run_ms,
+        }
+
+
+ranking_job = RankingJob(engine, RANKING_INTERVAL, enabled=RANKINGS_ENABLED)
@@ -0,0 +1,403 @@
+# utils/search.py
+import bisect
+import heapq
+import math
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import Select, false, func, or_, select
+
+from db.models.product import Category, Product, SubCategory
+from utils.catalog_cache import CATALOG_CACHE_TTL
+from utils.product_projection import ProductProjection
+
+load_dotenv(override=True)
+
+# Prefixes shorter than this only match whole words.
+SEARCH_MIN_PREFIX = int(os.getenv("SEARCH_MIN_PREFIX", "2"))
+# Cap on the vocabulary terms a single prefix may expand to.
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", "50"))
+# Postings kept merged and ranked per query word between searches, in total.
+SEARCH_WORD_CACHE = int(os.getenv("SEARCH_WORD_CACHE", "2000000"))
+
+# "memory": the in-process index below. "postgres": the search_vector and
+# trigram indexes, for catalogs too big to hold in every worker; it folds
+# accents the same way but has no Greeklish transliteration.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory").lower()
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+
+# How much a match counts, by how the query word reached the indexed word.
+EXACT, PREFIX, TRANSLIT, TRANSLIT_PREFIX = 1.0, 0.8, 0.6, 0.5
+
+# Greek words shoppers use for each category, indexed with the enum value.
+CATEGORY_TERMS = {
+    Category.rings: "δαχτυλίδι δαχτυλίδια",
+    Category.earrings: "σκουλαρίκι σκουλαρίκια",
+    Category.bracelets: "βραχιόλι βραχιόλια",
+    Category.necklaces: "κολιέ περιδέραιο",
+    Category.crosses: "σταυρός σταυροί",
+    SubCategory.ethnic: "έθνικ",
+    SubCategory.one_of_a_kind: "μοναδικό",
+    SubCategory.minimal: "μίνιμαλ",
+    SubCategory.luxury: "πολυτελές",
+}
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Greek -> Latin, in the spelling Greeklish writers converge on. Digraphs first.
+_GREEK_DIGRAPHS = [
+    ("ου", "u"), ("αι", "e"), ("ει", "i"), ("οι", "i"), ("υι", "i"),
+    ("αυ", "av"), ("ευ", "ev"), ("μπ", "b"), ("ντ", "d"), ("γκ", "g"), ("γγ", "g"),
+]
+_GREEK_LETTERS = str.maketrans({
+    "α": "a", "β": "v", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "i",
+    "θ": "8", "ι": "i", "κ": "k", "λ": "l", "μ": "m", "ν": "n", "ξ": "x",
+    "ο": "o", "π": "p", "ρ": "r", "σ": "s", "τ": "t", "υ": "i", "φ": "f",
+    "χ": "x", "ψ": "ps", "ω": "o",
+})
+# Greeklish spelling variants collapsed to the same form ("8" stands for θ).
+_LATIN_RULES = [
+    ("th", "8"), ("ch", "x"), ("ks", "x"), ("3", "x"),
+    ("ou", "u"), ("oy", "u"), ("ai", "e"), ("ei", "i"), ("oi", "i"),
+    ("au", "av"), ("af", "av"), ("eu", "ev"), ("ef", "ev"),
+    ("mp", "b"), ("nt", "d"), ("gk", "g"), ("gg", "g"), ("ng", "g"),
+    ("h", "i"), ("y", "i"), ("w", "o"),
+]
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and diaeresis, final sigma to sigma."""
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.replace("ς", "σ")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(fold(text)) if text else []
+
+
+@lru_cache(maxsize=100_000)
+def transliterate(token: str) -> str:
+    """
+    Script-independent form of a folded token: Greek is spelled out in
+    Latin and Greeklish variants are collapsed, so "δαχτυλίδι",
+    "daxtylidi" and "dachtilidi" all come out as "daxtilidi".
+    """
+    for greek, latin in _GREEK_DIGRAPHS:
+        token = token.replace(greek, latin)
+    token = token.translate(_GREEK_LETTERS)
+    for variant, canonical in _LATIN_RULES:
+        token = token.replace(variant, canonical)
+    return _REPEATS.sub(r"\1", token)
+
+
+# Transliterated terms live in the same vocabulary, behind this marker.
+_T = "~"
+
+
+def _terms(product: Any) -> Dict[str, float]:
+    """Weighted term frequencies of a product, both spellings of every word."""
+    category = " ".join(
+        f"{c.value} {CATEGORY_TERMS[c]}" for c in (product.category, product.sub_category) if c is not None
+    )
+    fields = {"name": product.name, "category": category, "description": product.description}
+
+    tf: Dict[str, float] = {}
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            tf[token] = tf.get(token, 0.0) + weight
+            key = _T + transliterate(token)
+            tf[key] = tf.get(key, 0.0) + weight
+    return tf
+
+
+class _Index:
+    """The postings themselves; SearchIndex swaps in a fresh one on rebuild."""
+
+    def __init__(self):
+        # term -> {doc: BM25 term-frequency part}; idf is applied per query
+        self.postings: Dict[str, Dict[int, float]] = {}
+        # sorted, for prefix lookups
+        self.vocab: List[str] = []
+        self.doc_ids: Dict[UUID, int] = {}
+        # doc -> (product id, category, sub_category, length, terms)
+        self.docs: Dict[int, Tuple[UUID, Any, Any, float, Tuple[str, ...]]] = {}
+        self.total_length = 0.0
+        # (query word, category, sub_category) -> (scores, same ranked highest
+        # first, terms the word matched); dropped when one of those terms
+        # changes or a new term matches the word
+        self._words: "OrderedDict[Tuple[str, Any, Any], Tuple[Dict[int, float], List[Tuple[int, float]], frozenset]]" = OrderedDict()
+        self._cached_postings = 0
+        self._next_doc = 0
+
+    def add(self, product: Any, tf: Optional[Dict[str, float]] = None, avgdl: Optional[float] = None, sorted_vocab: bool = True) -> None:
+        tf = tf if tf is not None else _terms(product)
+        length = sum(tf.values()) / 2  # every word is counted in both spellings
+        if avgdl is None:
+            avgdl = (self.total_length + length) / (len(self.docs) + 1)
+        norm = K1 * (1 - B + B * length / avgdl)
+
+        doc = self._next_doc
+        self._next_doc += 1
+        self.doc_ids[product.id] = doc
+        self.docs[doc] = (product.id, product.category, product.sub_category, length, tuple(tf))
+        self.total_length += length
+        new_terms = []
+        for term, freq in tf.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                new_terms.append(term)
+                if sorted_vocab:
+                    bisect.insort(self.vocab, term)
+                else:
+                    self.vocab.append(term)
+            postings[doc] = freq * (K1 + 1) / (freq + norm)
+        self._forget(tf.keys(), new_terms)
+
+    def remove(self, product_id: UUID) -> None:
+        doc = self.doc_ids.pop(product_id, None)
+        if doc is None:
+            return
+        _, _, _, length, terms = self.docs.pop(doc)
+        self.total_length -= length
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc]
+            if not postings:
+                del self.postings[term]
+                del self.vocab[bisect.bisect_left(self.vocab, term)]
+        self._forget(terms, ())
+
+    def _forget(self, terms: Iterable[str], new_terms: Iterable[str]) -> None:
+        """
+        Drop cached words that a change to `terms` affects. Words the change
+        does not touch keep their scores, whose idf drifts slightly from the
+        live document counts until they are recomputed.
+        """
+        if not self._words:
+            return
+        terms = set(terms)
+        new_terms = list(new_terms)
+        for key, (_, ranked, matched) in list(self._words.items()):
+            token = key[0]
+            prefixes = (token, _T + transliterate(token))
+            if not matched.isdisjoint(terms) or any(t.startswith(prefixes) for t in new_terms):
+                del self._words[key]
+                self._cached_postings -= len(ranked)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term])
+        return math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+
+    def expand(self, term: str) -> List[str]:
+        if len(term) - term.startswith(_T) < SEARCH_MIN_PREFIX:
+            return []
+        vocab = self.vocab
+        i = bisect.bisect_right(vocab, term)
+        out = []
+        while i < len(vocab) and len(out) < SEARCH_MAX_EXPANSIONS and vocab[i].startswith(term):
+            out.append(vocab[i])
+            i += 1
+        return out
+
+    def variants(self, token: str) -> Dict[str, float]:
+        """Indexed terms a query word matches, with the weight of each match."""
+        key = _T + transliterate(token)
+        variants: Dict[str, float] = {}
+        for term, weight in ((token, EXACT), (key, TRANSLIT)):
+            if term in self.postings:
+                variants[term] = max(variants.get(term, 0.0), weight)
+        for term in self.expand(token):
+            variants.setdefault(term, PREFIX)
+        for term in self.expand(key):
+            variants.setdefault(term, TRANSLIT_PREFIX)
+        return variants
+
+    def word(self, token: str, category: Any = None, sub_category: Any = None) -> Tuple[Dict[int, float], List[Tuple[int, float]], frozenset]:
+        """
+        BM25 score of every document matching a query word (and the filters),
+        as a dict and ranked, plus the indexed terms it matched. A document
+        scores its best matching variant of the word.
+        """
+        key = (token, category, sub_category)
+        cached = self._words.get(key)
+        if cached is not None:
+            self._words.move_to_end(key)
+            return cached
+
+        if category is None and sub_category is None:
+            variants = self.variants(token)
+            scores: Dict[int, float] = {}
+            for term, weight in variants.items():
+                factor = weight * self.idf(term)
+                for doc, impact in self.postings[term].items():
+                    s = factor * impact
+                    if s > scores.get(doc, 0.0):
+                        scores[doc] = s
+            ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)
+            matched = frozenset(variants)
+        else:
+            docs = self.docs
+            _, unfiltered, matched = self.word(token)
+            ranked = [
+                (doc, s) for doc, s in unfiltered
+                if (category is None or docs[doc][1] == category)
+                and (sub_category is None or docs[doc][2] == sub_category)
+            ]
+            scores = dict(ranked)
+
+        cached = self._words[key] = (scores, ranked, matched)
+        self._cached_postings += len(ranked)
+        while self._cached_postings > SEARCH_WORD_CACHE and len(self._words) > 1:
+            _, (_, evicted, _) = self._words.popitem(last=False)
+            self._cached_postings -= len(evicted)
+        return cached
+
+    def top(self, tokens: List[str], category: Any, sub_category: Any, k: int) -> List[int]:
+        """
+        The k best documents containing every token. Each word's documents
+        are walked in score order, all words in step (Fagin's threshold
+        algorithm), and the walk stops once the k-th best total found beats
+        anything an unseen document could reach, so a broad word costs about
+        k documents instead of all of its postings.
+        """
+        words = [self.word(token, category, sub_category) for token in tokens]
+        if not all(scores for scores, _, _ in words):
+            return []
+        if len(words) == 1:
+            return [doc for doc, _ in words[0][1][:k]]
+        words.sort(key=lambda w: len(w[0]))
+
+        docs = self.docs
+        scored = [scores for scores, _, _ in words]
+        seen = set()
+        best: List[Tuple[float, UUID, int]] = []  # min-heap of the k best so far
+        depth = 0
+        while True:
+            threshold = 0.0
+            for _, ranked, _ in words:
+                if depth >= len(ranked):
+                    # every document with this word has been seen
+                    return [doc for _, _, doc in sorted(best, reverse=True)]
+                doc, frontier = ranked[depth]
+                threshold += frontier
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                score = 0.0
+                for other in scored:
+                    s = other.get(doc)
+                    if s is None:
+                        break
+                    score += s
+                else:
+                    # ties broken by id so pages are stable
+                    item = (score, docs[doc][0], doc)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            if len(best) >= k and best[0][0] >= threshold:
+                return [doc for _, _, doc in sorted(best, reverse=True)]
+            depth += 1
+
+
+class SearchIndex(ProductProjection):
+    """
+    In-memory inverted index over product name, description and category,
+    ranked with BM25 (field-weighted term frequencies). Every query word must
+    match; it may match an indexed word exactly, as a prefix, or through its
+    transliteration, with the looser matches scoring lower. Kept up to date
+    as a ProductProjection.
+    """
+
+    source = select(Product.id, Product.name, Product.description, Product.category, Product.sub_category)
+    fields = ("name", "description", "category", "sub_category")
+    threaded_build = True
+
+    def __init__(self, ttl: float = 600.0):
+        super().__init__(ttl)
+        self.queries = 0
+        self._index = _Index()
+
+    def _build(self, products: Iterable[Any]) -> _Index:
+        weighted = [(product, _terms(product)) for product in products]
+        avgdl = sum(sum(tf.values()) for _, tf in weighted) / 2 / max(len(weighted), 1)
+        index = _Index()
+        for product, tf in weighted:
+            index.add(product, tf, avgdl, sorted_vocab=False)
+        index.vocab.sort()
+        return index
+
+    def _install(self, index: _Index) -> None:
+        self._index = index
+
+    def _apply(self, product_id: UUID, product: Optional[Any]) -> None:
+        self._index.remove(product_id)
+        if product is not None:
+            self._index.add(product)
+
+    def search(
+        self,
+        q: str,
+        category: Optional[Category] = None,
+        sub_category: Optional[SubCategory] = None,
+        skip: int = 0,
+        limit: int = 12,
+    ) -> List[UUID]:
+        """Product ids matching every word of `q`, best first."""
+        tokens = list(dict.fromkeys(tokenize(q)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            self.queries += 1
+            index = self._index
+            if not index.docs:
+                return []
+            docs = index.top(tokens, category, sub_category, skip + limit)
+            return [index.docs[doc][0] for doc in docs[skip:]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "products": len(self._index.docs),
+            "terms": len(self._index.postings),
+            **super().stats(),
+            "queries": self.queries,
+        }
+
+
+def search_query(query: Select, q: str) -> Select:
+    """
+    `query` over products narrowed to `q` and ordered by relevance, in SQL
+    (SEARCH_BACKEND=postgres): every word as a prefix against search_vector,
+    or the whole string, % and _ included, inside the name.
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return query.where(false())
+    # folded tokens are letters and digits only, safe inside to_tsquery
+    tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in tokens))
+    return (
+        query
+        .where(or_(Product.search_vector.op("@@")(tsquery), Product.name.icontains(q.strip(), autoescape=True)))
+        .order_by(func.ts_rank(Product.search_vector, tsquery).desc(), Product.id)
+    )
+
+
+search_index = SearchIndex(ttl=CATALOG_CACHE_TTL)
@@ -0,0 +1,143 @@
+# utils/session_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+# (status_code, detail) of a failed verification. Each request raises an
+# HTTPException of its own from it: a shared one would collect the frames
+# of every request that raised it in its __traceback__.
+Rejection = Tuple[int, Any]
+
+
+class _Flight:
+    __slots__ = ("done", "result", "rejection")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.rejection: Optional[Rejection] = None
+
+
+class VerifiedSessionCache:
+    """
+    LRU cache of verified Clerk sessions keyed by a SHA-256 of the token.
+
+    Positive entries live until the session's `expire_at` or `ttl`, whichever
+    comes first. Rejections (401) are remembered for `negative_ttl` so a burst
+    of bad tokens cannot hammer Clerk. Concurrent misses for the same token
+    share a single upstream call.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0, negative_ttl: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        # key -> (expires_at monotonic, result, rejection)
+        self._entries: "OrderedDict[str, tuple[float, Optional[Dict[str, Any]], Optional[Rejection]]]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _expiry(self, result: Dict[str, Any]) -> float:
+        now = time.monotonic()
+        expires = now + self.ttl
+        expire_at = result.get("expire_at")
+        if expire_at:
+            # Clerk reports expire_at in epoch milliseconds.
+            session_left = float(expire_at) / 1000.0 - time.time()
+            expires = min(expires, now + session_left)
+        return expires
+
+    def _store(self, key: str, expires: float, result, rejection) -> None:
+        if expires <= time.monotonic():
+            return
+        self._entries[key] = (expires, result, rejection)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_verify(self, token: str, verify: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        key = self._key(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result, rejection = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    if rejection is not None:
+                        self.negative_hits += 1
+                        raise HTTPException(*rejection)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.expirations += 1
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.rejection is not None:
+                raise HTTPException(*flight.rejection)
+            return flight.result
+
+        try:
+            flight.result = verify()
+        except HTTPException as e:
+            flight.rejection = (e.status_code, e.detail)
+            raise
+        except BaseException:
+            flight.rejection = (503, "Auth service unavailable")
+            raise
+        finally:
+            with self._lock:
+                if flight.result is not None:
+                    self._store(key, self._expiry(flight.result), flight.result, None)
+                elif flight.rejection is not None and flight.rejection[0] == 401:
+                    self._store(key, time.monotonic() + self.negative_ttl, None, flight.rejection)
+                del self._inflight[key]
+            flight.done.set()
+
+        return flight.result
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,214 @@
+# utils/stock.py
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID, uuid4
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db.database import engine
+from db.models.product import Product
+from db.models.stock_reservation import StockReservation
+from utils.background import BackgroundWorker
+from utils.catalog_cache import mark_catalog_changed
+
+load_dotenv(override=True)
+
+# Off until every product's stock_quantity has been filled in: with it on,
+# a product with no stock cannot be checked out.
+STOCK_RESERVATIONS = os.getenv("STOCK_RESERVATIONS", "false").lower() in ("1", "true", "yes")
+# How long checkout holds stock. The Stripe session lasts about as long
+# (see routes/stripe_checkout.py) and Stripe needs at least 30 minutes.
+STOCK_HOLD_MINUTES = max(int(os.getenv("STOCK_HOLD_MINUTES", "30")), 30)
+# Expired holds are kept this much longer, for payment webhooks still in flight.
+STOCK_HOLD_GRACE = float(os.getenv("STOCK_HOLD_GRACE", "300"))
+STOCK_SWEEP_INTERVAL = float(os.getenv("STOCK_SWEEP_INTERVAL", "60"))
+STOCK_SWEEP_BATCH = int(os.getenv("STOCK_SWEEP_BATCH", "500"))
+
+# Deletes holds and gives their units back, in one statement. SKIP LOCKED
+# lets several workers sweep at once and never waits on a hold that a
+# webhook is converting. Returns the number of holds and how many of the
+# products are available again.
+RELEASE_SQL = """
+    WITH released AS (
+        DELETE FROM stock_reservations
+        WHERE id IN (
+            SELECT id FROM stock_reservations
+            WHERE {where}
+            ORDER BY expires_at
+            LIMIT :batch
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING product_id, quantity
+    ), per_product AS (
+        SELECT product_id, sum(quantity) AS quantity FROM released GROUP BY product_id
+    ), returned AS (
+        UPDATE products SET reserved_quantity = products.reserved_quantity - per_product.quantity
+        FROM per_product WHERE products.id = per_product.product_id
+        RETURNING products.stock_quantity - products.reserved_quantity AS available, per_product.quantity
+    )
+    SELECT (SELECT count(*) FROM released), (SELECT count(*) FROM returned WHERE available > 0 AND available <= quantity)
+"""
+_RELEASE_EXPIRED = text(RELEASE_SQL.format(where="expires_at < now() - make_interval(secs => :grace)"))
+_RELEASE_ONE = text(RELEASE_SQL.format(where="reservation_id = :reservation_id"))
+
+# Turns a checkout's holds into sold units; what is available does not
+# change. Returns the number of holds.
+_CONVERT = text("""
+    WITH sold AS (
+        DELETE FROM stock_reservations WHERE reservation_id = :reservation_id
+        RETURNING product_id, quantity
+    ), per_product AS (
+        SELECT product_id, sum(quantity) AS quantity FROM sold GROUP BY product_id
+    ), updated AS (
+        UPDATE products SET stock_quantity = products.stock_quantity - per_product.quantity,
+                            reserved_quantity = products.reserved_quantity - per_product.quantity
+        FROM per_product WHERE products.id = per_product.product_id
+        RETURNING 1
+    )
+    SELECT count(*) FROM sold
+""")
+
+# For a paid order whose holds were already released: take the units anyway.
+_DECREMENT_ORDER = text("""
+    WITH per_product AS (
+        SELECT product_id, sum(quantity) AS quantity FROM order_items
+        WHERE order_id = :order_id AND product_id IS NOT NULL GROUP BY product_id
+    )
+    UPDATE products SET stock_quantity = products.stock_quantity - per_product.quantity
+    FROM per_product WHERE products.id = per_product.product_id
+    RETURNING products.stock_quantity - products.reserved_quantity
+""")
+
+
+def reserve_stock(db: Session, lines: Iterable[Tuple[UUID, int]]) -> Tuple[UUID, datetime]:
+    """
+    Hold stock for a checkout: `lines` are (product_id, quantity) pairs.
+    Each product is claimed with one conditional UPDATE, which only waits
+    for concurrent claims on the same row to commit and then re-checks the
+    remaining stock, so the transaction stays a few statements long.
+    Products are claimed in id order, so two carts cannot deadlock. Commits
+    on success; raises 409 and holds nothing if any product is short.
+    """
+    wanted = Counter()
+    for product_id, quantity in lines:
+        wanted[product_id] += quantity or 1
+
+    reservation_id = uuid4()
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=STOCK_HOLD_MINUTES)
+    held_out = False
+    try:
+        for product_id in sorted(wanted):
+            claimed = db.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.stock_quantity - Product.reserved_quantity >= wanted[product_id])
+                .values(reserved_quantity=Product.reserved_quantity + wanted[product_id])
+                .returning(Product.stock_quantity - Product.reserved_quantity)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if claimed is None:
+                db.rollback()
+                name = db.scalar(select(Product.name).where(Product.id == product_id)) or str(product_id)
+                raise HTTPException(status_code=409, detail=f"Not enough stock for {name}")
+            held_out = held_out or claimed[0] <= 0
+        if held_out:
+            # the last units are held: in_stock_only listings change
+            mark_catalog_changed(db)
+        db.execute(insert(StockReservation), [
+            {"reservation_id": reservation_id, "product_id": product_id, "quantity": quantity, "expires_at": expires_at}
+            for product_id, quantity in wanted.items()
+        ])
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    return reservation_id, expires_at
+
+
+def release_reservation(db: Session, reservation_id: UUID) -> int:
+    """Give a checkout's held units back (Stripe failure, expired session). Commits."""
+    released, restocked = db.execute(_RELEASE_ONE, {"reservation_id": reservation_id, "batch": 1000}).one()
+    if restocked:
+        mark_catalog_changed(db)
+    db.commit()
+    return released
+
+
+def release_expired(db: Session, batch: int = STOCK_SWEEP_BATCH, grace: float = STOCK_HOLD_GRACE) -> int:
+    """Release up to `batch` holds past their expiry plus `grace`. Commits."""
+    released, restocked = db.execute(_RELEASE_EXPIRED, {"batch": batch, "grace": grace}).one()
+    if restocked:
+        mark_catalog_changed(db)
+    db.commit()
+    return released
+
+
+def convert_reservation(db: Session, reservation_id: Optional[UUID], order_id: UUID, new_order: bool) -> int:
+    """
+    Take the units of a completed checkout out of stock. Idempotent: the holds
+    are deleted in the same statement, so a repeated webhook converts
+    nothing. If a new order finds no holds (they expired and were swept),
+    the order's items are taken from stock anyway, possibly below zero, so
+    the oversell shows in the admin panel. Commits.
+    """
+    converted, sold_out = 0, 0
+    if reservation_id is not None:
+        converted = db.execute(_CONVERT, {"reservation_id": reservation_id}).scalar()
+    if not converted and new_order:
+        available = db.execute(_DECREMENT_ORDER, {"order_id": order_id}).scalars().all()
+        if available:
+            # shows in /admin/metrics under stock_sweeper
+            stock_sweeper.paid_without_hold += 1
+        sold_out = sum(1 for a in available if a <= 0)
+    if sold_out:
+        # in_stock_only listings change
+        mark_catalog_changed(db)
+    db.commit()
+    return converted
+
+
+class ReservationSweeper(BackgroundWorker):
+    """
+    Releases expired holds every `interval` seconds, in batches of `batch`.
+    Every worker runs one; SKIP LOCKED keeps them from waiting on each
+    other.
+    """
+
+    thread_name = "stock-sweep"
+
+    def __init__(self, bind: Engine, interval: float = 60.0, batch: int = 500, enabled: bool = True):
+        super().__init__(bind, interval, enabled)
+        self.batch = batch
+        self.sweeps = 0
+        self.released = 0
+        self.paid_without_hold = 0
+
+    def run_once(self) -> int:
+        released = 0
+        with Session(self.bind) as db:
+            while True:
+                n = release_expired(db, self.batch)
+                released += n
+                if n < self.batch:
+                    break
+        self.sweeps += 1
+        self.released += released
+        return released
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "sweeps": self.sweeps,
+            "released": self.released,
+            "paid_without_hold": self.paid_without_hold,
+        }
+
+
+stock_sweeper = ReservationSweeper(engine, STOCK_SWEEP_INTERVAL, STOCK_SWEEP_BATCH, enabled=STOCK_RESERVATIONS)
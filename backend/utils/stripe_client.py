@@ -1,11 +1,30 @@
 # utils/stripe_client.py
-import os, stripe
+import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
-if not STRIPE_SECRET_KEY:
-    raise RuntimeError("Missing STRIPE_SECRET_KEY")
 
-stripe.api_key = STRIPE_SECRET_KEY
+_stripe = None
+_stripe_lock = threading.Lock()
+
+
+def get_stripe():
+    """
+    The configured `stripe` module. The SDK takes about a second to import,
+    so it is loaded on first use (or by the startup warm-up) rather than
+    when the app is imported.
+    """
+    global _stripe
+    if _stripe is None:
+        with _stripe_lock:
+            if _stripe is None:
+                if not STRIPE_SECRET_KEY:
+                    raise RuntimeError("Missing STRIPE_SECRET_KEY")
+                import stripe
+
+                stripe.api_key = STRIPE_SECRET_KEY
+                _stripe = stripe
+    return _stripe
@@ -1,11 +1,16 @@
 import os
 import uuid
-import requests
 import base64
 import json
+import threading
 from typing import Optional, Dict, Any
 from fastapi import Cookie, HTTPException, Header, Response
 from dotenv import load_dotenv
+from jose import JWTError, jwk, jwt
+
+from utils.clerk_client import ClerkUnavailable, get_clerk_client
+from utils.clerk_jwks import JWKSCache, JWKSUnavailable
+from utils.session_cache import VerifiedSessionCache
 
 load_dotenv(override=True)
 
@@ -13,6 +18,25 @@ CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
 CLERK_VERIFY_URL = os.getenv("CLERK_VERIFY_URL")
 CLERK_BASE_URL = os.getenv("CLERK_BASE_URL")
 
+# "local" verifies session JWTs against the cached JWKS; "remote" keeps the
+# old behaviour of asking Clerk's sessions endpoint on every request.
+CLERK_VERIFY_MODE = os.getenv("CLERK_VERIFY_MODE", "local").lower()
+CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL") or (f"{CLERK_BASE_URL}/v1/jwks" if CLERK_BASE_URL else None)
+CLERK_JWKS_TTL = int(os.getenv("CLERK_JWKS_TTL", "3600"))
+CLERK_JWT_KEY = os.getenv("CLERK_JWT_KEY")
+CLERK_AUTHORIZED_PARTIES = [p.strip() for p in os.getenv("CLERK_AUTHORIZED_PARTIES", "").split(",") if p.strip()]
+CLERK_CLOCK_SKEW = int(os.getenv("CLERK_CLOCK_SKEW", "5"))
+
+verified_sessions = VerifiedSessionCache(
+    maxsize=int(os.getenv("CLERK_SESSION_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("CLERK_SESSION_CACHE_TTL", "60")),
+    negative_ttl=float(os.getenv("CLERK_SESSION_CACHE_NEGATIVE_TTL", "10")),
+)
+
+_jwks: Optional[JWKSCache] = None
+_jwks_lock = threading.Lock()
+_pem_key = None
+
 
 def get_token(
     authorization: Optional[str] = Header(None),
@@ -29,74 +53,105 @@ def get_token(
     return None
 
 
-def verify_token(session_token: str) -> Dict[str, Any]:
-    if not CLERK_SECRET_KEY:
-        raise HTTPException(status_code=500, detail="Server misconfigured: missing CLERK_SECRET_KEY")
-    
-    # Check if this is a JWT token (starts with eyJ)
-    if session_token.startswith('eyJ'):
-        print(f"DEBUG: Detected JWT token, extracting session ID...")
-        try:
-            # Decode JWT payload (second part after first dot)
-            parts = session_token.split('.')
-            if len(parts) < 2:
-                raise ValueError("Invalid JWT format")
-            
-            # Add padding if needed for base64 decoding
-            payload = parts[1]
-            payload += '=' * (4 - len(payload) % 4)
-            
-            # Decode the payload
-            decoded_payload = base64.b64decode(payload)
-            jwt_data = json.loads(decoded_payload)
-            
-            session_id = jwt_data.get('sid')
-            if not session_id:
-                raise ValueError("No session ID found in JWT")
-            
-            print(f"DEBUG: Extracted session_id: {session_id}")
-            
-            # Use the sessions endpoint with the extracted session ID
-            verify_url = f"{CLERK_BASE_URL}/v1/sessions/{session_id}"
-            
-        except Exception as e:
-            print(f"DEBUG: Failed to decode JWT: {e}")
-            raise HTTPException(status_code=401, detail="Invalid JWT token format")
-    else:
-        print(f"DEBUG: Using session token directly")
-        # If it's already a session ID, use the verify endpoint
-        verify_url = f"{CLERK_VERIFY_URL}?session_token={session_token}"
-    
-    print(f"DEBUG: Using URL: {verify_url}")
-    
+def _jwks_cache() -> JWKSCache:
+    global _jwks
+    if _jwks is None:
+        with _jwks_lock:
+            if _jwks is None:
+                _jwks = JWKSCache(CLERK_JWKS_URL, get_clerk_client(), ttl=CLERK_JWKS_TTL)
+    return _jwks
+
+
+def _verification_key(kid: Optional[str]):
+    global _pem_key
+    if CLERK_JWT_KEY:
+        # PEM public key from the Clerk dashboard: fully networkless.
+        if _pem_key is None:
+            _pem_key = jwk.construct(CLERK_JWT_KEY.replace("\\n", "\n"), algorithm="RS256")
+        return _pem_key
+
+    if not CLERK_JWKS_URL:
+        raise HTTPException(status_code=500, detail="Server misconfigured: missing CLERK_JWKS_URL")
+    if not kid:
+        raise HTTPException(status_code=401, detail="Invalid JWT token format")
+
+    try:
+        key = _jwks_cache().get_key(kid)
+    except JWKSUnavailable:
+        raise HTTPException(status_code=503, detail="Auth service unavailable")
+    if key is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return key
+
+
+def _verify_jwt_locally(session_token: str) -> Dict[str, Any]:
     try:
-        # Use GET request for both JWT and session token verification
-        res = requests.get(
-            verify_url,
-            headers={"Authorization": f"Bearer {CLERK_SECRET_KEY}"},
-            timeout=5,
+        header = jwt.get_unverified_header(session_token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid JWT token format")
+
+    key = _verification_key(header.get("kid"))
+    try:
+        claims = jwt.decode(
+            session_token,
+            key,
+            algorithms=["RS256"],
+            options={"verify_aud": False, "leeway": CLERK_CLOCK_SKEW},
         )
-        
-        print(f"DEBUG: Clerk API response status: {res.status_code}")
-        if res.status_code != 200:
-            print(f"DEBUG: Clerk API error response: {res.text}")
-        else:
-            print(f"DEBUG: Clerk API success!")
-            
-    except requests.RequestException as e:
-        print(f"DEBUG: Request exception: {e}")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+    # with an allow-list, a token without azp is not trusted either
+    if CLERK_AUTHORIZED_PARTIES and claims.get("azp") not in CLERK_AUTHORIZED_PARTIES:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+    user_id = claims.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Session verified but user_id missing")
+
+    return {
+        "user_id": user_id,
+        "session_id": claims.get("sid"),
+        "expire_at": claims["exp"] * 1000 if claims.get("exp") else None,
+        "email": claims.get("email"),
+        "raw": claims,
+    }
+
+
+def _session_id_from_jwt(session_token: str) -> str:
+    try:
+        # Decode JWT payload (second part after first dot)
+        parts = session_token.split('.')
+        if len(parts) < 2:
+            raise ValueError("Invalid JWT format")
+
+        # Add padding if needed for base64 decoding
+        payload = parts[1]
+        payload += '=' * (4 - len(payload) % 4)
+        jwt_data = json.loads(base64.urlsafe_b64decode(payload))
+
+        session_id = jwt_data.get('sid')
+        if not session_id:
+            raise ValueError("No session ID found in JWT")
+        return session_id
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid JWT token format")
+
+
+def _verify_remote(verify_url: str) -> Dict[str, Any]:
+    try:
+        res = get_clerk_client().get(verify_url)
+    except ClerkUnavailable:
         raise HTTPException(status_code=503, detail="Auth service unavailable")
-    
+
     if res.status_code != 200:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
 
     data = res.json()
     user_id = data.get("user_id") or data.get("sub")
     if not user_id:
-        print(f"DEBUG: No user_id found in response: {data}")
         raise HTTPException(status_code=401, detail="Session verified but user_id missing")
 
-    print(f"DEBUG: Success! user_id={user_id}")
     return {
         "user_id": user_id,
         "session_id": data.get("id"),
@@ -106,6 +161,27 @@ def verify_token(session_token: str) -> Dict[str, Any]:
     }
 
 
+def verify_token(session_token: str) -> Dict[str, Any]:
+    """
+    Session JWTs are verified in-process (signature, exp/nbf, azp) unless
+    CLERK_VERIFY_MODE=remote. Opaque session tokens fall back to Clerk's API,
+    with results cached in `verified_sessions`.
+    """
+    is_jwt = session_token.startswith('eyJ')
+    if is_jwt and CLERK_VERIFY_MODE == "local":
+        return _verify_jwt_locally(session_token)
+
+    if not CLERK_SECRET_KEY:
+        raise HTTPException(status_code=500, detail="Server misconfigured: missing CLERK_SECRET_KEY")
+
+    if is_jwt:
+        verify_url = f"{CLERK_BASE_URL}/v1/sessions/{_session_id_from_jwt(session_token)}"
+    else:
+        verify_url = f"{CLERK_VERIFY_URL}?session_token={session_token}"
+
+    return verified_sessions.get_or_verify(session_token, lambda: _verify_remote(verify_url))
+
+
 def get_current_user(
     authorization: Optional[str] = Header(None),
     session_cookie: Optional[str] = Cookie(None, alias="__session"),